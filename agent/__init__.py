@@ -1,10 +1,12 @@
 """启发式搜索智能体。"""
 
-from agent.base import SearchParams, SearchResult
+from agent.base import SearchLimits, SearchParams, SearchResult, StopReason
 from agent.flow import HeuristicSearchAgent
 
 __all__ = [
     "HeuristicSearchAgent",
+    "SearchLimits",
     "SearchParams",
     "SearchResult",
+    "StopReason",
 ]
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass, field
+from enum import StrEnum
 from math import sqrt
 
+from game_base.core.bitboard import BoardGeometry, board_geometry
 from game_base.core.models import GameState, GameStatus, Move, PlayerColor, Position, RuleSet
 
 BOARD_ROWS = 4
@@ -13,6 +16,9 @@ BOARD_CELLS = BOARD_ROWS * BOARD_WIDTH
 BOARD_END = 1 << BOARD_CELLS
 FULL_MASK = BOARD_END - 1
 NWEIGHTS = 17
+CONNECT_N = 4
+# 旧 C++ 棋盘对应的移位/掩码组，其他尺寸按 RuleSet 现场生成。
+CPP_GEOMETRY = board_geometry(BOARD_ROWS, BOARD_WIDTH, CONNECT_N)
 
 # 旧 C++ `bfs::node` 的终局界限值，保留原语义。
 BLACK_WINS = BOARD_CELLS
@@ -133,6 +139,84 @@ class SearchParams:
         return int(1.0 / self.gamma) + 1
 
 
+@dataclass(frozen=True, slots=True)
+class SearchLimits:
+    """在参数给出的迭代上限之外，再按墙钟时间或新建节点数截断搜索。"""
+
+    time_limit_ms: float | None = None
+    max_nodes: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.time_limit_ms is not None and self.time_limit_ms <= 0:
+            raise ValueError("time_limit_ms must be positive.")
+        if self.max_nodes is not None and self.max_nodes <= 0:
+            raise ValueError("max_nodes must be positive.")
+
+
+@dataclass(slots=True)
+class SearchStats:
+    """`decide_move` 的可选埋点：计数器、阶段计时和每轮迭代回调。
+
+    传给 `decide_move(stats=...)` 后，每次调用开始时清零计数器并在搜索中
+    累加；不传时搜索主循环只多一次 `is None` 判断。“评估”指一次候选打分
+    （`score_moves`），`patterns_scanned` 是这些打分实际遍历的模式数。
+    `pv_length` 是最终 principal variation 的长度，即论文里的规划深度。
+    `on_iteration` 在每轮迭代结束后以本对象为参数调用。
+    """
+
+    on_iteration: Callable[[SearchStats], None] | None = field(
+        default=None, repr=False, compare=False
+    )
+    iterations: int = 0
+    nodes_created: int = 0
+    evaluator_calls: int = 0
+    candidate_cache_hits: int = 0
+    patterns_scanned: int = 0
+    backprop_steps: int = 0
+    max_depth: int = 0
+    pv_length: int = 0
+    best_move: BitMask = 0
+    root_value: float = 0.0
+    # 各阶段累计的纳秒数：选择（沿 PV 下探）、候选生成、展开、回传。
+    selection_ns: int = 0
+    generation_ns: int = 0
+    expansion_ns: int = 0
+    backup_ns: int = 0
+
+    @property
+    def planning_depth(self) -> int:
+        return self.pv_length
+
+    def reset(self) -> None:
+        """清零全部计数器，保留回调。"""
+
+        self.iterations = 0
+        self.nodes_created = 0
+        self.evaluator_calls = 0
+        self.candidate_cache_hits = 0
+        self.patterns_scanned = 0
+        self.backprop_steps = 0
+        self.max_depth = 0
+        self.pv_length = 0
+        self.best_move = 0
+        self.root_value = 0.0
+        self.selection_ns = 0
+        self.generation_ns = 0
+        self.expansion_ns = 0
+        self.backup_ns = 0
+
+
+class StopReason(StrEnum):
+    """搜索结束的原因，便于区分“想清楚了”和“预算用完了”。"""
+
+    ITERATIONS = "iterations"
+    STABLE = "stable"
+    DETERMINED = "determined"
+    TIME_LIMIT = "time_limit"
+    NODE_LIMIT = "node_limit"
+    LAPSE = "lapse"
+
+
 @dataclass(frozen=True, slots=True)
 class Pattern:
     """与旧 C++ `pattern` 对应的单个模式实例。"""
@@ -163,6 +247,11 @@ class SearchResult:
     used_lapse: bool
     dropped_feature_count: int
     scored_actions: tuple[ScoredAction, ...]
+    stop_reason: StopReason = StopReason.ITERATIONS
+    # 本次搜索新建的节点数，即节点预算计量的对象。
+    node_count: int = 0
+    # 调用方传入 `stats` 时指向同一个对象，否则为 None。
+    stats: SearchStats | None = None
 
 
 @dataclass(frozen=True, slots=True)
@@ -228,53 +317,12 @@ class BitBoard:
         return BitBoard(black=self.black, white=self.white | bitmask)
 
 
-@dataclass(slots=True)
-class SearchNode:
-    """按旧 C++ `bfs::node` 语义保存搜索树节点。"""
-
-    board: BitBoard
-    val: float
-    player: PlayerColor
-    depth: int
-    move_bitmask: BitMask = 0
-    move: Move | None = None
-    parent: "SearchNode | None" = None
-    children: list["SearchNode"] = field(default_factory=list)
-    best: "SearchNode | None" = None
-    opt: int = field(init=False)
-    pess: int = field(init=False)
-
-    def __post_init__(self) -> None:
-        if self.board.black_has_won():
-            terminal = BLACK_WINS - self.depth
-            self.opt = terminal
-            self.pess = terminal
-            self.val = BLACK_WIN_VALUE
-            return
-        if self.board.white_has_won():
-            terminal = WHITE_WINS + self.depth
-            self.opt = terminal
-            self.pess = terminal
-            self.val = WHITE_WIN_VALUE
-            return
-        if self.board.is_full():
-            self.opt = 0
-            self.pess = 0
-            self.val = DRAW_VALUE
-            return
-        self.pess = WHITE_WINS + self.depth + 1
-        self.opt = BLACK_WINS - self.depth - 1
-
-    def determined(self) -> bool:
-        return self.opt == self.pess
-
-
 def validate_cpp_rules(rule_set: RuleSet) -> None:
     """旧 C++ 模型只支持 4x9、四连。"""
 
     if rule_set.rows != BOARD_ROWS or rule_set.cols != BOARD_WIDTH:
         raise ValueError("C++ heuristic replication requires a 4x9 board.")
-    if rule_set.connect_n != 4:
+    if rule_set.connect_n != CONNECT_N:
         raise ValueError("C++ heuristic replication requires connect_n=4.")
 
 
@@ -325,29 +373,7 @@ def winner_from_status(status: GameStatus) -> PlayerColor | None:
     return None
 
 
-def is_win(pieces: BitMask) -> bool:
-    """按旧 C++ 的位运算方式判断四连。"""
-
-    return bool(
-        pieces
-        & (pieces >> BOARD_WIDTH)
-        & (pieces >> (2 * BOARD_WIDTH))
-        & (pieces >> (3 * BOARD_WIDTH))
-    ) or bool(
-        pieces
-        & (pieces >> (BOARD_WIDTH + 1))
-        & (pieces >> (2 * BOARD_WIDTH + 2))
-        & (pieces >> (3 * BOARD_WIDTH + 3))
-    ) or bool(
-        pieces
-        & (pieces >> (BOARD_WIDTH - 1))
-        & (pieces >> (2 * BOARD_WIDTH - 2))
-        & (pieces >> (3 * BOARD_WIDTH - 3))
-        & 0x0000000000001F8
-    ) or bool(
-        pieces
-        & (pieces >> 1)
-        & (pieces >> 2)
-        & (pieces >> 3)
-        & 0x0000001F8FC7E3F
-    )
+def is_win(pieces: BitMask, geometry: BoardGeometry = CPP_GEOMETRY) -> bool:
+    """按预生成的移位/掩码组判断连线，默认即旧 C++ 的 4x9 四连。"""
+
+    return geometry.is_win(pieces)
@@ -0,0 +1,213 @@
+"""对一批棋面反复抽样 `decide_move`，估计模型在每个棋面上的落子分布。
+
+同一棋面的各次抽样共享 `prepare_root` 预先算好的根节点评估、合法动作和
+模式相关位集，只重做每次都不同的特征 Dropout 与搜索。失误分支不必抽样：
+它在合法动作上均匀分布，按失误率解析地混入搜索分支的经验分布，
+
+    p = lapse / n + (1 - lapse) * p_search，
+
+标准误也只来自搜索分支，`(1 - lapse) * sqrt(p_search * (1 - p_search) / N)`。
+
+给出 `tolerance` 时每抽完一批就检查一次，所有格子的标准误都不超过它就
+提前停止。只抽一批时经验分布常常集中在一格、标准误恰好为 0，所以停止
+判据用加一平滑后的频率，避免过早停下。
+
+棋面按块分给进程池，每个棋面的随机种子都由主 `seed` 预先派生，结果只
+取决于 `seed`，与进程数和调度顺序无关。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from math import sqrt
+from random import Random
+from typing import TYPE_CHECKING
+
+from agent.base import (
+    BOARD_CELLS,
+    SearchParams,
+    position_to_bitmask,
+    validate_cpp_rules,
+)
+from agent.search import decide_move, prepare_root
+from game_base.core.models import CompactGameState, GameState, RuleSet
+from game_base.optional import require_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass(frozen=True, slots=True)
+class PositionDistribution:
+    """单个棋面的估计；第 j 项对应位 `1 << j`，非法格子恒为 0。"""
+
+    probabilities: tuple[float, ...]
+    stderr: tuple[float, ...]
+    samples: int
+    converged: bool
+
+
+@dataclass(frozen=True, slots=True)
+class MoveDistribution:
+    """一批棋面的落子分布，数组的行与输入棋面一一对应。
+
+    `probabilities` 与 `stderr` 形状为 (棋面数, 36)，`samples` 与 `converged`
+    形状为 (棋面数,)。未给 `tolerance` 时只有不需抽样的精确结果（失误率为 1）
+    记为收敛。
+    """
+
+    probabilities: np.ndarray
+    stderr: np.ndarray
+    samples: np.ndarray
+    converged: np.ndarray
+
+
+def estimate_move_distributions(
+    states: Iterable[GameState | CompactGameState],
+    params: SearchParams,
+    rule_set: RuleSet,
+    samples: int = 200,
+    seed: int = 0,
+    tolerance: float | None = None,
+    batch_size: int = 25,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+    chunk_size: int = 4,
+) -> MoveDistribution:
+    """估计 `params` 下每个棋面的落子概率，每个棋面至多抽样 `samples` 次。
+
+    `max_workers=1` 且不传 `executor` 时在当前进程里顺序计算。
+    """
+
+    np = require_numpy("Move distributions")
+    validate_cpp_rules(rule_set)
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    _check_sampling(samples, tolerance, batch_size)
+    states = list(states)
+    master = Random(seed)
+    seeds = [master.getrandbits(64) for _ in states]
+    tasks = [
+        (
+            states[start : start + chunk_size],
+            seeds[start : start + chunk_size],
+            params,
+            rule_set,
+            samples,
+            tolerance,
+            batch_size,
+        )
+        for start in range(0, len(states), chunk_size)
+    ]
+
+    if executor is not None:
+        chunks = list(executor.map(_sample_chunk, tasks))
+    elif max_workers == 1:
+        chunks = [_sample_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            chunks = list(pool.map(_sample_chunk, tasks))
+
+    positions = [position for chunk in chunks for position in chunk]
+    return MoveDistribution(
+        probabilities=np.array(
+            [position.probabilities for position in positions], dtype=np.float64
+        ).reshape(len(positions), BOARD_CELLS),
+        stderr=np.array(
+            [position.stderr for position in positions], dtype=np.float64
+        ).reshape(len(positions), BOARD_CELLS),
+        samples=np.array([position.samples for position in positions], dtype=np.int64),
+        converged=np.array([position.converged for position in positions], dtype=bool),
+    )
+
+
+def sample_move_distribution(
+    state: GameState | CompactGameState,
+    rule_set: RuleSet,
+    params: SearchParams,
+    rng: Random,
+    samples: int = 200,
+    tolerance: float | None = None,
+    batch_size: int = 25,
+) -> PositionDistribution:
+    """对单个棋面抽样搜索分支，再把失误分支解析地混进去。"""
+
+    _check_sampling(samples, tolerance, batch_size)
+    lapse = params.lapse_rate
+    search_params = replace(params, lapse_rate=0.0)
+    prepared = prepare_root(state, rule_set, search_params)
+    legal = [action.bitmask for action in prepared.legal_moves]
+    if not legal:
+        raise ValueError("Position has no legal moves.")
+
+    counts = dict.fromkeys(legal, 0)
+    drawn = 0
+    # 失误率为 1 时搜索分支的权重为 0，分布是精确的均匀分布，无需抽样。
+    converged = lapse >= 1.0
+    while not converged and drawn < samples:
+        batch = min(batch_size, samples - drawn)
+        for _ in range(batch):
+            result = decide_move(state, rule_set, search_params, rng, prepared=prepared)
+            position = result.move.position
+            counts[position_to_bitmask(position.row, position.col)] += 1
+        drawn += batch
+        converged = (
+            tolerance is not None
+            and _smoothed_stderr(counts, drawn, lapse) <= tolerance
+        )
+
+    probabilities = [0.0] * BOARD_CELLS
+    stderr = [0.0] * BOARD_CELLS
+    for bitmask, count in counts.items():
+        index = bitmask.bit_length() - 1
+        share = count / drawn if drawn else 0.0
+        probabilities[index] = lapse / len(legal) + (1.0 - lapse) * share
+        if drawn:
+            stderr[index] = (1.0 - lapse) * sqrt(share * (1.0 - share) / drawn)
+    return PositionDistribution(
+        probabilities=tuple(probabilities),
+        stderr=tuple(stderr),
+        samples=drawn,
+        converged=converged,
+    )
+
+
+def _smoothed_stderr(counts: dict[int, int], drawn: int, lapse: float) -> float:
+    # 加一平滑：没抽到或全部抽到的格子也保留一点方差，避免第一批就判定收敛。
+    largest = 0.0
+    for count in counts.values():
+        share = (count + 1) / (drawn + 2)
+        largest = max(largest, share * (1.0 - share))
+    return (1.0 - lapse) * sqrt(largest / drawn)
+
+
+def _check_sampling(samples: int, tolerance: float | None, batch_size: int) -> None:
+    if samples <= 0:
+        raise ValueError("samples must be positive.")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive.")
+    if tolerance is not None and tolerance <= 0:
+        raise ValueError("tolerance must be positive.")
+
+
+def _sample_chunk(
+    task: tuple[
+        Sequence[GameState | CompactGameState],
+        Sequence[int],
+        SearchParams,
+        RuleSet,
+        int,
+        float | None,
+        int,
+    ],
+) -> list[PositionDistribution]:
+    # 进程池的工作函数必须是模块顶层函数才能被 pickle。
+    states, seeds, params, rule_set, samples, tolerance, batch_size = task
+    return [
+        sample_move_distribution(
+            state, rule_set, params, Random(seed), samples, tolerance, batch_size
+        )
+        for state, seed in zip(states, seeds, strict=True)
+    ]
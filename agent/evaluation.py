@@ -3,11 +3,16 @@
 from __future__ import annotations
 
 import re
+import warnings
+from dataclasses import dataclass
 from functools import lru_cache
+from importlib import import_module
 from pathlib import Path
 from random import Random
+from typing import TYPE_CHECKING, Any
 
 from agent.base import (
+    BOARD_CELLS,
     BOARD_END,
     FULL_MASK,
     BitBoard,
@@ -20,11 +25,27 @@ from agent.base import (
     center_value_for_bit,
     iter_single_bit_masks,
 )
+from agent.symmetry import canonical_key, pattern_set_is_symmetric
 from game_base.core.models import RuleSet
+from game_base.optional import require_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
 
 _PATTERN_RE = re.compile(
     r"\{(0x[0-9A-Fa-f]+)ULL,(0x[0-9A-Fa-f]+)ULL,(\d+),w_act,w_pass,delta,(\d+)\}"
 )
+CPP_FEATURES_PATH = (
+    Path(__file__).resolve().parents[1]
+    / "fourinarow"
+    / "Model code"
+    / "features_all.cpp"
+)
+PATTERN_COUNT = 731
+
+
+class PatternTableWarning(UserWarning):
+    """没有生成的模式表、模式改从 C++ 源解析时发出。"""
 
 
 def evaluate_board(board: BitBoard, params: SearchParams) -> float:
@@ -53,6 +74,55 @@ def evaluate_board(board: BitBoard, params: SearchParams) -> float:
     return total if player is PlayerColor.BLACK else -total
 
 
+class EvaluationCache:
+    """`evaluate_board` 的有界 LRU 缓存，可按对称规范形共享结果。
+
+    `symmetric` 缺省时检查模式表是否在对称变换下封闭，只有封闭时才按
+    规范形做键，保证命中结果与直接计算一致。模式表不封闭时缺省按原棋盘
+    做键，对称棋面之间不共享任何结果，也不会省下条目；只有模式表对称或
+    显式传入 `symmetric=True` 时才会共享。缓存绑定一组参数。
+    """
+
+    def __init__(
+        self,
+        params: SearchParams,
+        max_entries: int = 200_000,
+        symmetric: bool | None = None,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+        self.params = params
+        self.max_entries = max_entries
+        self.symmetric = (
+            pattern_set_is_symmetric(load_patterns()) if symmetric is None else symmetric
+        )
+        self.hits = 0
+        self.misses = 0
+        self._values: dict[tuple[BitMask, BitMask], float] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def evaluate(self, board: BitBoard) -> float:
+        if self.symmetric:
+            black, white, _ = canonical_key(board.black, board.white)
+        else:
+            black, white = board.black, board.white
+        key = (black, white)
+        value = self._values.pop(key, None)
+        if value is not None:
+            self._values[key] = value
+            self.hits += 1
+            return value
+        self.misses += 1
+        # 规范形与原棋盘的行棋方、黑方视角分值都相同，直接评估规范形即可。
+        value = evaluate_board(BitBoard(black=black, white=white), self.params)
+        if len(self._values) >= self.max_entries:
+            del self._values[next(iter(self._values))]
+        self._values[key] = value
+        return value
+
+
 def get_pruned_moves(
     board: BitBoard,
     player: PlayerColor,
@@ -61,10 +131,42 @@ def get_pruned_moves(
     params: SearchParams,
     rng: Random,
     kept_patterns: tuple[Pattern, ...],
+    pattern_index: PatternIndex | None = None,
+    relevant: int = 0,
 ) -> list[ScoredAction]:
     """按旧 C++ `get_pruned_moves` 规则返回剪枝后的候选动作。"""
 
-    candidates = get_moves(
+    scored = prune_scored_moves(
+        score_moves(
+            board=board,
+            player=player,
+            self_player=self_player,
+            rule_set=rule_set,
+            params=params,
+            rng=rng,
+            kept_patterns=kept_patterns,
+            pattern_index=pattern_index,
+            relevant=relevant,
+        ),
+        params,
+    )
+    return _to_scored_actions(scored, player, rule_set)
+
+
+def get_moves(
+    board: BitBoard,
+    player: PlayerColor,
+    self_player: PlayerColor,
+    rule_set: RuleSet,
+    params: SearchParams,
+    rng: Random,
+    kept_patterns: tuple[Pattern, ...],
+    pattern_index: PatternIndex | None = None,
+    relevant: int = 0,
+) -> list[ScoredAction]:
+    """按旧 C++ `heuristic::get_moves` 计算所有合法动作的即时增量。"""
+
+    scored = score_moves(
         board=board,
         player=player,
         self_player=self_player,
@@ -72,19 +174,30 @@ def get_pruned_moves(
         params=params,
         rng=rng,
         kept_patterns=kept_patterns,
+        pattern_index=pattern_index,
+        relevant=relevant,
     )
-    if not candidates:
+    return _to_scored_actions(scored, player, rule_set)
+
+
+def prune_scored_moves(
+    scored: list[tuple[BitMask, float]], params: SearchParams
+) -> list[tuple[BitMask, float]]:
+    """保留与最优候选相差不到 `pruning_thresh` 的前缀。"""
+
+    if not scored:
         return []
 
+    best_value = scored[0][1]
     cutoff = 1
-    while cutoff < len(candidates):
-        if abs(candidates[0].value - candidates[cutoff].value) >= params.pruning_thresh:
+    while cutoff < len(scored):
+        if abs(best_value - scored[cutoff][1]) >= params.pruning_thresh:
             break
         cutoff += 1
-    return candidates[:cutoff]
+    return scored[:cutoff]
 
 
-def get_moves(
+def score_moves(
     board: BitBoard,
     player: PlayerColor,
     self_player: PlayerColor,
@@ -92,13 +205,22 @@ def get_moves(
     params: SearchParams,
     rng: Random,
     kept_patterns: tuple[Pattern, ...],
-) -> list[ScoredAction]:
-    """按旧 C++ `heuristic::get_moves` 计算所有合法动作的即时增量。"""
+    pattern_index: PatternIndex | None = None,
+    relevant: int = 0,
+) -> list[tuple[BitMask, float]]:
+    """`get_moves` 的核心：按值降序返回 (单格位, 即时增量)，不构造 Move。
+
+    传入 `pattern_index` 时只扫描 `relevant` 位集里的模式。其余模式对结果
+    没有任何贡献，且遍历顺序不变，所以浮点累加结果与全量扫描逐位一致。
+    """
 
     legal_bitmasks = legal_bitmasks_for_board(board, rule_set)
     if not legal_bitmasks:
         return []
 
+    if pattern_index is not None:
+        kept_patterns = pattern_index.select(relevant)
+
     center_lookup = center_value_lookup()
     c_act = params.c_self if player is self_player else params.c_opp
     c_pass = params.c_opp if player is self_player else params.c_self
@@ -112,20 +234,13 @@ def get_moves(
         elif pattern_contained(pattern, board, player.other()):
             delta_l -= c_act * diff_act_pass(pattern, params)
 
-    candidates: list[ScoredAction] = []
-    lookup: dict[BitMask, int] = {}
+    # dict 保持合法动作的插入顺序，稳定排序后与旧实现的候选顺序一致。
+    values: dict[BitMask, float] = {}
     for bitmask in legal_bitmasks:
         value = delta_l + params.center_weight * center_lookup[bitmask]
         if params.noise_std > 0:
             value += rng.gauss(0.0, params.noise_std)
-        lookup[bitmask] = len(candidates)
-        candidates.append(
-            ScoredAction(
-                move=bitmask_to_move(bitmask, player, rule_set),
-                value=value,
-                bitmask=bitmask,
-            )
-        )
+        values[bitmask] = value
 
     for pattern in kept_patterns:
         if not pattern_is_active(pattern, board):
@@ -135,35 +250,304 @@ def get_moves(
         missing_opp = missing_pieces(pattern, board, player.other())
 
         if (missing_self & missing_opp) and missing_self.bit_count() == 1:
-            index = lookup.get(missing_self)
-            if index is not None:
-                candidates[index] = replace_scored_action(
-                    candidates[index],
-                    candidates[index].value + c_pass * params.w_pass[pattern.weight_index],
-                )
+            if missing_self in values:
+                values[missing_self] += c_pass * params.w_pass[pattern.weight_index]
 
         if missing_self == 0 and pattern_just_active(pattern, board):
             for bitmask in iter_single_bit_masks(pattern.pieces_empty):
-                index = lookup.get(bitmask)
-                if index is not None:
-                    candidates[index] = replace_scored_action(
-                        candidates[index],
-                        candidates[index].value
-                        - c_pass * params.w_pass[pattern.weight_index],
-                    )
+                if bitmask in values:
+                    values[bitmask] -= c_pass * params.w_pass[pattern.weight_index]
 
         if missing_opp == 0 and pattern_just_active(pattern, board):
             for bitmask in iter_single_bit_masks(pattern.pieces_empty):
-                index = lookup.get(bitmask)
-                if index is not None:
-                    candidates[index] = replace_scored_action(
-                        candidates[index],
-                        candidates[index].value
-                        + c_act * params.w_act[pattern.weight_index],
-                    )
+                if bitmask in values:
+                    values[bitmask] += c_act * params.w_act[pattern.weight_index]
+
+    return sorted(values.items(), key=lambda item: item[1], reverse=True)
+
+
+@dataclass(frozen=True, slots=True)
+class PatternIndex:
+    """一次搜索所用模式的按格倒排索引。
+
+    模式下标即它在 `patterns` 里的位置；“相关”位集的第 i 位表示第 i 个
+    模式在当前棋盘上可能对 `get_moves` 产生贡献，见 `pattern_is_relevant`。
+    """
+
+    patterns: tuple[Pattern, ...]
+    # 单格位 -> 触及该格（pieces 或 pieces_empty）的模式下标。
+    cell_patterns: dict[BitMask, tuple[int, ...]]
+    # 单格位 -> 上面这些下标组成的位集。
+    cell_masks: dict[BitMask, int]
+    # 本次搜索实际保留的模式位集；-1 表示 `patterns` 全部保留。
+    kept: int = -1
+
+    def select(self, relevant: int) -> list[Pattern]:
+        """按下标升序取出位集里的模式，保持与全量遍历相同的顺序。"""
+
+        relevant &= self.kept
+        selected: list[Pattern] = []
+        while relevant:
+            lowest = relevant & -relevant
+            selected.append(self.patterns[lowest.bit_length() - 1])
+            relevant ^= lowest
+        return selected
+
+    def restrict(self, kept: int) -> PatternIndex:
+        """共享倒排索引，只把 `kept` 之外的模式排除在 `select` 结果之外。
+
+        相关位集仍按全部模式维护，被丢弃的模式在取出时才被滤掉；下标顺序
+        不变，所以打分与按保留模式单独建索引逐位一致。
+        """
+
+        return PatternIndex(
+            patterns=self.patterns,
+            cell_patterns=self.cell_patterns,
+            cell_masks=self.cell_masks,
+            kept=self.kept & kept,
+        )
+
+
+@lru_cache(maxsize=1)
+def full_pattern_index() -> PatternIndex:
+    """`load_patterns()` 全集的索引，配合 `restrict` 在多次搜索间复用。"""
+
+    return build_pattern_index(load_patterns())
+
+
+def build_pattern_index(patterns: tuple[Pattern, ...]) -> PatternIndex:
+    cell_patterns: dict[BitMask, list[int]] = {}
+    cell_masks: dict[BitMask, int] = {}
+    for index, pattern in enumerate(patterns):
+        pattern_bit = 1 << index
+        cover = pattern.pieces | pattern.pieces_empty
+        while cover:
+            bitmask = cover & -cover
+            cell_patterns.setdefault(bitmask, []).append(index)
+            cell_masks[bitmask] = cell_masks.get(bitmask, 0) | pattern_bit
+            cover ^= bitmask
+    return PatternIndex(
+        patterns=patterns,
+        cell_patterns={
+            bitmask: tuple(indices) for bitmask, indices in cell_patterns.items()
+        },
+        cell_masks=cell_masks,
+    )
+
+
+def relevant_patterns(index: PatternIndex, board: BitBoard) -> int:
+    """全量计算一次相关位集，用于搜索根节点。"""
 
-    candidates.sort(key=lambda candidate: candidate.value, reverse=True)
-    return candidates
+    relevant = 0
+    for position, pattern in enumerate(index.patterns):
+        if pattern_is_relevant(pattern, board):
+            relevant |= 1 << position
+    return relevant
+
+
+def advance_relevant_patterns(
+    index: PatternIndex,
+    relevant: int,
+    board: BitBoard,
+    bitmask: BitMask,
+) -> int:
+    """`board` 是在 `bitmask` 落子之后的棋盘；只重算触及该格的模式。"""
+
+    touched = index.cell_patterns.get(bitmask)
+    if touched is None:
+        return relevant
+    relevant &= ~index.cell_masks[bitmask]
+    for position in touched:
+        if pattern_is_relevant(index.patterns[position], board):
+            relevant |= 1 << position
+    return relevant
+
+
+def pattern_is_relevant(pattern: Pattern, board: BitBoard) -> bool:
+    """模式仍激活、棋子只属于一方且至多缺一子时，才可能影响候选打分。
+
+    落子只会让空位减少、棋子增多，因此一个模式的状态只会在有棋子落在它
+    覆盖的格子上时改变，这正是增量维护的依据。
+    """
+
+    if board.nempty(pattern.pieces_empty) < pattern.n:
+        return False
+    black_count = (pattern.pieces & board.black).bit_count()
+    white_count = (pattern.pieces & board.white).bit_count()
+    if black_count and white_count:
+        return False
+    return black_count + white_count >= pattern.pieces.bit_count() - 1
+
+
+def evaluate_boards(
+    black: np.ndarray,
+    white: np.ndarray,
+    params: SearchParams,
+) -> np.ndarray:
+    """`evaluate_board` 的批量版本：输入两列 uint64 位掩码，返回黑方视角分值。
+
+    逐格、逐模式按标量路径的顺序累加，不满足条件时加 0.0，
+    因此每个棋盘的结果与 `evaluate_board` 逐位一致。
+    """
+
+    np = require_numpy("Batch evaluation")
+    black, white = _as_bitmask_arrays(black, white)
+    player_is_black = _player_is_black(black, white)
+    own = np.where(player_is_black, black, white)
+    other = np.where(player_is_black, white, black)
+    occupied = black | white
+    total = np.zeros(black.shape, dtype=np.float64)
+
+    center_lookup = center_value_lookup()
+    for bitmask, center_value in center_lookup.items():
+        bit = np.uint64(bitmask)
+        weighted = params.center_weight * center_value
+        total += np.where((own & bit) != 0, weighted, 0.0)
+        total -= np.where((other & bit) != 0, weighted, 0.0)
+
+    arrays = pattern_arrays()
+    for position, pattern in enumerate(load_patterns()):
+        pieces = arrays.pieces[position]
+        active = (
+            np.bitwise_count(arrays.pieces_empty[position] & ~occupied) >= pattern.n
+        )
+        own_contains = (pieces & ~own) == 0
+        other_contains = (pieces & ~other) == 0
+        total += np.where(active & own_contains, params.w_act[pattern.weight_index], 0.0)
+        total -= np.where(
+            active & ~own_contains & other_contains,
+            params.w_pass[pattern.weight_index],
+            0.0,
+        )
+
+    return np.where(player_is_black, total, -total)
+
+
+def get_moves_batch(
+    black: np.ndarray,
+    white: np.ndarray,
+    params: SearchParams,
+    kept_mask: np.ndarray | None = None,
+    self_player: PlayerColor | None = None,
+    noise: np.ndarray | None = None,
+) -> np.ndarray:
+    """`get_moves` 的批量版本，返回 (棋盘数, 36) 的逐格即时增量。
+
+    第 j 列对应位 `1 << j`，已占用的格子为 NaN；结果不排序也不剪枝。
+    `kept_mask` 是对 `load_patterns()` 的保留掩码，形状为 (731,) 或
+    (棋盘数, 731)，缺省表示全部保留。`self_player` 缺省时每个棋盘的行棋方
+    都视为搜索方。`noise` 与列对齐，可由 `draw_move_noise` 按标量路径的
+    抽样顺序生成；给定相同掩码与噪声时，结果与 `get_moves` 逐位一致。
+    """
+
+    np = require_numpy("Batch evaluation")
+    black, white = _as_bitmask_arrays(black, white)
+    player_is_black = _player_is_black(black, white)
+    own = np.where(player_is_black, black, white)
+    other = np.where(player_is_black, white, black)
+    occupied = black | white
+    legal = ~occupied & np.uint64(FULL_MASK)
+
+    if self_player is None:
+        is_self = np.ones(black.shape, dtype=bool)
+    else:
+        is_self = player_is_black == (self_player is PlayerColor.BLACK)
+    c_act = np.where(is_self, params.c_self, params.c_opp)
+    c_pass = np.where(is_self, params.c_opp, params.c_self)
+
+    if kept_mask is None:
+        kept_mask = np.ones(len(load_patterns()), dtype=bool)
+    kept_mask = np.asarray(kept_mask, dtype=bool)
+    per_board_mask = kept_mask.ndim == 2
+
+    arrays = pattern_arrays()
+    patterns = load_patterns()
+    # 先一次算好每个模式的激活、包含和缺子情况，两轮遍历共用。
+    states: list[tuple[int, Any, Any, Any, Any]] = []
+    delta_l = np.zeros(black.shape, dtype=np.float64)
+    for position, pattern in enumerate(patterns):
+        if per_board_mask:
+            kept = kept_mask[:, position]
+        elif kept_mask[position]:
+            kept = True
+        else:
+            continue
+        pieces = arrays.pieces[position]
+        nempty = np.bitwise_count(arrays.pieces_empty[position] & ~occupied)
+        active = (nempty >= pattern.n) & kept
+        missing_self = pieces & ~own
+        missing_opp = pieces & ~other
+        states.append(
+            (position, active, missing_self, missing_opp, nempty == pattern.n)
+        )
+
+        diff = diff_act_pass(pattern, params)
+        own_contains = missing_self == 0
+        delta_l -= np.where(active & own_contains, c_pass * diff, 0.0)
+        delta_l -= np.where(
+            active & ~own_contains & (missing_opp == 0), c_act * diff, 0.0
+        )
+
+    center = np.array(
+        [center_value_lookup()[1 << cell] for cell in range(BOARD_CELLS)],
+        dtype=np.float64,
+    )
+    values = delta_l[:, None] + params.center_weight * center[None, :]
+    if noise is not None and params.noise_std > 0:
+        values += noise
+
+    for position, active, missing_self, missing_opp, just_active in states:
+        pattern = patterns[position]
+        w_pass = c_pass * params.w_pass[pattern.weight_index]
+        w_act = c_act * params.w_act[pattern.weight_index]
+
+        one_missing = (
+            active
+            & ((missing_self & missing_opp) != 0)
+            & (np.bitwise_count(missing_self) == 1)
+        )
+        for bitmask in iter_single_bit_masks(pattern.pieces):
+            cell = bitmask.bit_length() - 1
+            hit = one_missing & (missing_self == np.uint64(bitmask))
+            values[:, cell] += np.where(hit, w_pass, 0.0)
+
+        self_done = active & (missing_self == 0) & just_active
+        opp_done = active & (missing_opp == 0) & just_active
+        for bitmask in iter_single_bit_masks(pattern.pieces_empty):
+            cell = bitmask.bit_length() - 1
+            values[:, cell] -= np.where(self_done, w_pass, 0.0)
+            values[:, cell] += np.where(opp_done, w_act, 0.0)
+
+    cells = np.arange(BOARD_CELLS, dtype=np.uint64)
+    is_legal = ((legal[:, None] >> cells[None, :]) & np.uint64(1)) != 0
+    return np.where(is_legal, values, np.nan)
+
+
+def draw_move_noise(
+    black: np.ndarray,
+    white: np.ndarray,
+    params: SearchParams,
+    rng: Random,
+) -> np.ndarray:
+    """按标量 `get_moves` 的顺序（逐棋盘、逐合法格）抽取候选噪声。"""
+
+    np = require_numpy("Batch evaluation")
+    black, white = _as_bitmask_arrays(black, white)
+    noise = np.zeros((black.shape[0], BOARD_CELLS), dtype=np.float64)
+    if params.noise_std <= 0:
+        return noise
+    for row, occupied in enumerate((black | white).tolist()):
+        for bitmask in iter_single_bit_masks(FULL_MASK & ~occupied):
+            noise[row, bitmask.bit_length() - 1] = rng.gauss(0.0, params.noise_std)
+    return noise
+
+
+def kept_pattern_mask(kept_patterns: tuple[Pattern, ...]) -> np.ndarray:
+    """把 `sample_kept_patterns` 的结果转成对 `load_patterns()` 的布尔掩码。"""
+
+    np = require_numpy("Batch evaluation")
+    kept = set(kept_patterns)
+    return np.array([pattern in kept for pattern in load_patterns()], dtype=bool)
 
 
 def sample_kept_patterns(params: SearchParams, rng: Random) -> tuple[Pattern, ...]:
@@ -178,6 +562,17 @@ def sample_kept_patterns(params: SearchParams, rng: Random) -> tuple[Pattern, ..
     return tuple(kept)
 
 
+def sample_kept_mask(params: SearchParams, rng: Random) -> int:
+    """与 `sample_kept_patterns` 抽样顺序相同，返回 `load_patterns()` 下标位集。"""
+
+    kept = 0
+    for index, pattern in enumerate(load_patterns()):
+        if rng.random() < params.delta[pattern.weight_index]:
+            continue
+        kept |= 1 << index
+    return kept
+
+
 def legal_bitmasks_for_board(board: BitBoard, rule_set: RuleSet) -> tuple[BitMask, ...]:
     """旧 C++ 模型把所有空格都视为合法手。"""
 
@@ -205,8 +600,17 @@ def diff_act_pass(pattern: Pattern, params: SearchParams) -> float:
     return params.w_act[pattern.weight_index] - params.w_pass[pattern.weight_index]
 
 
-def replace_scored_action(candidate: ScoredAction, value: float) -> ScoredAction:
-    return ScoredAction(move=candidate.move, value=value, bitmask=candidate.bitmask)
+def _to_scored_actions(
+    scored: list[tuple[BitMask, float]], player: PlayerColor, rule_set: RuleSet
+) -> list[ScoredAction]:
+    return [
+        ScoredAction(
+            move=bitmask_to_move(bitmask, player, rule_set),
+            value=value,
+            bitmask=bitmask,
+        )
+        for bitmask, value in scored
+    ]
 
 
 @lru_cache(maxsize=1)
@@ -221,21 +625,134 @@ def center_value_lookup() -> dict[BitMask, float]:
     return lookup
 
 
+@dataclass(frozen=True, slots=True)
+class PatternGroup:
+    """共用一个权重下标的模式，按列存放。
+
+    四列逐项对齐；`order` 是每个模式在 C++ 源文件里的序号，组内升序。
+    """
+
+    weight_index: int
+    pieces: tuple[BitMask, ...]
+    pieces_empty: tuple[BitMask, ...]
+    required_empty: tuple[int, ...]
+    order: tuple[int, ...]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def patterns(self) -> tuple[Pattern, ...]:
+        return tuple(
+            Pattern(pieces=pieces, pieces_empty=pieces_empty, n=n, weight_index=w)
+            for pieces, pieces_empty, n, w in zip(
+                self.pieces,
+                self.pieces_empty,
+                self.required_empty,
+                (self.weight_index,) * len(self),
+                strict=True,
+            )
+        )
+
+
+@lru_cache(maxsize=1)
+def load_pattern_groups() -> tuple[PatternGroup, ...]:
+    """读取按权重下标分组的 731 个模式，组按权重下标升序。
+
+    模式有两个来源，按顺序尝试：
+
+    1. `agent.pattern_table`：由 `python -m agent.pattern_codegen` 从 C++ 源生成
+       的常量模块，本身就按组存放各列，加载只是一次导入。仓库里不提交这个
+       文件，需要在有 C++ 源的环境里自行生成。
+    2. 没有生成表时回退到解析 `CPP_FEATURES_PATH` 指向的 C++
+       `features_all.cpp` 再分组，并发出一次 `PatternTableWarning`，提示加载
+       走的是慢路径、模式取决于当前目录下的那份 C++ 源。两者都没有时抛出
+       `FileNotFoundError`。
+
+    结果按进程缓存，警告也只出现一次。
+    """
+
+    try:
+        pattern_table = import_module("agent.pattern_table")
+    except ModuleNotFoundError as error:
+        if error.name != "agent.pattern_table":
+            raise
+        warnings.warn(
+            "agent.pattern_table is missing; parsing patterns from "
+            f"{CPP_FEATURES_PATH}. Run `python -m agent.pattern_codegen` to "
+            "generate the table.",
+            PatternTableWarning,
+            stacklevel=2,
+        )
+        return group_patterns(_load_cpp_patterns(CPP_FEATURES_PATH))
+
+    groups = pattern_groups_from_table(pattern_table.WEIGHT_GROUPS)
+    _check_pattern_count(sum(len(group) for group in groups))
+    return groups
+
+
 @lru_cache(maxsize=1)
 def load_patterns() -> tuple[Pattern, ...]:
-    """直接解析旧 C++ `features_all.cpp`，避免手抄 731 个模式。"""
+    """按 C++ 源文件里的顺序排列的 731 个模式，由各组的 `order` 还原。"""
+
+    return patterns_in_source_order(load_pattern_groups())
+
+
+@lru_cache(maxsize=1)
+def patterns_by_weight() -> dict[int, tuple[Pattern, ...]]:
+    """按权重下标分组的模式；组内保持原始顺序。"""
+
+    return {group.weight_index: group.patterns() for group in load_pattern_groups()}
+
+
+def group_patterns(patterns: tuple[Pattern, ...]) -> tuple[PatternGroup, ...]:
+    """把源文件顺序的模式按权重下标分组，记下每个模式的原始序号。"""
+
+    members: dict[int, list[int]] = {}
+    for order, pattern in enumerate(patterns):
+        members.setdefault(pattern.weight_index, []).append(order)
+    return tuple(
+        PatternGroup(
+            weight_index=weight,
+            pieces=tuple(patterns[order].pieces for order in members[weight]),
+            pieces_empty=tuple(
+                patterns[order].pieces_empty for order in members[weight]
+            ),
+            required_empty=tuple(patterns[order].n for order in members[weight]),
+            order=tuple(members[weight]),
+        )
+        for weight in sorted(members)
+    )
+
+
+def pattern_groups_from_table(
+    weight_groups: dict[int, tuple[tuple[int, ...], ...]],
+) -> tuple[PatternGroup, ...]:
+    """把生成表里的 `WEIGHT_GROUPS` 常量包装成 `PatternGroup`。"""
 
-    features_path = (
-        Path(__file__).resolve().parents[1]
-        / "fourinarow"
-        / "Model code"
-        / "features_all.cpp"
+    return tuple(
+        PatternGroup(weight, pieces, pieces_empty, required_empty, order)
+        for weight, (pieces, pieces_empty, required_empty, order) in sorted(
+            weight_groups.items()
+        )
     )
-    if not features_path.exists():
-        raise FileNotFoundError(f"Missing C++ feature table: {features_path}")
 
-    source = features_path.read_text(encoding="utf-8")
-    patterns = tuple(
+
+def patterns_in_source_order(
+    groups: tuple[PatternGroup, ...],
+) -> tuple[Pattern, ...]:
+    slots: list[Pattern | None] = [None] * sum(len(group) for group in groups)
+    for group in groups:
+        for order, pattern in zip(group.order, group.patterns(), strict=True):
+            slots[order] = pattern
+    if any(pattern is None for pattern in slots):
+        raise ValueError("Pattern groups do not cover every source position.")
+    return tuple(pattern for pattern in slots if pattern is not None)
+
+
+def parse_cpp_patterns(source: str) -> tuple[Pattern, ...]:
+    """从旧 C++ `features_all.cpp` 的源码文本里解析出模式表。"""
+
+    return tuple(
         Pattern(
             pieces=int(pieces, 16),
             pieces_empty=int(pieces_empty, 16),
@@ -246,6 +763,67 @@ def load_patterns() -> tuple[Pattern, ...]:
             source
         )
     )
-    if len(patterns) != 731:
-        raise ValueError(f"Expected 731 patterns, found {len(patterns)}.")
+
+
+def _load_cpp_patterns(features_path: Path) -> tuple[Pattern, ...]:
+    if not features_path.exists():
+        raise FileNotFoundError(
+            f"Missing C++ feature table: {features_path}; "
+            "generate agent/pattern_table.py with `python -m agent.pattern_codegen`."
+        )
+    patterns = parse_cpp_patterns(features_path.read_text(encoding="utf-8"))
+    _check_pattern_count(len(patterns))
     return patterns
+
+
+def _check_pattern_count(count: int) -> None:
+    if count != PATTERN_COUNT:
+        raise ValueError(f"Expected {PATTERN_COUNT} patterns, found {count}.")
+
+
+@dataclass(frozen=True, slots=True)
+class PatternArrays:
+    """731 个模式的列式表示，供批量路径做向量化位运算。"""
+
+    pieces: np.ndarray
+    pieces_empty: np.ndarray
+    n: np.ndarray
+    weight_index: np.ndarray
+
+
+@lru_cache(maxsize=1)
+def pattern_arrays() -> PatternArrays:
+    np = require_numpy("Batch evaluation")
+    groups = load_pattern_groups()
+    # 各组的列直接拼接，再按源文件序号排回 `load_patterns()` 的顺序。
+    source_order = np.argsort(
+        np.concatenate([np.array(group.order, dtype=np.int64) for group in groups])
+    )
+
+    def column(values: list[tuple[int, ...]], dtype: Any) -> np.ndarray:
+        return np.concatenate([np.array(part, dtype=dtype) for part in values])[
+            source_order
+        ]
+
+    return PatternArrays(
+        pieces=column([group.pieces for group in groups], np.uint64),
+        pieces_empty=column([group.pieces_empty for group in groups], np.uint64),
+        n=column([group.required_empty for group in groups], np.int64),
+        weight_index=column(
+            [(group.weight_index,) * len(group) for group in groups], np.int64
+        ),
+    )
+
+
+def _as_bitmask_arrays(black: Any, white: Any) -> tuple[np.ndarray, np.ndarray]:
+    np = require_numpy("Batch evaluation")
+    black = np.asarray(black, dtype=np.uint64)
+    white = np.asarray(white, dtype=np.uint64)
+    if black.shape != white.shape or black.ndim != 1:
+        raise ValueError("black and white must be 1-D arrays of the same length.")
+    return black, white
+
+
+def _player_is_black(black: np.ndarray, white: np.ndarray) -> np.ndarray:
+    np = require_numpy("Batch evaluation")
+    return np.bitwise_count(black | white) % 2 == 0
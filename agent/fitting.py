@@ -0,0 +1,547 @@
+"""`SearchParams` 的拟合驱动：无导数优化、交叉验证、磁盘缓存与参数恢复。
+
+优化在单位立方体里进行，`ParameterSpace` 负责把向量映射成 `SearchParams`。
+每次目标函数求值都是一次 IBS 对数似然估计，其随机种子由 (参数, 数据切片,
+抽样设置) 的哈希派生，所以结果是这三者的纯函数；`LikelihoodCache` 把它
+记在本地 SQLite 里。崩溃或中断后重跑同一个拟合，优化器按相同的路径回放，
+已算过的点全部命中缓存，直到追上中断的位置；参数范围或折数有重叠的多次
+扫描也共享同一份缓存。
+
+不同受试者和不同折的拟合互相独立，按任务分到进程池里并发运行。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from random import Random
+from types import TracebackType
+
+from agent.base import BitBoard, SearchParams, validate_cpp_rules, winner_from_status
+from agent.flow import HeuristicSearchAgent
+from agent.likelihood import IbsOptions, Trial, ibs_log_likelihood, trial_pair
+from game_base.core.engine import run_match
+from game_base.core.models import GameState, Move, PlayerColor, RuleSet
+from game_base.interface.views import Observation
+
+Vector = tuple[float, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class FreeParameter:
+    """一个待拟合的自由度。
+
+    `fields` 里的每个 `SearchParams` 字段都取同一个值；字段是 17 元组时只改
+    `indices` 列出的下标，用来把同类特征的权重绑在一起。
+    """
+
+    label: str
+    fields: tuple[str, ...]
+    low: float
+    high: float
+    indices: tuple[int, ...] = ()
+
+    def __post_init__(self) -> None:
+        if not self.low < self.high:
+            raise ValueError(f"{self.label}: low must be below high.")
+
+
+@dataclass(frozen=True, slots=True)
+class ParameterSpace:
+    """参数向量与 `SearchParams` 之间的映射；未列出的字段取 `base` 的值。"""
+
+    parameters: tuple[FreeParameter, ...]
+    base: SearchParams = field(default_factory=SearchParams)
+
+    def __len__(self) -> int:
+        return len(self.parameters)
+
+    @property
+    def labels(self) -> tuple[str, ...]:
+        return tuple(parameter.label for parameter in self.parameters)
+
+    def to_params(self, vector: Sequence[float]) -> SearchParams:
+        if len(vector) != len(self.parameters):
+            raise ValueError(f"Expected {len(self.parameters)} values.")
+        changes: dict[str, object] = {}
+        for parameter, value in zip(self.parameters, vector):
+            value = min(max(float(value), parameter.low), parameter.high)
+            for name in parameter.fields:
+                if not parameter.indices:
+                    changes[name] = value
+                    continue
+                current = list(changes.get(name, getattr(self.base, name)))
+                for index in parameter.indices:
+                    current[index] = value
+                changes[name] = tuple(current)
+        return replace(self.base, **changes)
+
+    def to_vector(self, params: SearchParams) -> Vector:
+        # 绑定的下标取第一个；params 本身不满足绑定时这里会丢掉差异。
+        values = []
+        for parameter in self.parameters:
+            value = getattr(params, parameter.fields[0])
+            values.append(
+                float(value[parameter.indices[0]] if parameter.indices else value)
+            )
+        return tuple(values)
+
+    def to_unit(self, vector: Sequence[float]) -> Vector:
+        return tuple(
+            (value - parameter.low) / (parameter.high - parameter.low)
+            for parameter, value in zip(self.parameters, vector)
+        )
+
+    def from_unit(self, unit: Sequence[float]) -> Vector:
+        return tuple(
+            parameter.low + min(max(value, 0.0), 1.0) * (parameter.high - parameter.low)
+            for parameter, value in zip(self.parameters, unit)
+        )
+
+
+def default_parameter_space(base: SearchParams | None = None) -> ParameterSpace:
+    """van Opheusden 等人模型的 10 个自由参数。
+
+    四类特征（相连二子、不相连二子、三子、四子）各一个权重，四个方向与
+    主动/被动共用；所有特征共用一个丢弃率。`stopping_thresh` 是整数，保持固定。
+    """
+
+    weights = ("w_act", "w_pass")
+    return ParameterSpace(
+        parameters=(
+            FreeParameter("pruning_thresh", ("pruning_thresh",), 0.1, 10.0),
+            FreeParameter("gamma", ("gamma",), 0.001, 1.0),
+            FreeParameter("lapse_rate", ("lapse_rate",), 0.001, 1.0),
+            FreeParameter("opp_scale", ("opp_scale",), 0.1, 4.0),
+            FreeParameter("center_weight", ("center_weight",), 0.0, 5.0),
+            FreeParameter("w_connected_2", weights, 0.0, 10.0, (0, 4, 8, 12)),
+            FreeParameter("w_unconnected_2", weights, 0.0, 10.0, (1, 5, 9, 13)),
+            FreeParameter("w_3", weights, 0.0, 10.0, (2, 6, 10, 14)),
+            FreeParameter("w_4", weights, 0.0, 10.0, (3, 7, 11, 15)),
+            FreeParameter("delta", ("delta",), 0.0, 1.0, tuple(range(17))),
+        ),
+        base=base or SearchParams(),
+    )
+
+
+class LikelihoodCache:
+    """(参数, 数据切片, 抽样设置) -> 对数似然的 SQLite 缓存，可多进程共享。"""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=60.0)
+        # WAL 模式下读者不阻塞写者，多个拟合进程可以同时查询和写入。
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS likelihoods ("
+            " params_key TEXT NOT NULL,"
+            " data_key TEXT NOT NULL,"
+            " log_likelihood REAL NOT NULL,"
+            " variance REAL NOT NULL,"
+            " samples INTEGER NOT NULL,"
+            " PRIMARY KEY (params_key, data_key))"
+        )
+        self._connection.commit()
+
+    def __enter__(self) -> LikelihoodCache:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        (count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM likelihoods"
+        ).fetchone()
+        return int(count)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def get(self, params_key: str, data_key: str) -> tuple[float, float] | None:
+        row = self._connection.execute(
+            "SELECT log_likelihood, variance FROM likelihoods"
+            " WHERE params_key = ? AND data_key = ?",
+            (params_key, data_key),
+        ).fetchone()
+        return None if row is None else (float(row[0]), float(row[1]))
+
+    def put(
+        self,
+        params_key: str,
+        data_key: str,
+        log_likelihood: float,
+        variance: float,
+        samples: int,
+    ) -> None:
+        # 每条结果单独提交，进程崩溃时最多丢掉正在计算的那一次。
+        self._connection.execute(
+            "INSERT OR REPLACE INTO likelihoods VALUES (?, ?, ?, ?, ?)",
+            (params_key, data_key, log_likelihood, variance, samples),
+        )
+        self._connection.commit()
+
+
+def params_key(params: SearchParams, options: IbsOptions) -> str:
+    """参数与抽样设置的稳定哈希；浮点按 repr 序列化，不会丢精度。"""
+
+    payload = json.dumps(
+        {"params": asdict(params), "options": asdict(options)}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def dataset_key(trials: Sequence[Trial], rule_set: RuleSet) -> str:
+    """按内容计算数据切片的哈希：每个棋面的两张位掩码和人类落子。"""
+
+    digest = hashlib.sha256()
+    for trial in trials:
+        state, move = trial_pair(trial)
+        board = BitBoard.from_state(state, rule_set)
+        digest.update(
+            f"{board.black:x},{board.white:x},"
+            f"{move.position.row},{move.position.col};".encode("ascii")
+        )
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class OptimizeResult:
+    unit: Vector
+    value: float
+    evaluations: int
+
+
+def nelder_mead(
+    objective: Callable[[Vector], float],
+    start: Sequence[float],
+    step: float = 0.2,
+    max_evaluations: int = 200,
+    tolerance: float = 1e-3,
+) -> OptimizeResult:
+    """在单位立方体里最小化 `objective` 的 Nelder–Mead 单纯形法。
+
+    所有试探点都截断到 [0, 1]。IBS 目标带噪声，`tolerance` 应与估计的标准误
+    同量级，过小只会让单纯形在噪声里打转直到用完预算。
+    """
+
+    def clip(point: Sequence[float]) -> Vector:
+        return tuple(min(max(value, 0.0), 1.0) for value in point)
+
+    dimension = len(start)
+    simplex = [clip(start)]
+    for axis in range(dimension):
+        vertex = list(simplex[0])
+        vertex[axis] += step if vertex[axis] + step <= 1.0 else -step
+        simplex.append(clip(vertex))
+    values = [objective(point) for point in simplex]
+    evaluations = len(values)
+
+    while evaluations < max_evaluations:
+        order = sorted(range(dimension + 1), key=values.__getitem__)
+        simplex = [simplex[index] for index in order]
+        values = [values[index] for index in order]
+        if values[-1] - values[0] <= tolerance:
+            break
+        worst = simplex[-1]
+        centroid = [
+            sum(point[axis] for point in simplex[:-1]) / dimension
+            for axis in range(dimension)
+        ]
+
+        def along(scale: float) -> Vector:
+            return clip(
+                centroid[axis] + scale * (worst[axis] - centroid[axis])
+                for axis in range(dimension)
+            )
+
+        reflected = along(-1.0)
+        reflected_value = objective(reflected)
+        evaluations += 1
+        if reflected_value < values[0]:
+            expanded = along(-2.0)
+            expanded_value = objective(expanded)
+            evaluations += 1
+            if expanded_value < reflected_value:
+                simplex[-1], values[-1] = expanded, expanded_value
+            else:
+                simplex[-1], values[-1] = reflected, reflected_value
+            continue
+        if reflected_value < values[-2]:
+            simplex[-1], values[-1] = reflected, reflected_value
+            continue
+
+        outside = reflected_value < values[-1]
+        contracted = along(-0.5 if outside else 0.5)
+        contracted_value = objective(contracted)
+        evaluations += 1
+        if contracted_value < min(reflected_value, values[-1]):
+            simplex[-1], values[-1] = contracted, contracted_value
+            continue
+        # 收缩也没有改善：整个单纯形向最优点缩一半。
+        best = simplex[0]
+        for index in range(1, dimension + 1):
+            simplex[index] = clip(
+                best[axis] + 0.5 * (simplex[index][axis] - best[axis])
+                for axis in range(dimension)
+            )
+            values[index] = objective(simplex[index])
+            evaluations += 1
+
+    best_index = min(range(dimension + 1), key=values.__getitem__)
+    return OptimizeResult(
+        unit=simplex[best_index], value=values[best_index], evaluations=evaluations
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class FitSettings:
+    """一次拟合任务除数据以外的全部设置。"""
+
+    space: ParameterSpace
+    cache_path: Path
+    rule_set: RuleSet = field(default_factory=RuleSet)
+    options: IbsOptions = field(default_factory=IbsOptions)
+    max_evaluations: int = 200
+    step: float = 0.2
+    tolerance: float = 1.0
+    start: SearchParams | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class FitResult:
+    """一个受试者一折的拟合结果；`folds == 1` 时没有测试集似然。"""
+
+    participant: str
+    fold: int
+    params: SearchParams
+    vector: Vector
+    train_log_likelihood: float
+    test_log_likelihood: float | None
+    evaluations: int
+    cache_hits: int
+
+
+def cross_validation_folds(
+    trials: Sequence[Trial], folds: int, seed: int = 0
+) -> list[tuple[tuple[Trial, ...], tuple[Trial, ...]]]:
+    """按固定种子打乱后切成 `folds` 份，返回每折的 (训练集, 测试集)。"""
+
+    if folds <= 0:
+        raise ValueError("folds must be positive.")
+    if folds == 1:
+        return [(tuple(trials), ())]
+    order = list(range(len(trials)))
+    Random(seed).shuffle(order)
+    splits = []
+    for fold in range(folds):
+        held_out = set(order[fold::folds])
+        splits.append(
+            (
+                tuple(t for i, t in enumerate(trials) if i not in held_out),
+                tuple(t for i, t in enumerate(trials) if i in held_out),
+            )
+        )
+    return splits
+
+
+def fit_participant(
+    participant: str,
+    train: Sequence[Trial],
+    settings: FitSettings,
+    test: Sequence[Trial] = (),
+    fold: int = 0,
+) -> FitResult:
+    """在训练集上最大化 IBS 对数似然，并在测试集上评估拟合出的参数。"""
+
+    validate_cpp_rules(settings.rule_set)
+    space = settings.space
+    hits = 0
+    with LikelihoodCache(settings.cache_path) as cache:
+
+        def log_likelihood(
+            params: SearchParams, trials: Sequence[Trial], d_key: str
+        ) -> float:
+            nonlocal hits
+            p_key = params_key(params, settings.options)
+            cached = cache.get(p_key, d_key)
+            if cached is not None:
+                hits += 1
+                return cached[0]
+            estimate = ibs_log_likelihood(
+                trials,
+                params,
+                settings.rule_set,
+                seed=_evaluation_seed(p_key, d_key),
+                options=settings.options,
+                max_workers=1,
+            )
+            cache.put(
+                p_key,
+                d_key,
+                estimate.log_likelihood,
+                estimate.variance,
+                estimate.samples,
+            )
+            return estimate.log_likelihood
+
+        train_key = dataset_key(train, settings.rule_set)
+        start = space.to_unit(space.to_vector(settings.start or space.base))
+        result = nelder_mead(
+            lambda unit: -log_likelihood(
+                space.to_params(space.from_unit(unit)), train, train_key
+            ),
+            start,
+            step=settings.step,
+            max_evaluations=settings.max_evaluations,
+            tolerance=settings.tolerance,
+        )
+        vector = space.from_unit(result.unit)
+        params = space.to_params(vector)
+        test_log_likelihood = (
+            log_likelihood(params, test, dataset_key(test, settings.rule_set))
+            if test
+            else None
+        )
+
+    return FitResult(
+        participant=participant,
+        fold=fold,
+        params=params,
+        vector=vector,
+        train_log_likelihood=-result.value,
+        test_log_likelihood=test_log_likelihood,
+        evaluations=result.evaluations,
+        cache_hits=hits,
+    )
+
+
+def fit_many(
+    datasets: Mapping[str, Sequence[Trial]],
+    settings: FitSettings,
+    folds: int = 1,
+    seed: int = 0,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+) -> list[FitResult]:
+    """并发拟合多个受试者的各折；结果按受试者、折的顺序返回。"""
+
+    jobs = [
+        (participant, fold, train, test, settings)
+        for participant, trials in datasets.items()
+        for fold, (train, test) in enumerate(
+            cross_validation_folds(trials, folds, seed)
+        )
+    ]
+    if executor is not None:
+        return list(executor.map(_fit_job, jobs))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_fit_job, jobs))
+
+
+@dataclass(frozen=True, slots=True)
+class RecoveryResult:
+    true_params: SearchParams
+    true_vector: Vector
+    fit: FitResult
+    trials: int
+
+
+def simulate_trials(
+    params: SearchParams, games: int, rule_set: RuleSet, seed: int = 0
+) -> list[tuple[GameState, Move]]:
+    """让两个同参数的 `HeuristicSearchAgent` 自对弈，收集双方的 (棋面, 落子)。"""
+
+    rng = Random(seed)
+    trials: list[tuple[GameState, Move]] = []
+    for game in range(games):
+        players = {
+            color: _CollectingPlayer(
+                HeuristicSearchAgent(
+                    player_id=f"model-{color.value}",
+                    color=color,
+                    rule_set=rule_set,
+                    params=params,
+                    seed=rng.getrandbits(63),
+                ),
+                trials,
+            )
+            for color in (PlayerColor.BLACK, PlayerColor.WHITE)
+        }
+        run_match(
+            black_player=players[PlayerColor.BLACK],
+            white_player=players[PlayerColor.WHITE],
+            rule_set=rule_set,
+            compact_state=True,
+        )
+    return trials
+
+
+def recover_parameters(
+    true_params: SearchParams,
+    settings: FitSettings,
+    games: int,
+    seed: int = 0,
+) -> RecoveryResult:
+    """用已知参数模拟对局再拟合回来，检验拟合流程能否找回真实参数。"""
+
+    trials = simulate_trials(true_params, games, settings.rule_set, seed)
+    return RecoveryResult(
+        true_params=true_params,
+        true_vector=settings.space.to_vector(true_params),
+        fit=fit_participant("recovery", trials, settings),
+        trials=len(trials),
+    )
+
+
+@dataclass(slots=True)
+class _CollectingPlayer:
+    """包装一个玩家，把它每次面对的棋面和给出的落子追加到 `trials`。"""
+
+    inner: HeuristicSearchAgent
+    trials: list[tuple[GameState, Move]]
+
+    @property
+    def player_id(self) -> str:
+        return self.inner.player_id
+
+    @property
+    def color(self) -> PlayerColor:
+        return self.inner.color
+
+    def choose_move(self, observation: Observation) -> Move:
+        move = self.inner.choose_move(observation)
+        state = GameState(
+            board=observation.board,
+            next_player=observation.next_player,
+            move_count=observation.move_count,
+            status=observation.status,
+            winner=winner_from_status(observation.status),
+            last_move=observation.last_move,
+        )
+        self.trials.append((state, move))
+        return move
+
+
+def _evaluation_seed(p_key: str, d_key: str) -> int:
+    # 种子由键派生，同一次求值无论何时重算都得到相同结果，缓存即纯记忆化。
+    return int(hashlib.sha256(f"{p_key}:{d_key}".encode("ascii")).hexdigest()[:16], 16)
+
+
+def _fit_job(
+    job: tuple[str, int, Sequence[Trial], Sequence[Trial], FitSettings],
+) -> FitResult:
+    # 进程池的工作函数必须是模块顶层函数才能被 pickle。
+    participant, fold, train, test, settings = job
+    return fit_participant(participant, train, settings, test=test, fold=fold)
@@ -5,7 +5,13 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from random import Random
 
-from agent.base import SearchParams, SearchResult, winner_from_status
+from agent.base import (
+    SearchLimits,
+    SearchParams,
+    SearchResult,
+    SearchStats,
+    winner_from_status,
+)
 from agent.search import decide_move
 from game_base.core.models import GameState, Move, PlayerColor, RuleSet
 from game_base.interface.views import Observation
@@ -20,6 +26,10 @@ class HeuristicSearchAgent:
     rule_set: RuleSet
     params: SearchParams = field(default_factory=SearchParams)
     seed: int | None = None
+    # 交互对局的延迟预算；None 表示只按参数给出的迭代上限停止。
+    limits: SearchLimits | None = None
+    # 为每一手记录 `SearchStats`，可从 `last_result.stats` 读取。
+    collect_stats: bool = False
     _rng: Random = field(init=False, repr=False)
     _last_result: SearchResult | None = field(default=None, init=False, repr=False)
 
@@ -46,5 +56,7 @@ class HeuristicSearchAgent:
             rule_set=self.rule_set,
             params=self.params,
             rng=self._rng,
+            limits=self.limits,
+            stats=SearchStats() if self.collect_stats else None,
         )
         return self._last_result.move
@@ -0,0 +1,227 @@
+"""用逆二项抽样（IBS）估计一组 `SearchParams` 对人类落子的对数似然。
+
+对每个 (棋面, 人类落子)，反复调用 `decide_move` 直到第 K 次抽到同一手，
+`-sum(1/k for k in 1..K-1)` 是 log p 的无偏估计，`sum(1/k**2 for k in 1..K-1)`
+是该估计方差的无偏估计。同一棋面可以重复多轮取平均；给出
+`target_variance` 时先跑一段试探轮估计单轮方差，据此定下正式轮数。试探轮
+只用来定轮数、不进均值：若在参与平均的同一批样本上判断何时停，早早抽中
+（估计偏高、方差又小）的轮次会更容易让抽样停下，对数似然就会系统性偏高。
+
+棋面按块分给进程池。每个棋面的随机种子都由主 `seed` 预先派生，所以结果
+只取决于 `seed`，与进程数和调度顺序无关。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from math import ceil, sqrt
+from random import Random
+
+from agent.base import BitBoard, SearchParams, bitmask_to_move, validate_cpp_rules
+from agent.evaluation import legal_bitmasks_for_board
+from agent.search import decide_move
+from game_base.core.models import CompactGameState, GameState, Move, RuleSet
+from game_base.recording.reader import TrainingTuple
+
+Trial = TrainingTuple | tuple[GameState | CompactGameState, Move]
+
+
+@dataclass(frozen=True, slots=True)
+class IbsOptions:
+    """一次估计的抽样设置。
+
+    `repeats` 是每个棋面至少的轮数。给出 `target_variance` 时先做 `repeats`
+    轮试探（结果丢弃），按试探的单轮方差估计选出让均值方差不超过它的轮数，
+    夹在 `repeats` 和 `max_repeats` 之间，再另做这么多轮取平均。
+    `max_samples` 截断单轮的抽样次数：失误率为 0 的参数可能永远抽不到某些
+    落子，截断后的估计偏向更低的似然。
+    """
+
+    repeats: int = 1
+    max_repeats: int = 16
+    target_variance: float | None = None
+    max_samples: int = 10_000
+
+    def __post_init__(self) -> None:
+        if self.repeats <= 0:
+            raise ValueError("repeats must be positive.")
+        if self.max_repeats < self.repeats:
+            raise ValueError("max_repeats must be at least repeats.")
+        if self.target_variance is not None and self.target_variance <= 0:
+            raise ValueError("target_variance must be positive.")
+        if self.max_samples <= 0:
+            raise ValueError("max_samples must be positive.")
+
+
+@dataclass(frozen=True, slots=True)
+class PositionLikelihood:
+    """单个棋面的估计：各轮均值及其方差、轮数与总抽样次数（含试探轮）。"""
+
+    log_likelihood: float
+    variance: float
+    repeats: int
+    samples: int
+    truncated: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class LikelihoodEstimate:
+    """全部棋面对数似然之和及其方差；各棋面相互独立，方差直接相加。"""
+
+    log_likelihood: float
+    variance: float
+    positions: tuple[PositionLikelihood, ...]
+
+    @property
+    def std_error(self) -> float:
+        return sqrt(self.variance)
+
+    @property
+    def samples(self) -> int:
+        return sum(position.samples for position in self.positions)
+
+
+def ibs_log_likelihood(
+    trials: Iterable[Trial],
+    params: SearchParams,
+    rule_set: RuleSet,
+    seed: int = 0,
+    options: IbsOptions | None = None,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+    chunk_size: int = 16,
+) -> LikelihoodEstimate:
+    """估计 `params` 下全部 (棋面, 落子) 的总对数似然。
+
+    `max_workers=1` 且不传 `executor` 时在当前进程里顺序计算。
+    """
+
+    validate_cpp_rules(rule_set)
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+    options = options or IbsOptions()
+    pairs = [trial_pair(trial) for trial in trials]
+    master = Random(seed)
+    seeds = [master.getrandbits(64) for _ in pairs]
+    jobs = [
+        (pairs[start : start + chunk_size], seeds[start : start + chunk_size])
+        for start in range(0, len(pairs), chunk_size)
+    ]
+    tasks = [
+        (chunk, chunk_seeds, params, rule_set, options) for chunk, chunk_seeds in jobs
+    ]
+
+    if executor is not None:
+        chunks = list(executor.map(_score_chunk, tasks))
+    elif max_workers == 1:
+        chunks = [_score_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            chunks = list(pool.map(_score_chunk, tasks))
+
+    positions = tuple(position for chunk in chunks for position in chunk)
+    return LikelihoodEstimate(
+        log_likelihood=sum(position.log_likelihood for position in positions),
+        variance=sum(position.variance for position in positions),
+        positions=positions,
+    )
+
+
+def sample_position(
+    state: GameState | CompactGameState,
+    move: Move,
+    rule_set: RuleSet,
+    params: SearchParams,
+    rng: Random,
+    options: IbsOptions | None = None,
+) -> PositionLikelihood:
+    """对单个棋面做若干轮 IBS，返回各轮估计的均值与均值的方差。"""
+
+    options = options or IbsOptions()
+    target = move.position
+    # 失误分支与 `decide_move` 同分布：均匀选一个空格。这里自己抽，省去失误时
+    # 仍要做的根节点评估；搜索分支关闭失误，避免重复抽样。
+    board = BitBoard.from_state(state, rule_set)
+    empty = [
+        bitmask_to_move(bitmask, state.next_player, rule_set).position
+        for bitmask in legal_bitmasks_for_board(board, rule_set)
+    ]
+    search_params = replace(params, lapse_rate=0.0)
+    samples = 0
+    truncated = False
+
+    def run_round() -> int:
+        # 一轮 IBS：返回第几次抽样才抽中目标落子。
+        nonlocal samples, truncated
+        draws = 0
+        while draws < options.max_samples:
+            draws += 1
+            if rng.random() < params.lapse_rate:
+                sampled = empty[int(rng.random() * len(empty))]
+            else:
+                sampled = decide_move(state, rule_set, search_params, rng).move.position
+            if sampled == target:
+                break
+        else:
+            truncated = True
+        samples += draws
+        return draws
+
+    repeats = options.repeats
+    if options.target_variance is not None:
+        # 试探轮只决定正式轮数，与之后参与平均的样本相互独立。
+        pilot = [_round_variance(run_round()) for _ in range(options.repeats)]
+        per_round = sum(pilot) / len(pilot)
+        needed = ceil(per_round / options.target_variance)
+        repeats = min(max(needed, options.repeats), options.max_repeats)
+
+    estimates: list[float] = []
+    variances: list[float] = []
+    for _ in range(repeats):
+        draws = run_round()
+        estimates.append(_round_estimate(draws))
+        variances.append(_round_variance(draws))
+
+    return PositionLikelihood(
+        log_likelihood=sum(estimates) / repeats,
+        variance=sum(variances) / (repeats * repeats),
+        repeats=repeats,
+        samples=samples,
+        truncated=truncated,
+    )
+
+
+def trial_pair(trial: Trial) -> tuple[GameState | CompactGameState, Move]:
+    """把日志读出的 `TrainingTuple` 或现成的 (棋面, 落子) 统一成二元组。"""
+
+    if isinstance(trial, TrainingTuple):
+        return trial.state, trial.move
+    return trial
+
+
+def _round_estimate(draws: int) -> float:
+    # 第 K 次才抽中时，前 K-1 次失败贡献了估计量和方差估计量。
+    return -sum(1.0 / k for k in range(1, draws))
+
+
+def _round_variance(draws: int) -> float:
+    return sum(1.0 / (k * k) for k in range(1, draws))
+
+
+def _score_chunk(
+    task: tuple[
+        Sequence[tuple[GameState | CompactGameState, Move]],
+        Sequence[int],
+        SearchParams,
+        RuleSet,
+        IbsOptions,
+    ],
+) -> list[PositionLikelihood]:
+    # 进程池的工作函数必须是模块顶层函数才能被 pickle。
+    pairs, seeds, params, rule_set, options = task
+    return [
+        sample_position(state, move, rule_set, params, Random(seed), options)
+        for (state, move), seed in zip(pairs, seeds, strict=True)
+    ]
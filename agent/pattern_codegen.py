@@ -0,0 +1,123 @@
+"""从旧 C++ `features_all.cpp` 生成 `agent/pattern_table.py` 并校验它是否过期。
+
+生成的模块只含按权重下标分组的整数元组常量，导入时直接从 `.pyc` 常量区
+加载，不再需要 C++ 源码树和正则解析。用法：
+
+    python -m agent.pattern_codegen            # 重新生成
+    python -m agent.pattern_codegen --check    # 表与 C++ 源不一致时返回非零
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sys
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+from agent.base import Pattern
+from agent.evaluation import (
+    CPP_FEATURES_PATH,
+    PATTERN_COUNT,
+    group_patterns,
+    parse_cpp_patterns,
+    pattern_groups_from_table,
+    patterns_in_source_order,
+)
+
+TABLE_PATH = Path(__file__).resolve().with_name("pattern_table.py")
+TABLE_FORMAT_VERSION = 2
+_VALUES_PER_LINE = 6
+_HEADER = '"""由 `python -m agent.pattern_codegen` 从 C++ 模式表生成，请勿手改。"""'
+
+
+def render_pattern_table(source: str) -> str:
+    """把 C++ 源码文本渲染成 `pattern_table.py` 的完整内容。"""
+
+    patterns = parse_cpp_patterns(source)
+    if len(patterns) != PATTERN_COUNT:
+        raise ValueError(f"Expected {PATTERN_COUNT} patterns, found {len(patterns)}.")
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    lines = [
+        _HEADER,
+        "",
+        f"FORMAT_VERSION = {TABLE_FORMAT_VERSION}",
+        f'SOURCE_SHA256 = "{digest}"',
+        f"PATTERN_COUNT = {len(patterns)}",
+        "",
+        "# 权重下标 -> (PIECES, PIECES_EMPTY, REQUIRED_EMPTY, ORDER)，四列逐项对齐；",
+        "# ORDER 是每个模式在 C++ 源文件里的序号。",
+        "WEIGHT_GROUPS = {",
+    ]
+    for group in group_patterns(patterns):
+        lines.append(f"    {group.weight_index}: (")
+        lines += _render_column(group.pieces, hexadecimal=True)
+        lines += _render_column(group.pieces_empty, hexadecimal=True)
+        lines += _render_column(group.required_empty)
+        lines += _render_column(group.order)
+        lines.append("    ),")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate(
+    features_path: Path = CPP_FEATURES_PATH, output: Path = TABLE_PATH
+) -> None:
+    output.write_text(
+        render_pattern_table(features_path.read_text(encoding="utf-8")),
+        encoding="utf-8",
+    )
+
+
+def check(features_path: Path = CPP_FEATURES_PATH, output: Path = TABLE_PATH) -> bool:
+    """生成表存在且与按当前 C++ 源重新生成的内容逐字节一致时返回 True。"""
+
+    if not output.exists():
+        return False
+    expected = render_pattern_table(features_path.read_text(encoding="utf-8"))
+    return output.read_text(encoding="utf-8") == expected
+
+
+def table_patterns(output: Path = TABLE_PATH) -> tuple[Pattern, ...]:
+    """不经导入系统读出某个生成表里的模式，便于和 C++ 解析结果逐个比对。"""
+
+    namespace: dict[str, Any] = {}
+    exec(compile(output.read_text(encoding="utf-8"), str(output), "exec"), namespace)
+    return patterns_in_source_order(
+        pattern_groups_from_table(namespace["WEIGHT_GROUPS"])
+    )
+
+
+def _render_column(values: Iterable[int], hexadecimal: bool = False) -> list[str]:
+    items = [f"0x{value:X}" if hexadecimal else str(value) for value in values]
+    lines = ["        ("]
+    for start in range(0, len(items), _VALUES_PER_LINE):
+        chunk = ", ".join(items[start : start + _VALUES_PER_LINE])
+        lines.append(f"            {chunk},")
+    lines.append("        ),")
+    return lines
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate agent/pattern_table.py from features_all.cpp."
+    )
+    parser.add_argument("--source", type=Path, default=CPP_FEATURES_PATH)
+    parser.add_argument("--output", type=Path, default=TABLE_PATH)
+    parser.add_argument(
+        "--check", action="store_true", help="fail if the table is missing or stale"
+    )
+    args = parser.parse_args(argv)
+    if args.check:
+        if not check(args.source, args.output):
+            print(f"{args.output} is missing or out of date.", file=sys.stderr)
+            sys.exit(1)
+        print(f"{args.output} matches {args.source}.")
+        return
+    generate(args.source, args.output)
+    print(f"Wrote {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
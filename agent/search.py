@@ -2,269 +2,557 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from random import Random
+from time import perf_counter_ns
 
 from agent.base import (
     BLACK_WINS,
     WHITE_WINS,
     BitBoard,
+    BitMask,
+    Pattern,
     ScoredAction,
-    SearchNode,
+    SearchLimits,
     SearchParams,
     SearchResult,
+    SearchStats,
+    StopReason,
     bitmask_to_move,
     validate_cpp_rules,
 )
-from agent.evaluation import evaluate_board, get_pruned_moves, sample_kept_patterns
+from agent.evaluation import (
+    PatternIndex,
+    advance_relevant_patterns,
+    build_pattern_index,
+    evaluate_board,
+    full_pattern_index,
+    prune_scored_moves,
+    relevant_patterns,
+    sample_kept_mask,
+    sample_kept_patterns,
+    score_moves,
+)
+from agent.transposition import TranspositionTable
+from agent.tree import NO_NODE, SearchTree
 from game_base.core.models import GameState, PlayerColor, RuleSet
 
 
+@dataclass(frozen=True, slots=True)
+class PreparedRoot:
+    """同一棋面反复搜索时不随抽样变化的部分，由 `prepare_root` 预先算好。
+
+    根节点的静态评估、合法动作和全量模式的相关位集都只取决于棋面和参数，
+    对同一棋面抽样成百上千次时只需计算一次。`decide_move` 用 `board` 和
+    `params` 核对它确实属于本次搜索。
+    """
+
+    board: BitBoard
+    params: SearchParams
+    value: float
+    legal_moves: tuple[ScoredAction, ...]
+    relevant: int = field(repr=False)
+
+
+def prepare_root(
+    state: GameState, rule_set: RuleSet, params: SearchParams
+) -> PreparedRoot:
+    validate_cpp_rules(rule_set)
+    board = BitBoard.from_state(state, rule_set)
+    return PreparedRoot(
+        board=board,
+        params=params,
+        value=evaluate_board(board, params),
+        legal_moves=_legal_actions(board, state.next_player, rule_set),
+        relevant=relevant_patterns(full_pattern_index(), board),
+    )
+
+
 def decide_move(
     state: GameState,
     rule_set: RuleSet,
     params: SearchParams,
     rng: Random,
+    transposition_table: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
+    prepared: PreparedRoot | None = None,
+    stats: SearchStats | None = None,
 ) -> SearchResult:
-    """按旧 C++ `heuristic::makemove_bfs` 选择动作。"""
+    """按旧 C++ `heuristic::makemove_bfs` 选择动作。
+
+    默认逐节点复现旧 C++ 语义；传入 `transposition_table` 时，换位到达的
+    同一棋面共享候选打分，一次搜索里每个棋面至多打分一次。
+    `limits` 给出时间或节点预算，超出后返回当前最佳动作；至少完成一次展开。
+    `prepared` 必须由同一棋面和参数的 `prepare_root` 得到；给定相同的 `rng`
+    时结果与不传完全一致，只是省去了每次重复的根节点准备。
+    `stats` 给出时清零后记录本次搜索的计数与阶段耗时，不影响搜索结果。
+    """
 
+    start_ns = perf_counter_ns()
     validate_cpp_rules(rule_set)
     board = BitBoard.from_state(state, rule_set)
-    root = SearchNode(
-        board=board,
-        val=evaluate_board(board, params),
-        player=state.next_player,
-        depth=1,
-    )
-
-    legal_moves = tuple(
-        ScoredAction(
-            move=bitmask_to_move(bitmask, state.next_player, rule_set),
-            value=0.0,
-            bitmask=bitmask,
-        )
-        for bitmask in _legal_bitmasks(board)
-    )
+    if prepared is not None and prepared.board != board:
+        raise ValueError("prepared root does not match the given state.")
+    if prepared is not None and prepared.params != params:
+        raise ValueError("prepared root was built with different search params.")
+    if stats is not None:
+        stats.reset()
+    self_player = state.next_player
+    if prepared is not None:
+        legal_moves = prepared.legal_moves
+    else:
+        legal_moves = _legal_actions(board, state.next_player, rule_set)
     if not legal_moves:
         raise RuntimeError("No legal actions available.")
 
     if rng.random() < params.lapse_rate:
         chosen = legal_moves[int(rng.random() * len(legal_moves))]
+        root_value = (
+            prepared.value if prepared is not None else evaluate_board(board, params)
+        )
+        if stats is not None:
+            stats.best_move = chosen.bitmask
+            stats.root_value = root_value
         return SearchResult(
             move=chosen.move,
-            root_value=root.val,
+            root_value=root_value,
             iterations=0,
             stability_hits=0,
             used_lapse=True,
             dropped_feature_count=0,
             scored_actions=legal_moves,
+            stop_reason=StopReason.LAPSE,
+            stats=stats,
         )
 
-    kept_patterns = sample_kept_patterns(params, rng)
+    if prepared is not None:
+        # 共享全集索引，根节点的相关位集也直接沿用预先算好的那份。
+        pattern_index = full_pattern_index().restrict(sample_kept_mask(params, rng))
+        kept_patterns = tuple(pattern_index.select(-1))
+    else:
+        kept_patterns = sample_kept_patterns(params, rng)
+        # 子节点只比父节点多一子，相关模式位集沿树增量更新，避免每次全量扫描。
+        pattern_index = build_pattern_index(kept_patterns)
+    tree = SearchTree()
+    root = tree.add_node(
+        black=board.black,
+        white=board.white,
+        val=prepared.value if prepared is not None else evaluate_board(board, params),
+        player=state.next_player,
+        depth=1,
+    )
+    if prepared is not None:
+        tree.relevant[root] = prepared.relevant
+    if transposition_table is not None:
+        transposition_table.clear()
     dropped_feature_count = 731 - len(kept_patterns)
-    self_player = state.next_player
 
-    current = root
+    # 当前 principal variation：path[i] 是根下第 i 层的节点，末尾即待展开的叶子。
+    path = [root]
+    root_depth = tree.depth[root]
     stability_hits = 0
     previous_best = 0
     iterations = 0
+    initial_nodes = len(tree)
+    deadline_ns = node_limit = None
+    if limits is not None:
+        if limits.time_limit_ms is not None:
+            deadline_ns = start_ns + int(limits.time_limit_ms * 1_000_000)
+        node_limit = limits.max_nodes
+    stop_reason: StopReason | None = None
 
     while (
         iterations < params.max_iterations
         and stability_hits < params.stopping_thresh
-        and not root.determined()
+        and not tree.determined(root)
     ):
-        candidates = get_pruned_moves(
-            board=current.board,
-            player=current.player,
+        current = path[-1]
+        if stats is not None:
+            phase_ns = perf_counter_ns()
+        candidates = node_candidates(
+            tree=tree,
+            node=current,
             self_player=self_player,
             rule_set=rule_set,
             params=params,
             rng=rng,
             kept_patterns=kept_patterns,
+            pattern_index=pattern_index,
+            transposition_table=transposition_table,
+            stats=stats,
         )
-        current = expand_node(current, candidates)
-        current = select_node(root)
-        best = best_move(root)
-        current_best = best.move_bitmask
+        if stats is not None:
+            expand_ns = perf_counter_ns()
+            stats.generation_ns += expand_ns - phase_ns
+            backup_ns = stats.backup_ns
+        top = expand_node(tree, current, candidates, stats)
+        if stats is not None:
+            select_ns = perf_counter_ns()
+            stats.expansion_ns += select_ns - expand_ns - (stats.backup_ns - backup_ns)
+        update_principal_variation(tree, path, top)
+        current_best = tree.move[best_move(tree, root)]
+        if stats is not None:
+            stats.selection_ns += perf_counter_ns() - select_ns
         if current_best == previous_best:
             stability_hits += 1
         else:
             stability_hits = 0
         previous_best = current_best
         iterations += 1
-
-    chosen = best_move(root)
+        if stats is not None:
+            if candidates:
+                stats.max_depth = max(
+                    stats.max_depth, tree.depth[current] + 1 - root_depth
+                )
+            stats.iterations = iterations
+            stats.nodes_created = len(tree) - initial_nodes
+            stats.pv_length = len(path) - 1
+            stats.best_move = current_best
+            stats.root_value = tree.val[root]
+            if stats.on_iteration is not None:
+                stats.on_iteration(stats)
+        if node_limit is not None and len(tree) - initial_nodes >= node_limit:
+            stop_reason = StopReason.NODE_LIMIT
+            break
+        if deadline_ns is not None and perf_counter_ns() >= deadline_ns:
+            stop_reason = StopReason.TIME_LIMIT
+            break
+
+    if stop_reason is None:
+        if tree.determined(root):
+            stop_reason = StopReason.DETERMINED
+        elif stability_hits >= params.stopping_thresh:
+            stop_reason = StopReason.STABLE
+        else:
+            stop_reason = StopReason.ITERATIONS
+
+    # 只有根节点的子节点才需要还原成 Move 对象。
+    chosen = best_move(tree, root)
+    if stats is not None:
+        # 迭代上限或稳定阈值为 0 时循环一轮也不跑；这里补上最终的 PV。
+        stats.pv_length = len(path) - 1
+        stats.best_move = tree.move[chosen]
+        stats.root_value = tree.val[root]
     scored_actions = tuple(
-        ScoredAction(move=child.move, value=child.val, bitmask=child.move_bitmask)
-        for child in root.children
-        if child.move is not None
+        ScoredAction(
+            move=bitmask_to_move(tree.move[child], state.next_player, rule_set),
+            value=tree.val[child],
+            bitmask=tree.move[child],
+        )
+        for child in tree.children(root)
     )
-    if chosen.move is None:
-        raise RuntimeError("Best root move is missing.")
 
     return SearchResult(
-        move=chosen.move,
-        root_value=root.val,
+        move=bitmask_to_move(tree.move[chosen], state.next_player, rule_set),
+        root_value=tree.val[root],
         iterations=iterations,
         stability_hits=stability_hits,
         used_lapse=False,
         dropped_feature_count=dropped_feature_count,
         scored_actions=scored_actions if scored_actions else legal_moves,
+        stop_reason=stop_reason,
+        node_count=len(tree) - initial_nodes,
+        stats=stats,
+    )
+
+
+def node_candidates(
+    tree: SearchTree,
+    node: int,
+    self_player: PlayerColor,
+    rule_set: RuleSet,
+    params: SearchParams,
+    rng: Random,
+    kept_patterns: tuple[Pattern, ...],
+    pattern_index: PatternIndex,
+    transposition_table: TranspositionTable | None = None,
+    stats: SearchStats | None = None,
+) -> list[tuple[BitMask, float]]:
+    """按旧 C++ `get_pruned_moves` 为叶节点生成候选，可从置换表复用。"""
+
+    black = tree.black[node]
+    white = tree.white[node]
+    if transposition_table is not None:
+        entry = transposition_table.lookup(black, white)
+        if entry is not None and entry.candidates is not None:
+            if stats is not None:
+                stats.candidate_cache_hits += 1
+            return list(entry.candidates)
+
+    relevant = node_relevant_patterns(tree, node, pattern_index)
+    if stats is not None:
+        stats.evaluator_calls += 1
+        stats.patterns_scanned += (relevant & pattern_index.kept).bit_count()
+    candidates = prune_scored_moves(
+        score_moves(
+            board=BitBoard(black=black, white=white),
+            player=tree.player(node),
+            self_player=self_player,
+            rule_set=rule_set,
+            params=params,
+            rng=rng,
+            kept_patterns=kept_patterns,
+            pattern_index=pattern_index,
+            relevant=relevant,
+        ),
+        params,
     )
+    if transposition_table is not None:
+        transposition_table.store_candidates(black, white, candidates)
+    return candidates
 
 
-def expand_node(node: SearchNode, candidates: list[ScoredAction]) -> SearchNode:
-    """按旧 C++ `node::expand` 展开一个叶节点。"""
+def expand_node(
+    tree: SearchTree,
+    node: int,
+    candidates: list[tuple[BitMask, float]],
+    stats: SearchStats | None = None,
+) -> int:
+    """按旧 C++ `node::expand` 展开一个叶节点。
 
-    if node.children:
+    返回回传停下的节点：它之上的祖先状态都没有变化，选择时从这里重新下探即可。
+    """
+
+    if tree.child_count[node]:
         return node
 
-    for candidate in candidates:
-        if node.player is PlayerColor.BLACK:
-            child_value = node.val + candidate.value
+    black = tree.black[node]
+    white = tree.white[node]
+    val = tree.val[node]
+    black_to_move = tree.black_to_move[node]
+    child_player = PlayerColor.WHITE if black_to_move else PlayerColor.BLACK
+    child_depth = tree.depth[node] + 1
+    first_child = len(tree)
+    for bitmask, value in candidates:
+        if black_to_move:
+            child_black, child_white, child_value = black | bitmask, white, val + value
         else:
-            child_value = node.val - candidate.value
-        child = SearchNode(
-            board=node.board.add(candidate.bitmask, node.player),
+            child_black, child_white, child_value = black, white | bitmask, val - value
+        child = tree.add_node(
+            black=child_black,
+            white=child_white,
             val=child_value,
-            player=node.player.other(),
-            depth=node.depth + 1,
-            move_bitmask=candidate.bitmask,
-            move=candidate.move,
+            player=child_player,
+            depth=child_depth,
             parent=node,
+            move=bitmask,
         )
-        node.children.append(child)
-
-    if node.children:
-        recompute_opt(node)
-        recompute_pess(node)
-        recompute_val(node)
-        if node.determined():
-            set_best_determined(node)
-        if node.best is not None and node.best.determined():
-            # `get_val()` 里可能把 best 指向确定子树。为保持与 C++ 类似，
-            # 这里不额外改写，直接走正常回传。
-            pass
-        if node.parent is None:
-            return node
-        backpropagate(node.parent, node)
+
+    if candidates:
+        tree.first_child[node] = first_child
+        tree.child_count[node] = len(candidates)
+        recompute_opt(tree, node)
+        recompute_pess(tree, node)
+        recompute_val(tree, node)
+        if tree.determined(node):
+            set_best_determined(tree, node)
+        parent = tree.parent[node]
+        if parent != NO_NODE:
+            if stats is None:
+                return backpropagate(tree, parent, node)
+            start_ns = perf_counter_ns()
+            top = backpropagate(tree, parent, node)
+            stats.backup_ns += perf_counter_ns() - start_ns
+            # 回传从父节点一路更新到 `top`（含两端）。
+            stats.backprop_steps += tree.depth[node] - tree.depth[top]
+            return top
     return node
 
 
-def backpropagate(node: SearchNode, changed: SearchNode) -> None:
-    """按旧 C++ `node::backpropagate` 更新祖先链。"""
+def node_relevant_patterns(
+    tree: SearchTree, node: int, pattern_index: PatternIndex
+) -> int:
+    """只在节点即将展开时，从父节点位集增量算出自己的相关模式。"""
 
-    if not update_opt(node, changed):
-        recompute_opt(node)
-    if not update_pess(node, changed):
-        recompute_pess(node)
-    if not changed.determined() and update_val(node, changed):
-        node.best = changed
-    else:
-        recompute_val(node)
-    if node.parent is not None:
-        backpropagate(node.parent, node)
+    relevant = tree.relevant[node]
+    if relevant is None:
+        parent = tree.parent[node]
+        parent_relevant = tree.relevant[parent] if parent != NO_NODE else None
+        if parent_relevant is None:
+            relevant = relevant_patterns(pattern_index, tree.board(node))
+        else:
+            relevant = advance_relevant_patterns(
+                pattern_index, parent_relevant, tree.board(node), tree.move[node]
+            )
+        tree.relevant[node] = relevant
+    return relevant
+
+
+def backpropagate(tree: SearchTree, node: int, changed: int) -> int:
+    """按旧 C++ `node::backpropagate` 迭代更新祖先链，并在无变化处提前停止。
+
+    每个祖先在更新后都等于按其子节点重算的结果；若某个祖先的
+    opt/pess/val/best 都没变，更高的祖先看到的输入也不变，旧实现继续上溯
+    只会重算出相同的值。返回停下的节点，或一路改到根时返回根。
+    """
+
+    opt = tree.opt
+    pess = tree.pess
+    val = tree.val
+    best = tree.best
+    while True:
+        before = (opt[node], pess[node], val[node], best[node])
+        if not update_opt(tree, node, changed):
+            recompute_opt(tree, node)
+        if not update_pess(tree, node, changed):
+            recompute_pess(tree, node)
+        if not tree.determined(changed) and update_val(tree, node, changed):
+            best[node] = changed
+        else:
+            recompute_val(tree, node)
+        if (opt[node], pess[node], val[node], best[node]) == before:
+            return node
+        parent = tree.parent[node]
+        if parent == NO_NODE:
+            return node
+        changed = node
+        node = parent
 
 
-def select_node(node: SearchNode) -> SearchNode:
+def select_node(tree: SearchTree, node: int) -> int:
     """按旧 C++ `node::select` 沿 principal variation 下探。"""
 
     current = node
-    while current.best is not None:
-        current = current.best
+    best = tree.best
+    while best[current] != NO_NODE:
+        current = best[current]
     return current
 
 
-def best_move(node: SearchNode) -> SearchNode:
+def extend_principal_variation(tree: SearchTree, path: list[int]) -> None:
+    """从 `path` 末尾继续沿 best 下探，把经过的节点追加到 `path`。"""
+
+    best = tree.best
+    current = best[path[-1]]
+    while current != NO_NODE:
+        path.append(current)
+        current = best[current]
+
+
+def update_principal_variation(tree: SearchTree, path: list[int], top: int) -> None:
+    """展开并回传到 `top` 之后刷新缓存的 PV。
+
+    回传只改动了叶子到 `top` 这一段，`top` 之上的 PV 前缀原样可用，只需从
+    `top` 起重新沿 best 下探。
+    """
+
+    del path[tree.depth[top] - tree.depth[path[0]] + 1 :]
+    extend_principal_variation(tree, path)
+
+
+def best_move(tree: SearchTree, node: int) -> int:
     """按旧 C++ `node::bestmove` 返回根节点最佳子节点。"""
 
-    if not node.children:
+    if not tree.child_count[node]:
         raise RuntimeError("Cannot choose a best move from an unexpanded root.")
-    if node.determined():
-        set_best_determined(node)
-        if node.best is None:
+    if tree.determined(node):
+        set_best_determined(tree, node)
+        if tree.best[node] == NO_NODE:
             raise RuntimeError("Determined node has no best child.")
-        return node.best
-
-    best_child = None
-    best_value = -20_000.0 if node.player is PlayerColor.BLACK else 20_000.0
-    for child in node.children:
-        if node.player is PlayerColor.BLACK:
-            if child.val > best_value:
-                best_value = child.val
+        return tree.best[node]
+
+    best_child = NO_NODE
+    val = tree.val
+    if tree.black_to_move[node]:
+        best_value = -20_000.0
+        for child in tree.children(node):
+            if val[child] > best_value:
+                best_value = val[child]
                 best_child = child
-        else:
-            if child.val < best_value:
-                best_value = child.val
+    else:
+        best_value = 20_000.0
+        for child in tree.children(node):
+            if val[child] < best_value:
+                best_value = val[child]
                 best_child = child
-    if best_child is None:
+    if best_child == NO_NODE:
         raise RuntimeError("Failed to locate best child.")
     return best_child
 
 
-def recompute_opt(node: SearchNode) -> None:
-    node.opt = WHITE_WINS if node.player is PlayerColor.BLACK else BLACK_WINS
-    for child in node.children:
-        update_opt(node, child)
+def recompute_opt(tree: SearchTree, node: int) -> None:
+    tree.opt[node] = WHITE_WINS if tree.black_to_move[node] else BLACK_WINS
+    for child in tree.children(node):
+        update_opt(tree, node, child)
 
 
-def recompute_pess(node: SearchNode) -> None:
-    node.pess = WHITE_WINS if node.player is PlayerColor.BLACK else BLACK_WINS
-    for child in node.children:
-        update_pess(node, child)
+def recompute_pess(tree: SearchTree, node: int) -> None:
+    tree.pess[node] = WHITE_WINS if tree.black_to_move[node] else BLACK_WINS
+    for child in tree.children(node):
+        update_pess(tree, node, child)
 
 
-def recompute_val(node: SearchNode) -> None:
-    node.val = -20_000.0 if node.player is PlayerColor.BLACK else 20_000.0
-    node.best = None
-    for child in node.children:
-        if not child.determined() and update_val(node, child):
-            node.best = child
-    for child in node.children:
-        if child.determined():
-            update_val(node, child)
+def recompute_val(tree: SearchTree, node: int) -> None:
+    tree.val[node] = -20_000.0 if tree.black_to_move[node] else 20_000.0
+    tree.best[node] = NO_NODE
+    for child in tree.children(node):
+        if not tree.determined(child) and update_val(tree, node, child):
+            tree.best[node] = child
+    for child in tree.children(node):
+        if tree.determined(child):
+            update_val(tree, node, child)
 
 
-def set_best_determined(node: SearchNode) -> None:
+def set_best_determined(tree: SearchTree, node: int) -> None:
     """按旧 C++ `get_best_determined` 在已确定子树里选一条最优线。"""
 
-    if node.player is PlayerColor.BLACK:
-        candidates = [child for child in node.children if child.pess == node.pess]
+    tree.best[node] = NO_NODE
+    if tree.black_to_move[node]:
+        target, bounds = tree.pess[node], tree.pess
     else:
-        candidates = [child for child in node.children if child.opt == node.opt]
-    node.best = candidates[0] if candidates else None
-
-
-def update_val(node: SearchNode, child: SearchNode) -> bool:
-    if node.player is PlayerColor.BLACK and child.val > node.val:
-        node.val = child.val
-        return True
-    if node.player is PlayerColor.WHITE and child.val < node.val:
-        node.val = child.val
+        target, bounds = tree.opt[node], tree.opt
+    for child in tree.children(node):
+        if bounds[child] == target:
+            tree.best[node] = child
+            return
+
+
+def update_val(tree: SearchTree, node: int, child: int) -> bool:
+    if tree.black_to_move[node]:
+        if tree.val[child] > tree.val[node]:
+            tree.val[node] = tree.val[child]
+            return True
+    elif tree.val[child] < tree.val[node]:
+        tree.val[node] = tree.val[child]
         return True
     return False
 
 
-def update_opt(node: SearchNode, child: SearchNode) -> bool:
-    if node.player is PlayerColor.BLACK and child.opt > node.opt:
-        node.opt = child.opt
-        return True
-    if node.player is PlayerColor.WHITE and child.opt < node.opt:
-        node.opt = child.opt
+def update_opt(tree: SearchTree, node: int, child: int) -> bool:
+    if tree.black_to_move[node]:
+        if tree.opt[child] > tree.opt[node]:
+            tree.opt[node] = tree.opt[child]
+            return True
+    elif tree.opt[child] < tree.opt[node]:
+        tree.opt[node] = tree.opt[child]
         return True
     return False
 
 
-def update_pess(node: SearchNode, child: SearchNode) -> bool:
-    if node.player is PlayerColor.BLACK and child.pess > node.pess:
-        node.pess = child.pess
-        return True
-    if node.player is PlayerColor.WHITE and child.pess < node.pess:
-        node.pess = child.pess
+def update_pess(tree: SearchTree, node: int, child: int) -> bool:
+    if tree.black_to_move[node]:
+        if tree.pess[child] > tree.pess[node]:
+            tree.pess[node] = tree.pess[child]
+            return True
+    elif tree.pess[child] < tree.pess[node]:
+        tree.pess[node] = tree.pess[child]
         return True
     return False
 
 
+def _legal_actions(
+    board: BitBoard, player: PlayerColor, rule_set: RuleSet
+) -> tuple[ScoredAction, ...]:
+    return tuple(
+        ScoredAction(
+            move=bitmask_to_move(bitmask, player, rule_set),
+            value=0.0,
+            bitmask=bitmask,
+        )
+        for bitmask in _legal_bitmasks(board)
+    )
+
+
 def _legal_bitmasks(board: BitBoard) -> tuple[int, ...]:
     occupied = board.black | board.white
     masks: list[int] = []
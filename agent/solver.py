@@ -0,0 +1,327 @@
+"""4x9 四子棋的精确博弈论求解：负极大值 alpha-beta + 置换表 + 对称约简。
+
+分值从行棋方视角编码胜负和步数：在棋盘上第 n 子连成四子获胜记
+`BOARD_CELLS + 1 - n`，越快赢分越高；和棋为 0；输棋取相反数。分值只取决于
+棋面本身，所以置换表条目与到达路径无关，可以跨局面、跨对局复用。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from agent.base import (
+    BOARD_CELLS,
+    BOARD_END,
+    BOARD_ROWS,
+    BOARD_WIDTH,
+    CPP_GEOMETRY,
+    FULL_MASK,
+    BitBoard,
+    BitMask,
+    bitmask_to_move,
+    center_value_for_bit,
+    validate_cpp_rules,
+)
+from agent.symmetry import Symmetry, apply_symmetry, canonical_key
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    Move,
+    PlayerColor,
+    RuleSet,
+)
+
+# 没有更好依据时先试靠近中心的格子。
+_CENTER_ORDER = tuple(
+    sorted(
+        (1 << index for index in range(BOARD_CELLS)),
+        key=lambda bitmask: -center_value_for_bit(bitmask),
+    )
+)
+# 每个格子所在的全部四连线。
+_CELL_LINES = CPP_GEOMETRY.cell_lines
+_NON_IDENTITY = (Symmetry.FLIP_COLS, Symmetry.FLIP_ROWS, Symmetry.ROTATE_180)
+
+
+class SolverBudgetExceeded(RuntimeError):
+    """求解在给定节点预算内没有完成。"""
+
+
+@dataclass(frozen=True, slots=True)
+class SolveResult:
+    """一个棋面的精确结论。
+
+    `value` 是黑方视角的胜负：1 黑胜、0 和棋、-1 白胜。`distance` 是双方都
+    最优时距离终局还有几手（赢方尽快、输方尽量拖延）。`best_moves` 是所有
+    能达到该结论且步数最优的落子，按格子下标排序。
+    """
+
+    value: int
+    distance: int
+    best_moves: tuple[Move, ...]
+    nodes: int
+
+
+class Solver:
+    """持有一张有界置换表的求解器；连续求解同一盘里的多个棋面时复用它。"""
+
+    def __init__(self, max_entries: int = 4_000_000) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+        self.max_entries = max_entries
+        self.nodes = 0
+        self._max_nodes: int | None = None
+        # 规范形 (行棋方, 对手) -> (分值下界, 分值上界)。
+        self._bounds: dict[tuple[BitMask, BitMask], tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def clear(self) -> None:
+        self._bounds.clear()
+
+    def solve(
+        self,
+        state: GameState | CompactGameState | BitBoard,
+        rule_set: RuleSet | None = None,
+        max_nodes: int | None = None,
+    ) -> SolveResult:
+        """求解一个棋面；`max_nodes` 限制本次访问的节点数，超出时抛出异常。"""
+
+        rule_set = rule_set or RuleSet()
+        validate_cpp_rules(rule_set)
+        board = _to_bitboard(state, rule_set)
+        player = board.active_player()
+        own, other = (
+            (board.black, board.white)
+            if player is PlayerColor.BLACK
+            else (board.white, board.black)
+        )
+        start_nodes = self.nodes
+        self._max_nodes = None if max_nodes is None else start_nodes + max_nodes
+        stones = (own | other).bit_count()
+
+        if board.game_has_ended():
+            # 终局棋面：上一手已经分出胜负或下满，没有可选的落子。
+            winner_value = (
+                1 if board.black_has_won() else -1 if board.white_has_won() else 0
+            )
+            return SolveResult(value=winner_value, distance=0, best_moves=(), nodes=0)
+
+        score = self._negamax(own, other, -BOARD_CELLS, BOARD_CELLS)
+        winning = _threats(own, FULL_MASK & ~(own | other))
+        best: list[BitMask] = []
+        for bitmask in _root_moves(own, other):
+            if bitmask & winning:
+                child = BOARD_CELLS - stones
+            else:
+                # 零窗口只回答“这一手是否达到根节点分值”，比逐个精确求值便宜。
+                child = -self._negamax(other, own | bitmask, -score, -score + 1)
+            if child >= score:
+                best.append(bitmask)
+
+        sign = 0 if score == 0 else (1 if score > 0 else -1)
+        if score == 0:
+            distance = BOARD_CELLS - stones
+        else:
+            distance = BOARD_CELLS + 1 - abs(score) - stones
+        return SolveResult(
+            value=sign if player is PlayerColor.BLACK else -sign,
+            distance=distance,
+            best_moves=tuple(
+                bitmask_to_move(bitmask, player, rule_set)
+                for bitmask in sorted(_with_symmetric_images(own, other, best))
+            ),
+            nodes=self.nodes - start_nodes,
+        )
+
+    def _negamax(self, own: BitMask, other: BitMask, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        if self._max_nodes is not None and self.nodes > self._max_nodes:
+            raise SolverBudgetExceeded("Solver node budget exhausted.")
+        occupied = own | other
+        stones = occupied.bit_count()
+        if stones == BOARD_CELLS:
+            return 0
+        empty = FULL_MASK & ~occupied
+        if _threats(own, empty):
+            return BOARD_CELLS - stones
+        opponent_threats = _threats(other, empty)
+        if opponent_threats & (opponent_threats - 1):
+            # 对手有两个以上的一步胜点，挡不住，下一手就输。
+            return -(BOARD_CELLS - stones - 1)
+
+        # 自己最快也要再下两手才能赢；对手下一手赢不了，最快在第 4 手赢。
+        upper = BOARD_CELLS - stones - 2 if stones + 3 <= BOARD_CELLS else 0
+        lower = -(BOARD_CELLS - stones - 3) if stones + 4 <= BOARD_CELLS else 0
+        if beta > upper:
+            beta = upper
+        if alpha < lower:
+            alpha = lower
+        if alpha >= beta:
+            return alpha
+
+        canonical_own, canonical_other, _ = canonical_key(own, other)
+        key = (canonical_own, canonical_other)
+        bounds = self._bounds.get(key)
+        if bounds is not None:
+            low, high = bounds
+            if low >= beta:
+                return low
+            if high <= alpha:
+                return high
+            if low == high:
+                return low
+            if low > alpha:
+                alpha = low
+            if high < beta:
+                beta = high
+
+        original_alpha = alpha
+        best = -BOARD_CELLS - 1
+        moves = (
+            (opponent_threats,)
+            if opponent_threats
+            else _ordered_moves(own, other, empty)
+        )
+        for bitmask in moves:
+            score = -self._negamax(other, own | bitmask, -beta, -alpha)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best <= original_alpha:
+            new_bounds = (-BOARD_CELLS, best)
+        elif best >= beta:
+            new_bounds = (best, BOARD_CELLS)
+        else:
+            new_bounds = (best, best)
+        if bounds is not None:
+            new_bounds = (max(bounds[0], new_bounds[0]), min(bounds[1], new_bounds[1]))
+        elif len(self._bounds) >= self.max_entries:
+            # 按插入顺序淘汰最早的条目，命中时不调整顺序以省去开销。
+            del self._bounds[next(iter(self._bounds))]
+        self._bounds[key] = new_bounds
+        return best
+
+
+def solve(
+    state: GameState | CompactGameState | BitBoard,
+    rule_set: RuleSet | None = None,
+    solver: Solver | None = None,
+    max_nodes: int | None = None,
+) -> SolveResult:
+    """求解单个棋面；批量标注时传入同一个 `solver` 以复用置换表。"""
+
+    return (solver or Solver()).solve(state, rule_set, max_nodes)
+
+
+def _to_bitboard(
+    state: GameState | CompactGameState | BitBoard, rule_set: RuleSet
+) -> BitBoard:
+    if isinstance(state, BitBoard):
+        return state
+    if isinstance(state, CompactGameState):
+        # 紧凑状态的位编号与 BitBoard 相同，都是 row * cols + col。
+        return BitBoard(black=state.black, white=state.white)
+    return BitBoard.from_state(state, rule_set)
+
+
+def _column_mask(first: int, last: int) -> BitMask:
+    mask = 0
+    for row in range(BOARD_ROWS):
+        for col in range(max(first, 0), min(last, BOARD_WIDTH - 1) + 1):
+            mask |= 1 << (row * BOARD_WIDTH + col)
+    return mask
+
+
+def _direction_masks(col_step: int) -> tuple[BitMask, BitMask, BitMask, BitMask]:
+    # 第 j 项：空格位于连线第 j 格时，它所在的列必须让整条线不越过左右边界。
+    masks = []
+    for j in range(4):
+        low = min(-j * col_step, (3 - j) * col_step)
+        high = max(-j * col_step, (3 - j) * col_step)
+        masks.append(_column_mask(-low, BOARD_WIDTH - 1 - high))
+    return masks[0], masks[1], masks[2], masks[3]
+
+
+# (位移, 四个列掩码)：横、竖、两条斜线。行越界的位会移出 36 位或被空格掩掉。
+_DIRECTIONS = (
+    (1, _direction_masks(1)),
+    (BOARD_WIDTH, _direction_masks(0)),
+    (BOARD_WIDTH + 1, _direction_masks(1)),
+    (BOARD_WIDTH - 1, _direction_masks(-1)),
+)
+
+
+def _threats(pieces: BitMask, empty: BitMask) -> BitMask:
+    """`pieces` 一方再下一子就能连成四子的空格，按方向整盘移位计算。"""
+
+    threats = 0
+    for shift, (first, second, third, fourth) in _DIRECTIONS:
+        right1 = pieces >> shift
+        right2 = pieces >> (2 * shift)
+        left1 = pieces << shift
+        left2 = pieces << (2 * shift)
+        threats |= (
+            (right1 & right2 & (pieces >> (3 * shift)) & first)
+            | (left1 & right1 & right2 & second)
+            | (left2 & left1 & right1 & third)
+            | ((pieces << (3 * shift)) & left2 & left1 & fourth)
+        )
+    return threats & empty
+
+
+def _ordered_moves(own: BitMask, other: BitMask, empty: BitMask) -> list[BitMask]:
+    # 先试落下后凑成更多“三子加一空”连线的格子，其次按中心距离；稳定排序保留
+    # 中心顺序。新威胁只可能出现在经过这一格的连线上，逐条检查即可。
+    scored: list[tuple[int, BitMask]] = []
+    for bitmask in _CENTER_ORDER:
+        if not bitmask & empty:
+            continue
+        created = 0
+        for line in _CELL_LINES[bitmask.bit_length() - 1]:
+            if not line & other and (line & own).bit_count() == 2:
+                created += 1
+        scored.append((created, bitmask))
+    scored.sort(key=lambda item: -item[0])
+    return [bitmask for _, bitmask in scored]
+
+
+def _stabilizer(own: BitMask, other: BitMask) -> tuple[Symmetry, ...]:
+    return tuple(
+        symmetry
+        for symmetry in _NON_IDENTITY
+        if apply_symmetry(own, symmetry) == own
+        and apply_symmetry(other, symmetry) == other
+    )
+
+
+def _root_moves(own: BitMask, other: BitMask) -> list[BitMask]:
+    """根节点的全部落子，棋面自身对称时每个等价类只保留一个代表。"""
+
+    stabilizer = _stabilizer(own, other)
+    empty = FULL_MASK & ~(own | other)
+    moves: list[BitMask] = []
+    bitmask = 1
+    while bitmask != BOARD_END:
+        if bitmask & empty and all(
+            bitmask <= apply_symmetry(bitmask, symmetry) for symmetry in stabilizer
+        ):
+            moves.append(bitmask)
+        bitmask <<= 1
+    return moves
+
+
+def _with_symmetric_images(
+    own: BitMask, other: BitMask, moves: list[BitMask]
+) -> set[BitMask]:
+    stabilizer = _stabilizer(own, other)
+    return {
+        apply_symmetry(bitmask, symmetry)
+        for bitmask in moves
+        for symmetry in (Symmetry.IDENTITY, *stabilizer)
+    }
@@ -0,0 +1,128 @@
+"""4x9 棋盘的对称变换与规范化。
+
+无重力四子棋的连线集合在左右翻转、上下翻转和 180° 旋转下不变，这四个
+变换（连同恒等）构成一个群，且每个变换都是自己的逆。规范形取四个像里
+(black, white) 字典序最小的一个；把规范形上的落子映射回原棋盘只需再做
+一次同一个变换。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from enum import StrEnum
+
+from agent.base import BOARD_ROWS, BOARD_WIDTH, BitBoard, BitMask, Pattern
+
+_ROW_MASK = (1 << BOARD_WIDTH) - 1
+
+
+def _reverse_row(row: int) -> int:
+    reversed_row = 0
+    for col in range(BOARD_WIDTH):
+        if row >> col & 1:
+            reversed_row |= 1 << (BOARD_WIDTH - 1 - col)
+    return reversed_row
+
+
+# 9 位行内比特反转的查表，左右翻转时每行查一次。
+_REVERSED_ROWS = tuple(_reverse_row(row) for row in range(1 << BOARD_WIDTH))
+
+
+class Symmetry(StrEnum):
+    IDENTITY = "identity"
+    # 列 c -> 8 - c。
+    FLIP_COLS = "flip_cols"
+    # 行 r -> 3 - r。
+    FLIP_ROWS = "flip_rows"
+    ROTATE_180 = "rotate_180"
+
+
+def flip_cols(mask: BitMask) -> BitMask:
+    result = 0
+    for row in range(BOARD_ROWS):
+        shift = row * BOARD_WIDTH
+        result |= _REVERSED_ROWS[(mask >> shift) & _ROW_MASK] << shift
+    return result
+
+
+def flip_rows(mask: BitMask) -> BitMask:
+    result = 0
+    for row in range(BOARD_ROWS):
+        target = (BOARD_ROWS - 1 - row) * BOARD_WIDTH
+        result |= ((mask >> (row * BOARD_WIDTH)) & _ROW_MASK) << target
+    return result
+
+
+def rotate_180(mask: BitMask) -> BitMask:
+    result = 0
+    for row in range(BOARD_ROWS):
+        target = (BOARD_ROWS - 1 - row) * BOARD_WIDTH
+        result |= _REVERSED_ROWS[(mask >> (row * BOARD_WIDTH)) & _ROW_MASK] << target
+    return result
+
+
+_TRANSFORMS = {
+    Symmetry.FLIP_COLS: flip_cols,
+    Symmetry.FLIP_ROWS: flip_rows,
+    Symmetry.ROTATE_180: rotate_180,
+}
+
+
+def apply_symmetry(mask: BitMask, symmetry: Symmetry) -> BitMask:
+    """对任意位掩码施加变换；变换是对合的，所以它同时也是逆变换。"""
+
+    if symmetry is Symmetry.IDENTITY:
+        return mask
+    return _TRANSFORMS[symmetry](mask)
+
+
+def canonical_key(black: BitMask, white: BitMask) -> tuple[BitMask, BitMask, Symmetry]:
+    """返回规范形的 (black, white) 以及从原棋盘到规范形所用的变换。
+
+    多个像相同时取枚举里靠前的变换，恒等优先，因此对称棋盘不会被无谓地翻转。
+    """
+
+    best_black = black
+    best_white = white
+    best = Symmetry.IDENTITY
+    for symmetry, transform in _TRANSFORMS.items():
+        candidate_black = transform(black)
+        candidate_white = transform(white)
+        if (candidate_black, candidate_white) < (best_black, best_white):
+            best_black = candidate_black
+            best_white = candidate_white
+            best = symmetry
+    return best_black, best_white, best
+
+
+def canonical_board(board: BitBoard) -> tuple[BitBoard, Symmetry]:
+    black, white, symmetry = canonical_key(board.black, board.white)
+    return BitBoard(black=black, white=white), symmetry
+
+
+def map_candidates(
+    candidates: Iterable[tuple[BitMask, float]], symmetry: Symmetry
+) -> tuple[tuple[BitMask, float], ...]:
+    """把 (单格位, 分值) 候选搬到另一朝向，保持原有顺序。"""
+
+    if symmetry is Symmetry.IDENTITY:
+        return tuple(candidates)
+    transform = _TRANSFORMS[symmetry]
+    return tuple((transform(bitmask), value) for bitmask, value in candidates)
+
+
+def pattern_set_is_symmetric(patterns: Iterable[Pattern]) -> bool:
+    """模式集合在四个变换下是否封闭（权重下标与缺子数也要对应）。
+
+    只有封闭时，按规范形共享评估结果才与逐棋盘计算一致。
+    """
+
+    keys = {
+        (pattern.pieces, pattern.pieces_empty, pattern.n, pattern.weight_index)
+        for pattern in patterns
+    }
+    return all(
+        (transform(pieces), transform(pieces_empty), n, weight) in keys
+        for pieces, pieces_empty, n, weight in keys
+        for transform in _TRANSFORMS.values()
+    )
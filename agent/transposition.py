@@ -0,0 +1,142 @@
+"""最佳优先搜索的置换表：同一棋面经不同着法顺序到达时共享候选打分。"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from agent.base import BitMask
+from agent.evaluation import load_patterns
+from agent.symmetry import (
+    Symmetry,
+    canonical_key,
+    map_candidates,
+    pattern_set_is_symmetric,
+)
+
+
+@dataclass(slots=True)
+class TranspositionEntry:
+    """一个棋面的共享信息：首次展开时写入的候选动作。"""
+
+    # 剪枝后的 (单格位, 即时增量)，顺序即旧 C++ 的候选顺序。
+    candidates: tuple[tuple[BitMask, float], ...] | None
+
+
+class TranspositionTable:
+    """以 (black, white) 为键、容量有界的置换表，按最近最少使用淘汰。
+
+    使用置换表会偏离旧 C++ 的逐节点语义：换位节点复用同一份带噪声的
+    候选打分。需要精确复现时不要传入置换表。表里不存 opt/pess：它们是从
+    剪枝后的候选子树回传的，只对到达该节点的那条路径成立，不能当作换位
+    节点的界限。
+
+    候选打分依赖每次搜索抽样的特征子集，置换表每次搜索都要清空，只能
+    共享同一次搜索内部的换位。最佳优先搜索沿 principal variation 窄而深地
+    展开，这种换位很少；它保证的是同一棋面在一次搜索里至多打分一次，而
+    不是大幅减少节点。
+    """
+
+    def __init__(self, max_entries: int = 200_000) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # dict 保持插入顺序，命中时移到末尾，淘汰时弹出最前面的项。
+        self._entries: dict[tuple[int, int], TranspositionEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        # 候选打分依赖本次搜索抽样的特征集合，换一次搜索就必须清空。
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, black: BitMask, white: BitMask) -> TranspositionEntry | None:
+        key = (black, white)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries[key] = entry
+        self.hits += 1
+        return entry
+
+    def store_candidates(
+        self,
+        black: BitMask,
+        white: BitMask,
+        candidates: list[tuple[BitMask, float]],
+    ) -> None:
+        entry = self._touch(black, white)
+        entry.candidates = tuple(candidates)
+
+    def _touch(self, black: BitMask, white: BitMask) -> TranspositionEntry:
+        key = (black, white)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            entry = TranspositionEntry(candidates=None)
+            if len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+                self.evictions += 1
+        self._entries[key] = entry
+        return entry
+
+
+class SymmetricTranspositionTable(TranspositionTable):
+    """按棋面规范形做键的置换表，四个对称棋面共用一个条目。
+
+    候选打分取决于模式表：只有模式表在四个变换下封闭时，对称棋面的候选
+    才是彼此的像，才能按规范形共享。`share_candidates` 缺省时按
+    `pattern_set_is_symmetric(load_patterns())` 决定。不共享时它与
+    `TranspositionTable` 完全相同，按原棋盘做键：对称棋面之间什么也不共享，
+    条目数也不会减少。
+
+    共享候选时，在 `TranspositionTable` 已有的偏离之外，对称棋面还会共享
+    同一份噪声打分，而每次搜索抽样的特征子集本身未必对称。候选以规范形的
+    朝向存储，查询时再映射回查询棋面的朝向。返回的条目可能是一份副本，
+    只供读取。
+    """
+
+    def __init__(
+        self, max_entries: int = 200_000, share_candidates: bool | None = None
+    ) -> None:
+        super().__init__(max_entries)
+        self.share_candidates = (
+            pattern_set_is_symmetric(load_patterns())
+            if share_candidates is None
+            else share_candidates
+        )
+
+    def lookup(self, black: BitMask, white: BitMask) -> TranspositionEntry | None:
+        if not self.share_candidates:
+            return super().lookup(black, white)
+        black, white, symmetry = canonical_key(black, white)
+        entry = super().lookup(black, white)
+        if entry is None or symmetry is Symmetry.IDENTITY:
+            return entry
+        return TranspositionEntry(
+            candidates=(
+                map_candidates(entry.candidates, symmetry)
+                if entry.candidates is not None
+                else None
+            )
+        )
+
+    def store_candidates(
+        self,
+        black: BitMask,
+        white: BitMask,
+        candidates: list[tuple[BitMask, float]],
+    ) -> None:
+        if not self.share_candidates:
+            super().store_candidates(black, white, candidates)
+            return
+        black, white, symmetry = canonical_key(black, white)
+        super().store_candidates(
+            black, white, list(map_candidates(candidates, symmetry))
+        )
@@ -0,0 +1,120 @@
+"""按列存储的搜索树：用下标代替逐节点对象，降低分配和内存开销。"""
+
+from __future__ import annotations
+
+from array import array
+
+from agent.base import (
+    BLACK_WIN_VALUE,
+    BLACK_WINS,
+    DRAW_VALUE,
+    FULL_MASK,
+    WHITE_WIN_VALUE,
+    WHITE_WINS,
+    BitBoard,
+    BitMask,
+    PlayerColor,
+    is_win,
+)
+
+# 下标类字段里表示“没有这个节点”。
+NO_NODE = -1
+
+
+class SearchTree:
+    """struct-of-arrays 形式的搜索树，每个节点就是各列里的同一个下标。
+
+    一个节点的全部子节点在一次展开里连续创建，因此只记录第一个子节点和
+    子节点个数，遍历子节点就是遍历一个 `range`。节点语义与旧 C++
+    `bfs::node` 一致：`opt`/`pess` 是带深度的终局界限，`val` 是启发式值。
+    """
+
+    __slots__ = (
+        "black",
+        "white",
+        "val",
+        "opt",
+        "pess",
+        "depth",
+        "black_to_move",
+        "move",
+        "parent",
+        "first_child",
+        "child_count",
+        "best",
+        "relevant",
+    )
+
+    def __init__(self) -> None:
+        self.black = array("Q")
+        self.white = array("Q")
+        self.val = array("d")
+        self.opt = array("i")
+        self.pess = array("i")
+        self.depth = array("i")
+        self.black_to_move = array("b")
+        # 走到该节点的那一手（单格位），根节点为 0。
+        self.move = array("Q")
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.child_count = array("i")
+        self.best = array("i")
+        # 展开前才增量算出的相关模式位集，可能超过 64 位，只能放普通列表。
+        self.relevant: list[int | None] = []
+
+    def __len__(self) -> int:
+        return len(self.val)
+
+    def add_node(
+        self,
+        black: BitMask,
+        white: BitMask,
+        val: float,
+        player: PlayerColor,
+        depth: int,
+        parent: int = NO_NODE,
+        move: BitMask = 0,
+    ) -> int:
+        """追加一个节点并按旧 C++ 构造函数初始化终局界限。"""
+
+        if is_win(black):
+            opt = pess = BLACK_WINS - depth
+            val = BLACK_WIN_VALUE
+        elif is_win(white):
+            opt = pess = WHITE_WINS + depth
+            val = WHITE_WIN_VALUE
+        elif (black | white) == FULL_MASK:
+            opt = pess = 0
+            val = DRAW_VALUE
+        else:
+            pess = WHITE_WINS + depth + 1
+            opt = BLACK_WINS - depth - 1
+
+        node = len(self.val)
+        self.black.append(black)
+        self.white.append(white)
+        self.val.append(val)
+        self.opt.append(opt)
+        self.pess.append(pess)
+        self.depth.append(depth)
+        self.black_to_move.append(player is PlayerColor.BLACK)
+        self.move.append(move)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.child_count.append(0)
+        self.best.append(NO_NODE)
+        self.relevant.append(None)
+        return node
+
+    def board(self, node: int) -> BitBoard:
+        return BitBoard(black=self.black[node], white=self.white[node])
+
+    def player(self, node: int) -> PlayerColor:
+        return PlayerColor.BLACK if self.black_to_move[node] else PlayerColor.WHITE
+
+    def children(self, node: int) -> range:
+        first = self.first_child[node]
+        return range(first, first + self.child_count[node])
+
+    def determined(self, node: int) -> bool:
+        return self.opt[node] == self.pess[node]
@@ -0,0 +1 @@
+"""热点路径的性能基准：固定语料、吞吐与峰值内存、与基线比较。"""
@@ -0,0 +1,74 @@
+"""基准测试用的固定棋面语料：开局、中局和接近下满的残局各若干个。
+
+棋面由固定种子的随机对弈生成，只依赖规则本身，与搜索实现无关，所以
+搜索改动前后测到的是同一批棋面。生成时跳过会直接结束对局的落子，保证
+每个棋面都还有合法动作可供搜索。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import lru_cache
+from random import Random
+
+from game_base.core.models import GameState, Move, RuleSet
+from game_base.core.rules import apply_move, is_terminal, legal_actions, new_game
+
+CORPUS_SEED = 20230621
+POSITIONS_PER_PHASE = 4
+RULE_SET = RuleSet(rows=4, cols=9, connect_n=4)
+
+
+class Phase(StrEnum):
+    OPENING = "opening"
+    MIDGAME = "midgame"
+    ENDGAME = "endgame"
+
+
+# 每个阶段的棋面已落子数。
+PHASE_STONES = {Phase.OPENING: 4, Phase.MIDGAME: 14, Phase.ENDGAME: 28}
+
+
+@dataclass(frozen=True, slots=True)
+class CorpusPosition:
+    """语料中的一个棋面，以及从空棋盘走到这里的落子序列。"""
+
+    name: str
+    phase: Phase
+    state: GameState
+    moves: tuple[Move, ...]
+
+
+@lru_cache(maxsize=1)
+def load_corpus() -> tuple[CorpusPosition, ...]:
+    rng = Random(CORPUS_SEED)
+    positions: list[CorpusPosition] = []
+    for phase, stones in PHASE_STONES.items():
+        for index in range(POSITIONS_PER_PHASE):
+            state, moves = _quiet_game(rng, stones)
+            positions.append(
+                CorpusPosition(
+                    name=f"{phase}-{index}", phase=phase, state=state, moves=moves
+                )
+            )
+    return tuple(positions)
+
+
+def _quiet_game(rng: Random, stones: int) -> tuple[GameState, tuple[Move, ...]]:
+    # 走进死胡同（剩下的落子都会终局）时整盘重来，随机数继续往下取。
+    while True:
+        state = new_game(RULE_SET)
+        moves: list[Move] = []
+        while len(moves) < stones:
+            options = [
+                (move, after)
+                for move in legal_actions(state, RULE_SET)
+                if not is_terminal(after := apply_move(state, move, RULE_SET))
+            ]
+            if not options:
+                break
+            move, state = rng.choice(options)
+            moves.append(move)
+        else:
+            return state, tuple(moves)
@@ -0,0 +1,307 @@
+"""规则、评估、搜索和日志记录热点路径的基准测试。
+
+每个基准的一“轮”遍历一次固定语料，返回本轮的操作数和搜索节点数。计时
+阶段至少跑 `min_rounds` 轮、累计不少于 `min_time` 秒；峰值内存另外在
+`tracemalloc` 下单独跑一轮测量，避免追踪开销混进计时。
+
+结果写成 JSON，可以与保存的基线比较：吞吐下降或峰值内存上升超过
+`threshold`（相对比例）的基准记为回退，命令行在有回退时以状态码 1 退出。
+
+    python -m benchmarks --output current.json --baseline baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter_ns
+
+from agent.base import BitBoard, SearchParams
+from agent.evaluation import evaluate_board, get_moves, load_patterns
+from agent.search import decide_move
+from benchmarks.corpus import RULE_SET, CorpusPosition, load_corpus
+from game_base.core.models import PlayerColor
+from game_base.core.rules import apply_move, new_compact_game, new_game
+from game_base.interface.views import build_observation
+from game_base.recording.recorder import JsonlRecorder
+
+REPORT_FORMAT_VERSION = 1
+DEFAULT_GAMMAS = (0.1, 0.03, 0.01)
+# 峰值内存低于这个量时相对变化没有意义，不参与回退判断。
+MIN_COMPARED_PEAK_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class Benchmark:
+    """一个基准：`round` 跑一轮并返回 (操作数, 搜索节点数)。"""
+
+    name: str
+    round: Callable[[], tuple[int, int]]
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    name: str
+    rounds: int
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    # 只有搜索类基准才有节点数，其余为 None。
+    nodes_per_sec: float | None
+    peak_bytes: int
+
+
+@dataclass(frozen=True, slots=True)
+class Regression:
+    """一项超过阈值的退化；`change` 是朝坏方向的相对变化。"""
+
+    name: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+
+
+def default_benchmarks(
+    corpus: Sequence[CorpusPosition] | None = None,
+    gammas: Iterable[float] = DEFAULT_GAMMAS,
+) -> list[Benchmark]:
+    corpus = load_corpus() if corpus is None else tuple(corpus)
+    boards = [BitBoard.from_state(position.state, RULE_SET) for position in corpus]
+    patterns = load_patterns()
+    default_params = SearchParams()
+
+    def replay(start: Callable[..., object]) -> Callable[[], tuple[int, int]]:
+        def run() -> tuple[int, int]:
+            ops = 0
+            for position in corpus:
+                state = start(RULE_SET)
+                for move in position.moves:
+                    state = apply_move(state, move, RULE_SET)
+                ops += len(position.moves)
+            return ops, 0
+
+        return run
+
+    def observations() -> tuple[int, int]:
+        for position in corpus:
+            build_observation(position.state, RULE_SET)
+        return len(corpus), 0
+
+    def evaluations() -> tuple[int, int]:
+        for board in boards:
+            evaluate_board(board, default_params)
+        return len(boards), 0
+
+    def move_scores() -> tuple[int, int]:
+        rng = Random(0)
+        for board in boards:
+            player = board.active_player()
+            get_moves(board, player, player, RULE_SET, default_params, rng, patterns)
+        return len(boards), 0
+
+    def search(params: SearchParams) -> Callable[[], tuple[int, int]]:
+        def run() -> tuple[int, int]:
+            nodes = 0
+            for index, position in enumerate(corpus):
+                result = decide_move(position.state, RULE_SET, params, Random(index))
+                nodes += result.node_count
+            return len(corpus), nodes
+
+        return run
+
+    benchmarks = [
+        Benchmark("rules.apply_move", replay(new_game)),
+        Benchmark("rules.apply_move[compact]", replay(new_compact_game)),
+        Benchmark("views.build_observation", observations),
+        Benchmark("evaluation.evaluate_board", evaluations),
+        Benchmark("evaluation.get_moves", move_scores),
+    ]
+    for gamma in gammas:
+        # 关闭失误，否则部分抽样直接跳过搜索，测不到搜索本身。
+        params = SearchParams(gamma=gamma, lapse_rate=0.0)
+        benchmarks.append(
+            Benchmark(f"search.decide_move[gamma={gamma:g}]", search(params))
+        )
+    benchmarks.append(Benchmark("recording.jsonl_event", _record_games(corpus)))
+    return benchmarks
+
+
+def run_benchmark(
+    benchmark: Benchmark, min_time: float = 1.0, min_rounds: int = 3
+) -> BenchmarkResult:
+    benchmark.round()  # 预热：填充模式表、中心值等惰性缓存。
+    rounds = ops = nodes = 0
+    elapsed_ns = 0
+    while rounds < min_rounds or elapsed_ns < min_time * 1e9:
+        start_ns = perf_counter_ns()
+        round_ops, round_nodes = benchmark.round()
+        elapsed_ns += perf_counter_ns() - start_ns
+        rounds += 1
+        ops += round_ops
+        nodes += round_nodes
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline_bytes = tracemalloc.get_traced_memory()[0]
+    benchmark.round()
+    peak_bytes = tracemalloc.get_traced_memory()[1] - baseline_bytes
+    if not tracing:
+        tracemalloc.stop()
+
+    seconds = elapsed_ns / 1e9
+    return BenchmarkResult(
+        name=benchmark.name,
+        rounds=rounds,
+        ops=ops,
+        seconds=seconds,
+        ops_per_sec=ops / seconds if seconds else 0.0,
+        nodes_per_sec=nodes / seconds if nodes and seconds else None,
+        peak_bytes=peak_bytes,
+    )
+
+
+def build_report(results: Iterable[BenchmarkResult]) -> dict[str, object]:
+    return {
+        "format_version": REPORT_FORMAT_VERSION,
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+
+
+def compare_reports(
+    current: dict[str, object], baseline: dict[str, object], threshold: float = 0.1
+) -> list[Regression]:
+    """列出 `current` 相对 `baseline` 的退化；只比较两边都有的基准。"""
+
+    if threshold < 0:
+        raise ValueError("threshold must be non-negative.")
+    regressions: list[Regression] = []
+    baseline_results = baseline["results"]
+    for name, result in current["results"].items():
+        before = baseline_results.get(name)
+        if before is None:
+            continue
+        for metric in ("ops_per_sec", "nodes_per_sec"):
+            old, new = before.get(metric), result.get(metric)
+            if old and new is not None and (old - new) / old > threshold:
+                regressions.append(
+                    Regression(name, metric, old, new, (old - new) / old)
+                )
+        old, new = before["peak_bytes"], result["peak_bytes"]
+        if (
+            max(old, new) >= MIN_COMPARED_PEAK_BYTES
+            and old > 0
+            and (new - old) / old > threshold
+        ):
+            regressions.append(
+                Regression(name, "peak_bytes", old, new, (new - old) / old)
+            )
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the hot-path benchmarks.")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("--min-rounds", type=int, default=3)
+    parser.add_argument("--gamma", type=float, nargs="+", default=list(DEFAULT_GAMMAS))
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        default=None,
+        help="run benchmarks whose name contains any of these",
+    )
+    args = parser.parse_args(argv)
+
+    benchmarks = [
+        benchmark
+        for benchmark in default_benchmarks(gammas=args.gamma)
+        if args.only is None or any(part in benchmark.name for part in args.only)
+    ]
+    print(f"{'benchmark':<36}{'ops/s':>12}{'nodes/s':>12}{'peak KiB':>10}")
+    results = []
+    for benchmark in benchmarks:
+        result = run_benchmark(benchmark, args.min_time, args.min_rounds)
+        results.append(result)
+        nodes = (
+            f"{result.nodes_per_sec:>12.0f}" if result.nodes_per_sec else f"{'-':>12}"
+        )
+        print(
+            f"{result.name:<36}{result.ops_per_sec:>12.1f}{nodes}"
+            f"{result.peak_bytes / 1024:>10.1f}"
+        )
+
+    report = build_report(results)
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.baseline is None:
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare_reports(report, baseline, args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.name} {regression.metric}: "
+            f"{regression.baseline:.6g} -> {regression.current:.6g} "
+            f"({regression.change:+.1%})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+class _ScriptedPlayer:
+    # 记录器只读取 `player_id` 和 `color`，不需要真正的玩家。
+    def __init__(self, color: PlayerColor) -> None:
+        self.player_id = f"bench-{color}"
+        self.color = color
+
+
+def _record_games(corpus: Sequence[CorpusPosition]) -> Callable[[], tuple[int, int]]:
+    players = {color: _ScriptedPlayer(color) for color in PlayerColor}
+    # 预先算好每一步的前后状态和观察，计时只覆盖记录器本身。
+    games = []
+    for position in corpus:
+        state = new_game(RULE_SET)
+        turns = []
+        for move in position.moves:
+            after = apply_move(state, move, RULE_SET)
+            turns.append((move, state, after, build_observation(state, RULE_SET)))
+            state = after
+        games.append((turns, state))
+
+    def run() -> tuple[int, int]:
+        events = 0
+        with TemporaryDirectory() as directory:
+            for turns, final in games:
+                recorder = JsonlRecorder(directory)
+                recorder.record_match_started(RULE_SET, players, new_game(RULE_SET))
+                for turn_index, turn in enumerate(turns):
+                    move, before, after, seen = turn
+                    player = players[move.player]
+                    recorder.record_turn_started(turn_index, player, seen)
+                    recorder.record_move_submitted(turn_index, player, move, 0)
+                    # 与引擎一致，落子事件里记的是落子前的观察。
+                    recorder.record_move_applied(
+                        turn_index, player, move, before, after, seen
+                    )
+                recorder.record_match_finished(final, len(turns))
+                events += 2 + 3 * len(turns)
+        return events, 0
+
+    return run
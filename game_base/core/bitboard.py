@@ -0,0 +1,133 @@
+"""位板几何：格子编号、整盘掩码和经过每个格子的连线掩码。"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from game_base.core.models import RuleSet
+
+
+@dataclass(frozen=True, slots=True)
+class BoardGeometry:
+    """某个棋盘尺寸下预先算好的位运算常量，按 RuleSet 尺寸只构建一次。"""
+
+    rows: int
+    cols: int
+    connect_n: int
+    full_mask: int
+    # 第 i 项是经过第 i 个格子的全部 connect_n 连线掩码。
+    cell_lines: tuple[tuple[int, ...], ...]
+    # 每个方向一项：(合法起点掩码, 倍增移位序列)，用于整盘判定连线。
+    win_shifts: tuple[tuple[int, tuple[int, ...]], ...]
+
+    @property
+    def cells(self) -> int:
+        return self.rows * self.cols
+
+    def cell_index(self, row: int, col: int) -> int:
+        return row * self.cols + col
+
+    def cell_bit(self, row: int, col: int) -> int:
+        return 1 << (row * self.cols + col)
+
+    def has_line_through(self, pieces: int, cell_index: int) -> bool:
+        # 新落下的一子只可能补全经过它的连线，逐条做一次与运算即可。
+        for line in self.cell_lines[cell_index]:
+            if pieces & line == line:
+                return True
+        return False
+
+    def is_win(self, pieces: int) -> bool:
+        """不依赖最后一手，直接判断整张掩码里是否存在 connect_n 连线。"""
+
+        for start_mask, steps in self.win_shifts:
+            run = pieces
+            for step in steps:
+                run &= run >> step
+            if run & start_mask:
+                return True
+        return False
+
+
+def geometry_for(rule_set: RuleSet) -> BoardGeometry:
+    return board_geometry(rule_set.rows, rule_set.cols, rule_set.connect_n)
+
+
+@lru_cache(maxsize=None)
+def board_geometry(rows: int, cols: int, connect_n: int) -> BoardGeometry:
+    lines = _all_lines(rows, cols, connect_n)
+    cell_lines = tuple(
+        tuple(line for line in lines if line >> cell_index & 1)
+        for cell_index in range(rows * cols)
+    )
+    return BoardGeometry(
+        rows=rows,
+        cols=cols,
+        connect_n=connect_n,
+        full_mask=(1 << (rows * cols)) - 1,
+        cell_lines=cell_lines,
+        win_shifts=_win_shifts(rows, cols, connect_n),
+    )
+
+
+def iter_cell_indices(mask: int) -> list[int]:
+    """按位编号从小到大展开掩码里的每个格子。"""
+
+    indices: list[int] = []
+    while mask:
+        lowest = mask & -mask
+        indices.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return indices
+
+
+# 横、竖、两条对角线四个连线方向。
+_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def _all_lines(rows: int, cols: int, connect_n: int) -> tuple[int, ...]:
+    lines: list[int] = []
+    for delta_row, delta_col in _DIRECTIONS:
+        for row in range(rows):
+            for col in range(cols):
+                end_row = row + delta_row * (connect_n - 1)
+                end_col = col + delta_col * (connect_n - 1)
+                if not (0 <= end_row < rows and 0 <= end_col < cols):
+                    continue
+                line = 0
+                for step in range(connect_n):
+                    line |= 1 << (
+                        (row + delta_row * step) * cols + col + delta_col * step
+                    )
+                lines.append(line)
+    return tuple(lines)
+
+
+def _win_shifts(
+    rows: int, cols: int, connect_n: int
+) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    # 对每个方向，先按倍增把“从第 i 格起连续 L 子”扩展到 connect_n，
+    # 最后只保留整条线都落在棋盘内的起点，因此中间结果跨行回绕也无妨。
+    shifts: list[tuple[int, tuple[int, ...]]] = []
+    for delta_row, delta_col in _DIRECTIONS:
+        start_mask = 0
+        for row in range(rows):
+            for col in range(cols):
+                end_row = row + delta_row * (connect_n - 1)
+                end_col = col + delta_col * (connect_n - 1)
+                if 0 <= end_row < rows and 0 <= end_col < cols:
+                    start_mask |= 1 << (row * cols + col)
+        if not start_mask:
+            continue
+
+        stride = delta_row * cols + delta_col
+        steps: list[int] = []
+        length = 1
+        while length * 2 <= connect_n:
+            steps.append(length * stride)
+            length *= 2
+        if length < connect_n:
+            steps.append((connect_n - length) * stride)
+        shifts.append((start_mask, tuple(steps)))
+    return tuple(shifts)
@@ -5,18 +5,18 @@ from __future__ import annotations
 from dataclasses import dataclass
 from time import perf_counter_ns
 
-from game_base.core.models import GameState, PlayerColor, RuleSet
-from game_base.core.rules import apply_move, is_terminal, new_game
+from game_base.core.models import CompactGameState, GameState, PlayerColor, RuleSet
+from game_base.core.rules import apply_move, is_terminal, new_compact_game, new_game
 from game_base.interface.protocols import Player
 from game_base.interface.views import build_observation
-from game_base.recording.recorder import JsonlRecorder
+from game_base.recording.protocols import Recorder
 
 
 @dataclass(frozen=True, slots=True)
 class MatchResult:
     """一次对局运行后的返回结果。"""
 
-    final_state: GameState
+    final_state: GameState | CompactGameState
     event_log_path: str | None = None
     summary_path: str | None = None
 
@@ -25,10 +25,14 @@ def run_match(
     black_player: Player,
     white_player: Player,
     rule_set: RuleSet,
-    recorder: JsonlRecorder | None = None,
+    recorder: Recorder | None = None,
+    compact_state: bool = False,
 ) -> MatchResult:
     # 调度层负责流程控制，不直接实现任何规则细节。
-    state = new_game(rule_set)
+    # 自对弈等高吞吐场景可以改用位板状态，棋盘只在观察或记录时才物化。
+    state: GameState | CompactGameState = (
+        new_compact_game(rule_set) if compact_state else new_game(rule_set)
+    )
     players = {
         PlayerColor.BLACK: black_player,
         PlayerColor.WHITE: white_player,
@@ -41,51 +45,60 @@ def run_match(
             initial_state=state,
         )
 
-    turn_index = 0
-    while not is_terminal(state):
-        current_player = players[state.next_player]
-        # 不管是人类玩家还是 AI，看到的都是同一份只读观察。
-        observation = build_observation(state, rule_set)
-        if recorder is not None:
-            recorder.record_turn_started(
-                turn_index=turn_index, player=current_player, observation=observation
-            )
-
-        # 在调度层统计思考时长，后续可以直接用于行为分析。
-        turn_start_ns = perf_counter_ns()
-        move = current_player.choose_move(observation)
-        think_time_ms = (perf_counter_ns() - turn_start_ns) // 1_000_000
-
+    try:
+        turn_index = 0
+        while not is_terminal(state):
+            current_player = players[state.next_player]
+            # 不管是人类玩家还是 AI，看到的都是同一份只读观察。
+            observation = build_observation(state, rule_set)
+            if recorder is not None:
+                recorder.record_turn_started(
+                    turn_index=turn_index,
+                    player=current_player,
+                    observation=observation,
+                )
+
+            # 在调度层统计思考时长，后续可以直接用于行为分析。
+            turn_start_ns = perf_counter_ns()
+            move = current_player.choose_move(observation)
+            think_time_ms = (perf_counter_ns() - turn_start_ns) // 1_000_000
+
+            if recorder is not None:
+                recorder.record_move_submitted(
+                    turn_index=turn_index,
+                    player=current_player,
+                    move=move,
+                    think_time_ms=think_time_ms,
+                )
+
+            # 保留旧状态，记录器才能输出完整的前后状态变化。
+            previous_state = state
+            state = apply_move(state, move, rule_set)
+
+            if recorder is not None:
+                recorder.record_move_applied(
+                    turn_index=turn_index,
+                    player=current_player,
+                    move=state.last_move,
+                    previous_state=previous_state,
+                    new_state=state,
+                    observation=observation,
+                )
+
+            turn_index += 1
+    except BaseException:
+        # 中途出错时也要把已缓冲的事件刷到文件，留下可排查的半盘记录。
         if recorder is not None:
-            recorder.record_move_submitted(
-                turn_index=turn_index,
-                player=current_player,
-                move=move,
-                think_time_ms=think_time_ms,
-            )
-
-        # 保留旧状态，记录器才能输出完整的前后状态变化。
-        previous_state = state
-        state = apply_move(state, move, rule_set)
-
-        if recorder is not None:
-            recorder.record_move_applied(
-                turn_index=turn_index,
-                player=current_player,
-                move=state.last_move,
-                previous_state=previous_state,
-                new_state=state,
-                observation=observation,
-            )
-
-        turn_index += 1
+            recorder.close()
+        raise
 
     if recorder is not None:
         recorder.record_match_finished(final_state=state, turn_index=turn_index)
 
     # 返回最终状态和日志路径，方便上层继续展示、回放或分析。
+    summary_path = recorder.summary_path if recorder is not None else None
     return MatchResult(
         final_state=state,
         event_log_path=str(recorder.events_path) if recorder is not None else None,
-        summary_path=str(recorder.summary_path) if recorder is not None else None,
+        summary_path=str(summary_path) if summary_path is not None else None,
     )
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import StrEnum
 from typing import TypeAlias
 
@@ -81,11 +81,76 @@ class GameState:
     last_move: Move | None = None
 
 
+@dataclass(frozen=True, slots=True)
+class CompactGameState:
+    """用两张位掩码表示的紧凑对局状态，规则层可以直接在它上面推进。"""
+
+    black: int
+    white: int
+    rows: int
+    cols: int
+    next_player: PlayerColor
+    move_count: int
+    status: GameStatus = GameStatus.ONGOING
+    winner: PlayerColor | None = None
+    last_move: Move | None = None
+    _board: Board | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def board(self) -> Board:
+        # 只有人类视图或记录器真正读取棋盘时才物化 tuple 棋盘，并缓存结果。
+        if self._board is None:
+            object.__setattr__(
+                self,
+                "_board",
+                bitmasks_to_board(self.black, self.white, self.rows, self.cols),
+            )
+        return self._board
+
+    def to_game_state(self) -> GameState:
+        return GameState(
+            board=self.board,
+            next_player=self.next_player,
+            move_count=self.move_count,
+            status=self.status,
+            winner=self.winner,
+            last_move=self.last_move,
+        )
+
+
 def empty_board(rows: int, cols: int) -> Board:
     # 用 tuple 嵌套 tuple 表示棋盘，天然不可变，适合做状态快照。
     return tuple(tuple(None for _ in range(cols)) for _ in range(rows))
 
 
+def bitmasks_to_board(black: int, white: int, rows: int, cols: int) -> Board:
+    # 位编号约定为 row * cols + col，与智能体的位板布局一致。
+    return tuple(
+        tuple(
+            PlayerColor.BLACK
+            if (black >> (row * cols + col)) & 1
+            else PlayerColor.WHITE
+            if (white >> (row * cols + col)) & 1
+            else None
+            for col in range(cols)
+        )
+        for row in range(rows)
+    )
+
+
+def board_to_bitmasks(board: Board) -> tuple[int, int]:
+    black = 0
+    white = 0
+    cols = len(board[0]) if board else 0
+    for row_index, row in enumerate(board):
+        for col_index, cell in enumerate(row):
+            if cell is PlayerColor.BLACK:
+                black |= 1 << (row_index * cols + col_index)
+            elif cell is PlayerColor.WHITE:
+                white |= 1 << (row_index * cols + col_index)
+    return black, white
+
+
 def board_to_matrix(board: Board) -> list[list[str | None]]:
     # 导出为普通列表，便于 JSON 序列化和前端消费。
     return [[cell.value if cell is not None else None for cell in row] for row in board]
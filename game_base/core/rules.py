@@ -2,18 +2,26 @@
 
 from __future__ import annotations
 
+from typing import TypeVar
+
+from game_base.core.bitboard import geometry_for, iter_cell_indices
 from game_base.core.errors import InvalidMoveError
 from game_base.core.models import (
     Board,
+    CompactGameState,
     GameState,
     GameStatus,
     Move,
     PlayerColor,
     Position,
     RuleSet,
+    board_to_bitmasks,
     empty_board,
 )
 
+# 规则函数同时接受两种状态表示，并返回与输入相同的表示。
+StateT = TypeVar("StateT", GameState, CompactGameState)
+
 
 def new_game(rule_set: RuleSet) -> GameState:
     # 对局初始化只依赖规则配置，不掺杂任何输入输出逻辑。
@@ -24,10 +32,51 @@ def new_game(rule_set: RuleSet) -> GameState:
     )
 
 
-def legal_actions(state: GameState, rule_set: RuleSet) -> list[Move]:
+def new_compact_game(rule_set: RuleSet) -> CompactGameState:
+    # 紧凑表示只保存两张位掩码，tuple 棋盘在需要展示时才物化。
+    return CompactGameState(
+        black=0,
+        white=0,
+        rows=rule_set.rows,
+        cols=rule_set.cols,
+        next_player=rule_set.first_player,
+        move_count=0,
+    )
+
+
+def to_compact_state(state: GameState, rule_set: RuleSet) -> CompactGameState:
+    black, white = board_to_bitmasks(state.board)
+    return CompactGameState(
+        black=black,
+        white=white,
+        rows=rule_set.rows,
+        cols=rule_set.cols,
+        next_player=state.next_player,
+        move_count=state.move_count,
+        status=state.status,
+        winner=state.winner,
+        last_move=state.last_move,
+    )
+
+
+def legal_actions(
+    state: GameState | CompactGameState, rule_set: RuleSet
+) -> list[Move]:
     if state.status is not GameStatus.ONGOING:
         return []
 
+    if isinstance(state, CompactGameState):
+        empty = geometry_for(rule_set).full_mask & ~(state.black | state.white)
+        return [
+            Move(
+                player=state.next_player,
+                position=Position(
+                    row=cell_index // rule_set.cols, col=cell_index % rule_set.cols
+                ),
+            )
+            for cell_index in iter_cell_indices(empty)
+        ]
+
     # 当前项目只支持无重力规则：所有空格都直接是合法动作。
     actions: list[Move] = []
     for row_index, row in enumerate(state.board):
@@ -42,7 +91,9 @@ def legal_actions(state: GameState, rule_set: RuleSet) -> list[Move]:
     return actions
 
 
-def validate_move(state: GameState, move: Move, rule_set: RuleSet) -> None:
+def validate_move(
+    state: GameState | CompactGameState, move: Move, rule_set: RuleSet
+) -> None:
     # 先判断对局阶段和轮次，再判断动作本身是否合法。
     if state.status is not GameStatus.ONGOING:
         raise InvalidMoveError("Cannot play after the match has ended.")
@@ -54,25 +105,32 @@ def validate_move(state: GameState, move: Move, rule_set: RuleSet) -> None:
         or not 0 <= move.position.col < rule_set.cols
     ):
         raise InvalidMoveError("Position is out of bounds.")
-    if state.board[move.position.row][move.position.col] is not None:
+    if isinstance(state, CompactGameState):
+        cell_index = move.position.row * rule_set.cols + move.position.col
+        occupied = (state.black | state.white) >> cell_index & 1
+    else:
+        occupied = state.board[move.position.row][move.position.col] is not None
+    if occupied:
         raise InvalidMoveError("Selected position is already occupied.")
 
 
-def apply_move(state: GameState, move: Move, rule_set: RuleSet) -> GameState:
+def apply_move(state: StateT, move: Move, rule_set: RuleSet) -> StateT:
     validate_move(state, move, rule_set)
+    if isinstance(state, CompactGameState):
+        return _apply_compact_move(state, move, rule_set)
     updated_board = _place_piece(state.board, move.position, move.player)
 
-    # 新落下的这一子是唯一可能改变胜负的因素，因此只围绕它检查即可。
-    winner = (
-        move.player
-        if _has_connection(updated_board, move.position, move.player, rule_set.connect_n)
-        else None
-    )
+    # 新落下的这一子是唯一可能改变胜负的因素，因此只检查经过它的连线即可。
+    geometry = geometry_for(rule_set)
+    black, white = board_to_bitmasks(updated_board)
+    pieces = black if move.player is PlayerColor.BLACK else white
+    cell_index = geometry.cell_index(move.position.row, move.position.col)
+    winner = move.player if geometry.has_line_through(pieces, cell_index) else None
     if winner is PlayerColor.BLACK:
         status = GameStatus.BLACK_WIN
     elif winner is PlayerColor.WHITE:
         status = GameStatus.WHITE_WIN
-    elif _is_full(updated_board):
+    elif (black | white) == geometry.full_mask:
         status = GameStatus.DRAW
     else:
         status = GameStatus.ONGOING
@@ -87,55 +145,51 @@ def apply_move(state: GameState, move: Move, rule_set: RuleSet) -> GameState:
     )
 
 
-def is_terminal(state: GameState) -> bool:
+def is_terminal(state: GameState | CompactGameState) -> bool:
     return state.status is not GameStatus.ONGOING
 
 
+def _apply_compact_move(
+    state: CompactGameState, move: Move, rule_set: RuleSet
+) -> CompactGameState:
+    # 位板路径：落子、连线判定和满盘判定都只是常数次位运算。
+    geometry = geometry_for(rule_set)
+    cell_index = geometry.cell_index(move.position.row, move.position.col)
+    bitmask = 1 << cell_index
+    black = state.black
+    white = state.white
+    if move.player is PlayerColor.BLACK:
+        black |= bitmask
+        pieces = black
+    else:
+        white |= bitmask
+        pieces = white
+
+    winner = move.player if geometry.has_line_through(pieces, cell_index) else None
+    if winner is PlayerColor.BLACK:
+        status = GameStatus.BLACK_WIN
+    elif winner is PlayerColor.WHITE:
+        status = GameStatus.WHITE_WIN
+    elif (black | white) == geometry.full_mask:
+        status = GameStatus.DRAW
+    else:
+        status = GameStatus.ONGOING
+
+    return CompactGameState(
+        black=black,
+        white=white,
+        rows=state.rows,
+        cols=state.cols,
+        next_player=state.next_player.other(),
+        move_count=state.move_count + 1,
+        status=status,
+        winner=winner,
+        last_move=move,
+    )
+
+
 def _place_piece(board: Board, position: Position, player: PlayerColor) -> Board:
     # 复制一份棋盘再写入，保持 GameState 不可变。
     board_rows = [list(row) for row in board]
     board_rows[position.row][position.col] = player
     return tuple(tuple(row) for row in board_rows)
-
-
-def _has_connection(
-    board: Board,
-    position: Position,
-    player: PlayerColor,
-    connect_n: int,
-) -> bool:
-    # 以最后一步为中心，分别检查横、竖、两条对角线。
-    directions = ((0, 1), (1, 0), (1, 1), (1, -1))
-    for delta_row, delta_col in directions:
-        count = 1
-        count += _count_direction(board, position, player, delta_row, delta_col)
-        count += _count_direction(board, position, player, -delta_row, -delta_col)
-        if count >= connect_n:
-            return True
-    return False
-
-
-def _count_direction(
-    board: Board,
-    position: Position,
-    player: PlayerColor,
-    delta_row: int,
-    delta_col: int,
-) -> int:
-    row = position.row + delta_row
-    col = position.col + delta_col
-    count = 0
-    max_rows = len(board)
-    max_cols = len(board[0]) if board else 0
-
-    # 沿着一个方向持续统计同色连续棋子数量，直到越界或颜色中断。
-    while 0 <= row < max_rows and 0 <= col < max_cols and board[row][col] is player:
-        count += 1
-        row += delta_row
-        col += delta_col
-    return count
-
-
-def _is_full(board: Board) -> bool:
-    # 无空位且无人获胜时即为平局。
-    return all(cell is not None for row in board for cell in row)
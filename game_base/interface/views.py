@@ -6,6 +6,7 @@ from dataclasses import dataclass
 
 from game_base.core.models import (
     Board,
+    CompactGameState,
     GameState,
     GameStatus,
     Move,
@@ -27,7 +28,9 @@ class Observation:
     status: GameStatus
 
 
-def build_observation(state: GameState, rule_set: RuleSet) -> Observation:
+def build_observation(
+    state: GameState | CompactGameState, rule_set: RuleSet
+) -> Observation:
     # 观察对象是状态快照，不应该让玩家直接改动底层 GameState。
     return Observation(
         board=state.board,
@@ -0,0 +1,17 @@
+"""可选依赖的延迟导入：对局和搜索主路径不需要它们，只在批量分析时才加载。"""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def require_numpy(feature: str) -> Any:
+    """导入并返回 numpy；缺失时抛出指明 `feature` 和安装方式的 ImportError。"""
+
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            f"{feature} requires numpy; install the 'analysis' extra."
+        ) from error
+    return numpy
@@ -0,0 +1,186 @@
+"""后台线程记录器：对局循环只把事件参数放进队列，序列化和写盘在另一个线程完成。"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from types import TracebackType
+from typing import Any
+
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    Move,
+    PlayerColor,
+    RuleSet,
+)
+from game_base.interface.protocols import Player
+from game_base.interface.views import Observation
+from game_base.recording.protocols import Recorder
+
+# 队列里的结束标记，写线程看到它就退出。
+_STOP = None
+
+
+class AsyncRecorder:
+    """把任意 `Recorder` 包装成异步版本。
+
+    每次记录只把 (方法名, 参数, 时间戳) 元组放进有界队列；队列满时调用方阻塞，
+    天然形成背压。状态、观察和动作都是不可变对象，可以安全地跨线程传递。
+    写线程里抛出的异常会在下一次记录、`record_match_finished` 或 `close()`
+    时在调用方线程重新抛出。`record_match_finished` 会等队列写完再返回。
+    时间戳在入队时取，由写线程传给被包装的记录器，所以队列积压时记下的
+    仍是事件发生的时刻，而不是写盘的时刻。
+    """
+
+    def __init__(self, inner: Recorder, max_queue: int = 1024) -> None:
+        if max_queue <= 0:
+            raise ValueError("max_queue must be positive.")
+        self.inner = inner
+        self._queue: Queue[tuple[str, tuple[Any, ...], float] | None] = Queue(max_queue)
+        self._thread: Thread | None = None
+        self._error: BaseException | None = None
+
+    def __enter__(self) -> AsyncRecorder:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def events_path(self) -> Path:
+        return self.inner.events_path
+
+    @property
+    def summary_path(self) -> Path | None:
+        return self.inner.summary_path
+
+    def record_match_started(
+        self,
+        rule_set: RuleSet,
+        players: dict[PlayerColor, Player],
+        initial_state: GameState | CompactGameState,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        # 复制一份玩家映射，调用方之后改动字典也不会影响写线程。
+        self._submit(
+            "record_match_started",
+            timestamp,
+            rule_set,
+            dict(players),
+            initial_state,
+        )
+
+    def record_turn_started(
+        self,
+        turn_index: int,
+        player: Player,
+        observation: Observation,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._submit("record_turn_started", timestamp, turn_index, player, observation)
+
+    def record_move_submitted(
+        self,
+        turn_index: int,
+        player: Player,
+        move: Move,
+        think_time_ms: int,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._submit(
+            "record_move_submitted",
+            timestamp,
+            turn_index,
+            player,
+            move,
+            think_time_ms,
+        )
+
+    def record_move_applied(
+        self,
+        turn_index: int,
+        player: Player,
+        move: Move | None,
+        previous_state: GameState | CompactGameState,
+        new_state: GameState | CompactGameState,
+        observation: Observation,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._submit(
+            "record_move_applied",
+            timestamp,
+            turn_index,
+            player,
+            move,
+            previous_state,
+            new_state,
+            observation,
+        )
+
+    def record_match_finished(
+        self,
+        final_state: GameState | CompactGameState,
+        turn_index: int,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._submit("record_match_finished", timestamp, final_state, turn_index)
+        self._shutdown()
+
+    def close(self) -> None:
+        """等写线程处理完已入队的事件，再关闭被包装的记录器。"""
+
+        try:
+            self._shutdown()
+        finally:
+            self.inner.close()
+
+    def _submit(self, method: str, timestamp: float | None, *args: Any) -> None:
+        # 先取时间戳再入队：队列满时 put 会阻塞，事件时刻不应算上这段等待。
+        if timestamp is None:
+            timestamp = time.time()
+        self._raise_pending()
+        if self._thread is None:
+            self._thread = Thread(
+                target=self._drain, name="async-recorder", daemon=True
+            )
+            self._thread.start()
+        self._queue.put((method, args, timestamp))
+
+    def _shutdown(self) -> None:
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        self._raise_pending()
+
+    def _raise_pending(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if self._error is not None:
+                # 出错后继续清空队列，避免调用方在 put 上永远阻塞。
+                continue
+            method, args, timestamp = item
+            try:
+                getattr(self.inner, method)(*args, timestamp=timestamp)
+            except BaseException as error:
+                self._error = error
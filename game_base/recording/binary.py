@@ -0,0 +1,513 @@
+"""定长二进制对局记录，以及还原成 JSONL 事件流的转换器。
+
+文件布局：定长文件头 + 两个长度前缀的玩家 id，之后每一手一条定长记录，
+最后一条 `move_index == NO_MOVE` 的记录标记对局结束。棋盘只存两张位掩码，
+回合开始时的观察、合法动作和前后棋盘都能从相邻两条记录推出来。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO
+from uuid import UUID, uuid4
+
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    GameStatus,
+    Move,
+    PlayerColor,
+    Position,
+    RuleSet,
+    bitmasks_to_board,
+    board_to_bitmasks,
+    board_to_matrix,
+)
+from game_base.core.rules import legal_actions
+from game_base.interface.protocols import Player
+from game_base.interface.views import Observation
+from game_base.recording import events
+from game_base.recording.schema import (
+    serialize_move,
+    serialize_ruleset,
+    serialize_state,
+)
+
+MAGIC = b"FIAR"
+FORMAT_VERSION = 1
+# 结束记录的落子下标。
+NO_MOVE = 0xFFFF
+
+# magic, 版本, rows, cols, connect_n, 先手, match_id, 开局时间, 初始黑/白掩码。
+_HEADER = struct.Struct("<4sHBBBB16sdQQ")
+_NAME_LENGTH = struct.Struct("<H")
+# 落子后黑/白掩码, 落子格, 回合, 思考毫秒, 落子后状态, 执子方, 时间戳。
+_RECORD = struct.Struct("<QQHHIBBd")
+
+_STATUSES = tuple(GameStatus)
+_COLORS = (PlayerColor.BLACK, PlayerColor.WHITE)
+
+
+@dataclass(frozen=True, slots=True)
+class BinaryMatchHeader:
+    """二进制记录的文件头。"""
+
+    match_id: str
+    rule_set: RuleSet
+    started_at: float
+    black_player_id: str
+    white_player_id: str
+    initial_black: int
+    initial_white: int
+
+
+@dataclass(frozen=True, slots=True)
+class MoveRecord:
+    """一条定长记录；`cell_index` 为 None 的是对局结束记录。"""
+
+    black: int
+    white: int
+    cell_index: int | None
+    turn_index: int
+    think_time_ms: int
+    status: GameStatus
+    player: PlayerColor
+    timestamp: float
+
+
+class BinaryRecorder:
+    """与 `JsonlRecorder` 接口一致、按定长记录写入的二进制记录器。
+
+    每手只写一条 34 字节的记录，不写观察和合法动作；需要 JSONL 时用
+    `binary_to_jsonl` 还原。棋盘必须能放进 64 位掩码。
+    """
+
+    def __init__(
+        self, output_dir: str | Path, buffer_size: int = 64 * 1024, fsync: bool = False
+    ) -> None:
+        if buffer_size <= 0:
+            raise ValueError("buffer_size must be positive.")
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.match_id = uuid4().hex
+        self.events_path = self.output_dir / f"{self.match_id}.match.bin"
+        # 结束记录已经包含摘要需要的全部信息，不再单独写摘要文件。
+        self.summary_path: Path | None = None
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self._handle: BinaryIO | None = None
+        self._cols = 0
+        self._think_time_ms = 0
+
+    def __enter__(self) -> BinaryRecorder:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._handle is None
+
+    def close(self) -> None:
+        if self._handle is None:
+            return
+        try:
+            self._handle.flush()
+            if self.fsync:
+                os.fsync(self._handle.fileno())
+        finally:
+            self._handle.close()
+            self._handle = None
+
+    def record_match_started(
+        self,
+        rule_set: RuleSet,
+        players: dict[PlayerColor, Player],
+        initial_state: GameState | CompactGameState,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        if rule_set.rows * rule_set.cols > 64:
+            raise ValueError("Binary records only support boards up to 64 cells.")
+        self._cols = rule_set.cols
+        black, white = _state_bitmasks(initial_state)
+        self._handle = self.events_path.open("ab", buffering=self.buffer_size)
+        self._handle.write(
+            _HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                rule_set.rows,
+                rule_set.cols,
+                rule_set.connect_n,
+                _COLORS.index(rule_set.first_player),
+                UUID(hex=self.match_id).bytes,
+                time.time() if timestamp is None else timestamp,
+                black,
+                white,
+            )
+        )
+        for color in _COLORS:
+            name = players[color].player_id.encode("utf-8")
+            self._handle.write(_NAME_LENGTH.pack(len(name)))
+            self._handle.write(name)
+
+    def record_turn_started(
+        self,
+        turn_index: int,
+        player: Player,
+        observation: Observation,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        # 观察完全由上一条记录的棋盘决定，不必落盘。
+        return
+
+    def record_move_submitted(
+        self,
+        turn_index: int,
+        player: Player,
+        move: Move,
+        think_time_ms: int,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._think_time_ms = think_time_ms
+
+    def record_move_applied(
+        self,
+        turn_index: int,
+        player: Player,
+        move: Move | None,
+        previous_state: GameState | CompactGameState,
+        new_state: GameState | CompactGameState,
+        observation: Observation,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        if move is None:
+            raise ValueError("Applied move must not be None.")
+        self._write_record(
+            new_state,
+            move.position.row * self._cols + move.position.col,
+            turn_index,
+            self._think_time_ms,
+            player.color,
+            timestamp,
+        )
+
+    def record_match_finished(
+        self,
+        final_state: GameState | CompactGameState,
+        turn_index: int,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._write_record(
+            final_state, NO_MOVE, turn_index, 0, final_state.next_player, timestamp
+        )
+        self.close()
+
+    def _write_record(
+        self,
+        state: GameState | CompactGameState,
+        move_index: int,
+        turn_index: int,
+        think_time_ms: int,
+        player: PlayerColor,
+        timestamp: float | None,
+    ) -> None:
+        if self._handle is None:
+            raise RuntimeError("record_match_started must be called first.")
+        black, white = _state_bitmasks(state)
+        self._handle.write(
+            _RECORD.pack(
+                black,
+                white,
+                move_index,
+                turn_index,
+                think_time_ms,
+                _STATUSES.index(state.status),
+                _COLORS.index(player),
+                time.time() if timestamp is None else timestamp,
+            )
+        )
+
+
+def read_binary_match(path: str | Path) -> tuple[BinaryMatchHeader, list[MoveRecord]]:
+    """读出整盘二进制记录；单盘只有几十条记录，直接一次读完。"""
+
+    data = Path(path).read_bytes()
+    (
+        magic,
+        version,
+        rows,
+        cols,
+        connect_n,
+        first_player,
+        match_id,
+        started_at,
+        initial_black,
+        initial_white,
+    ) = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary match record.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary record version: {version}.")
+    offset = _HEADER.size
+    names: list[str] = []
+    for _ in _COLORS:
+        (length,) = _NAME_LENGTH.unpack_from(data, offset)
+        offset += _NAME_LENGTH.size
+        names.append(data[offset : offset + length].decode("utf-8"))
+        offset += length
+
+    header = BinaryMatchHeader(
+        match_id=UUID(bytes=match_id).hex,
+        rule_set=RuleSet(
+            rows=rows,
+            cols=cols,
+            connect_n=connect_n,
+            first_player=_COLORS[first_player],
+        ),
+        started_at=started_at,
+        black_player_id=names[0],
+        white_player_id=names[1],
+        initial_black=initial_black,
+        initial_white=initial_white,
+    )
+    # 写到一半中断的文件末尾可能有残缺记录，只解析完整的部分。
+    end = len(data) - (len(data) - offset) % _RECORD.size
+    records = [
+        MoveRecord(
+            black=black,
+            white=white,
+            cell_index=None if move_index == NO_MOVE else move_index,
+            turn_index=turn_index,
+            think_time_ms=think_time_ms,
+            status=_STATUSES[status],
+            player=_COLORS[player],
+            timestamp=timestamp,
+        )
+        for (
+            black,
+            white,
+            move_index,
+            turn_index,
+            think_time_ms,
+            status,
+            player,
+            timestamp,
+        ) in _RECORD.iter_unpack(data[offset:end])
+    ]
+    return header, records
+
+
+def binary_to_events(path: str | Path) -> Iterator[dict[str, object]]:
+    """按 `JsonlRecorder` 的事件结构重新生成整盘事件。
+
+    回合开始、提交和应用三条事件共用同一条记录的时间戳；被引擎接受的动作
+    就是提交的动作，所以 `proposed_move` 与 `accepted_move` 相同。
+    """
+
+    header, records = read_binary_match(path)
+    return _regenerate_events(header, records)
+
+
+def _regenerate_events(
+    header: BinaryMatchHeader, records: list[MoveRecord]
+) -> Iterator[dict[str, object]]:
+    rule_set = header.rule_set
+    player_ids = {
+        PlayerColor.BLACK: header.black_player_id,
+        PlayerColor.WHITE: header.white_player_id,
+    }
+    event_index = 0
+
+    def event(
+        event_type: str,
+        payload: dict[str, object],
+        timestamp: float,
+        turn_index: int,
+        player: PlayerColor | None = None,
+    ) -> dict[str, object]:
+        nonlocal event_index
+        base: dict[str, object] = {
+            "event_id": event_index,
+            "event_type": event_type,
+            "match_id": header.match_id,
+            "timestamp": _isoformat(timestamp),
+            "turn_index": turn_index,
+            "player_id": player_ids[player] if player is not None else None,
+            "player_color": player.value if player is not None else None,
+        }
+        base.update(payload)
+        event_index += 1
+        return base
+
+    state = CompactGameState(
+        black=header.initial_black,
+        white=header.initial_white,
+        rows=rule_set.rows,
+        cols=rule_set.cols,
+        next_player=rule_set.first_player,
+        move_count=(header.initial_black | header.initial_white).bit_count(),
+    )
+    yield event(
+        events.MATCH_STARTED,
+        {
+            "ruleset": serialize_ruleset(rule_set),
+            "players": {
+                color.value: {"player_id": player_ids[color], "color": color.value}
+                for color in _COLORS
+            },
+            "initial_state": serialize_state(state),
+        },
+        header.started_at,
+        0,
+    )
+
+    for record in records:
+        if record.cell_index is None:
+            snapshot = serialize_state(state)
+            yield event(
+                events.MATCH_FINISHED,
+                {
+                    "result": state.status.value,
+                    "winner": snapshot["winner"],
+                    "total_moves": state.move_count,
+                    "final_state": snapshot,
+                },
+                record.timestamp,
+                record.turn_index,
+            )
+            return
+
+        move = Move(
+            player=record.player,
+            position=Position(
+                row=record.cell_index // rule_set.cols,
+                col=record.cell_index % rule_set.cols,
+            ),
+        )
+        legal = [serialize_move(action) for action in legal_actions(state, rule_set)]
+        yield event(
+            events.TURN_STARTED,
+            {
+                "observation": {
+                    "move_count": state.move_count,
+                    "legal_actions": legal,
+                    "last_move": serialize_move(state.last_move),
+                    "status": state.status.value,
+                }
+            },
+            record.timestamp,
+            record.turn_index,
+            record.player,
+        )
+        yield event(
+            events.MOVE_SUBMITTED,
+            {
+                "proposed_move": serialize_move(move),
+                "think_time_ms": record.think_time_ms,
+            },
+            record.timestamp,
+            record.turn_index,
+            record.player,
+        )
+        next_state = CompactGameState(
+            black=record.black,
+            white=record.white,
+            rows=rule_set.rows,
+            cols=rule_set.cols,
+            next_player=record.player.other(),
+            move_count=state.move_count + 1,
+            status=record.status,
+            winner=_winner(record.status),
+            last_move=move,
+        )
+        yield event(
+            events.MOVE_APPLIED,
+            {
+                "accepted_move": serialize_move(move),
+                "board_before": serialize_state(state)["board_matrix"],
+                "board_after": serialize_state(next_state)["board_matrix"],
+                "legal_actions_before": legal,
+                "status_after": record.status.value,
+                "winner": (
+                    next_state.winner.value if next_state.winner is not None else None
+                ),
+            },
+            record.timestamp,
+            record.turn_index,
+            record.player,
+        )
+        state = next_state
+
+
+def binary_to_jsonl(path: str | Path, output_dir: str | Path) -> tuple[Path, Path]:
+    """把一盘二进制记录转换成 `JsonlRecorder` 同款的事件流和摘要文件。"""
+
+    header, records = read_binary_match(path)
+    if not records or records[-1].cell_index is not None:
+        raise ValueError(f"{path} does not contain a finished match.")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    events_path = output_dir / f"{header.match_id}.events.jsonl"
+    summary_path = output_dir / f"{header.match_id}.summary.json"
+    with events_path.open("w", encoding="utf-8") as handle:
+        for event in _regenerate_events(header, records):
+            handle.write(json.dumps(event, ensure_ascii=True) + "\n")
+
+    final = records[-1]
+    status = final.status
+    winner = _winner(status)
+    summary = {
+        "match_id": header.match_id,
+        "started_at": _isoformat(header.started_at),
+        "ended_at": _isoformat(final.timestamp),
+        "winner": winner.value if winner is not None else None,
+        "result": status.value,
+        "total_moves": (final.black | final.white).bit_count(),
+        "final_board": board_to_matrix(
+            bitmasks_to_board(
+                final.black, final.white, header.rule_set.rows, header.rule_set.cols
+            )
+        ),
+        "event_log_path": str(events_path),
+    }
+    summary_path.write_text(
+        json.dumps(summary, ensure_ascii=True, indent=2), encoding="utf-8"
+    )
+    return events_path, summary_path
+
+
+def _state_bitmasks(state: GameState | CompactGameState) -> tuple[int, int]:
+    if isinstance(state, CompactGameState):
+        return state.black, state.white
+    return board_to_bitmasks(state.board)
+
+
+def _winner(status: GameStatus) -> PlayerColor | None:
+    if status is GameStatus.BLACK_WIN:
+        return PlayerColor.BLACK
+    if status is GameStatus.WHITE_WIN:
+        return PlayerColor.WHITE
+    return None
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, UTC).isoformat()
@@ -0,0 +1,217 @@
+"""把对局日志导出成按列存放的 `.npy` 数组，供拟合代码零解析地内存映射。
+
+每一行是一手落子，列为：
+
+    match_index    int32   指向 match_ids.npy 的下标
+    turn_index     int32
+    player         int8    0 = 黑, 1 = 白
+    black, white   uint64  落子前的两张位掩码（位编号 row * cols + col）
+    move           int8    落子格下标
+    think_time_ms  int32   缺失时为 -1
+    outcome        int8    整盘结果在 GameStatus 里的序号，未结束为 -1
+
+各日志文件（分片库按分片）在进程池里并行转换成临时分块，主进程再用
+`open_memmap` 逐块拼接成最终列文件，内存占用与总行数无关。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from game_base.core.models import GameStatus, PlayerColor
+from game_base.optional import require_numpy
+from game_base.recording.reader import (
+    LoggedMatch,
+    iter_log_files,
+    iter_matches,
+    iter_store_matches,
+)
+from game_base.recording.store import INDEX_DIR, IndexEntry, MatchLogStore
+
+if TYPE_CHECKING:
+    import numpy as np
+
+COLUMNS: dict[str, str] = {
+    "match_index": "int32",
+    "turn_index": "int32",
+    "player": "int8",
+    "black": "uint64",
+    "white": "uint64",
+    "move": "int8",
+    "think_time_ms": "int32",
+    "outcome": "int8",
+}
+MATCH_IDS_FILE = "match_ids.npy"
+MANIFEST_FILE = "manifest.json"
+
+_STATUSES = tuple(GameStatus)
+# 一个导出单元：单个日志文件，或分片库里的一个分片 (库目录, 该分片的索引项)。
+_Unit = Path | tuple[Path, tuple[IndexEntry, ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnarExport:
+    """一次导出的结果概要。"""
+
+    output_dir: Path
+    rows: int
+    matches: int
+
+
+def export_columnar(
+    sources: Iterable[str | Path],
+    output_dir: str | Path,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+) -> ColumnarExport:
+    """把若干日志文件、目录或分片库导出到 `output_dir`，按文件并行转换。"""
+
+    np = require_numpy("Columnar export")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    parts_dir = output_dir / "_parts"
+    units = list(_export_units(sources))
+    jobs = [(unit, parts_dir / f"{index:06d}") for index, unit in enumerate(units)]
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            counts = list(pool.map(_convert_unit, jobs))
+    else:
+        counts = list(executor.map(_convert_unit, jobs))
+
+    total_rows = sum(rows for rows, _ in counts)
+    total_matches = sum(matches for _, matches in counts)
+    columns = {
+        name: np.lib.format.open_memmap(
+            output_dir / f"{name}.npy", mode="w+", dtype=dtype, shape=(total_rows,)
+        )
+        for name, dtype in COLUMNS.items()
+    }
+    match_ids: list[Any] = []
+    row_offset = 0
+    match_offset = 0
+    for (_, part_dir), (rows, matches) in zip(jobs, counts):
+        for name, column in columns.items():
+            part = np.load(part_dir / f"{name}.npy")
+            if name == "match_index":
+                # 分块里的对局下标从 0 开始，拼接时平移到全局编号。
+                part = part + np.int32(match_offset)
+            column[row_offset : row_offset + rows] = part
+        match_ids.append(np.load(part_dir / MATCH_IDS_FILE))
+        row_offset += rows
+        match_offset += matches
+    for column in columns.values():
+        column.flush()
+    del columns
+    np.save(
+        output_dir / MATCH_IDS_FILE,
+        np.concatenate(match_ids) if match_ids else np.array([], dtype="<U32"),
+    )
+    (output_dir / MANIFEST_FILE).write_text(
+        json.dumps(
+            {"rows": total_rows, "matches": total_matches, "columns": COLUMNS},
+            ensure_ascii=True,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    return ColumnarExport(output_dir=output_dir, rows=total_rows, matches=total_matches)
+
+
+def load_columnar(directory: str | Path, mmap: bool = True) -> dict[str, np.ndarray]:
+    """读回导出的各列；默认以只读内存映射打开，不把数据读进内存。"""
+
+    np = require_numpy("Columnar export")
+    directory = Path(directory)
+    mode = "r" if mmap else None
+    columns = {
+        name: np.load(directory / f"{name}.npy", mmap_mode=mode) for name in COLUMNS
+    }
+    columns["match_ids"] = np.load(directory / MATCH_IDS_FILE)
+    return columns
+
+
+def _export_units(sources: Iterable[str | Path]) -> Iterator[_Unit]:
+    for source in sources:
+        path = Path(source)
+        if path.is_dir() and (path / INDEX_DIR).is_dir():
+            # 只读一遍索引并按分片分组；工作进程拿到索引项后按偏移顺序读分片。
+            by_shard: dict[str, list[IndexEntry]] = {}
+            for entry in MatchLogStore(path).iter_index():
+                by_shard.setdefault(entry.shard, []).append(entry)
+            for shard in sorted(by_shard):
+                entries = sorted(by_shard[shard], key=lambda entry: entry.offset)
+                yield (path, tuple(entries))
+        else:
+            yield from iter_log_files(path)
+
+
+def _unit_matches(unit: _Unit) -> Iterator[LoggedMatch]:
+    if isinstance(unit, Path):
+        return iter_matches(unit)
+    root, entries = unit
+    return iter_store_matches(MatchLogStore(root), entries=entries)
+
+
+def _convert_unit(job: tuple[_Unit, Path]) -> tuple[int, int]:
+    # 工作进程里把一个单元转换成分块列文件，只把行数和对局数传回主进程。
+    np = require_numpy("Columnar export")
+    unit, part_dir = job
+    values: dict[str, list[int]] = {name: [] for name in COLUMNS}
+    match_ids: list[str] = []
+    for match in _unit_matches(unit):
+        if match.rule_set.rows * match.rule_set.cols > 64:
+            raise ValueError("Columnar export only supports boards up to 64 cells.")
+        match_index = len(match_ids)
+        match_ids.append(match.match_id)
+        outcome = _STATUSES.index(match.result) if match.result is not None else -1
+        cols = match.rule_set.cols
+        black = 0
+        white = 0
+        for turn_index, logged in enumerate(match.moves):
+            cell = logged.move.position.row * cols + logged.move.position.col
+            is_white = logged.move.player is PlayerColor.WHITE
+            values["match_index"].append(match_index)
+            values["turn_index"].append(turn_index)
+            values["player"].append(int(is_white))
+            values["black"].append(black)
+            values["white"].append(white)
+            values["move"].append(cell)
+            values["think_time_ms"].append(
+                logged.think_time_ms if logged.think_time_ms is not None else -1
+            )
+            values["outcome"].append(outcome)
+            if is_white:
+                white |= 1 << cell
+            else:
+                black |= 1 << cell
+
+    part_dir.mkdir(parents=True, exist_ok=True)
+    for name, dtype in COLUMNS.items():
+        np.save(part_dir / f"{name}.npy", np.array(values[name], dtype=dtype))
+    np.save(part_dir / MATCH_IDS_FILE, np.array(match_ids, dtype="<U32"))
+    return len(values["move"]), len(match_ids)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Export match logs into memory-mappable .npy columns."
+    )
+    parser.add_argument("sources", nargs="+", help="log files, directories or stores")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    result = export_columnar(args.sources, args.output, max_workers=args.workers)
+    print(f"Exported {result.rows} moves from {result.matches} matches.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""记录器协议：调度层只依赖这组方法，不关心落盘格式。"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Protocol
+
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    Move,
+    PlayerColor,
+    RuleSet,
+)
+from game_base.interface.protocols import Player
+from game_base.interface.views import Observation
+
+
+class Recorder(Protocol):
+    """`run_match` 在对局各阶段调用的记录接口。
+
+    每个 `record_*` 都接受可选的 `timestamp`（Unix 秒），表示事件实际发生的
+    时刻；缺省时由记录器取调用时刻。异步包装器靠它把入队时刻传给写线程。
+    """
+
+    @property
+    def events_path(self) -> Path:
+        """事件流所在的文件。"""
+
+    @property
+    def summary_path(self) -> Path | None:
+        """摘要文件；格式本身已包含摘要信息时为 None。"""
+
+    def record_match_started(
+        self,
+        rule_set: RuleSet,
+        players: dict[PlayerColor, Player],
+        initial_state: GameState | CompactGameState,
+        *,
+        timestamp: float | None = None,
+    ) -> None: ...
+
+    def record_turn_started(
+        self,
+        turn_index: int,
+        player: Player,
+        observation: Observation,
+        *,
+        timestamp: float | None = None,
+    ) -> None: ...
+
+    def record_move_submitted(
+        self,
+        turn_index: int,
+        player: Player,
+        move: Move,
+        think_time_ms: int,
+        *,
+        timestamp: float | None = None,
+    ) -> None: ...
+
+    def record_move_applied(
+        self,
+        turn_index: int,
+        player: Player,
+        move: Move | None,
+        previous_state: GameState | CompactGameState,
+        new_state: GameState | CompactGameState,
+        observation: Observation,
+        *,
+        timestamp: float | None = None,
+    ) -> None: ...
+
+    def record_match_finished(
+        self,
+        final_state: GameState | CompactGameState,
+        turn_index: int,
+        *,
+        timestamp: float | None = None,
+    ) -> None: ...
+
+    def close(self) -> None:
+        """释放文件句柄；重复调用应当是安全的。"""
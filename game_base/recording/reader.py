@@ -0,0 +1,343 @@
+"""对局日志的流式读取：逐行产出事件、按对局重放状态、生成训练样本。
+
+数据源可以是单个事件文件（`.events.jsonl` 或 `.match.bin`）、放着这些文件的
+目录，或者 `MatchLogStore` 分片库。所有接口都是生成器，任何时刻只在内存里
+保留一盘对局。
+
+`JsonlRecorder` 写出的每一行字段顺序固定，重放只需要少数几个字段；因此先用
+子串判断事件类型，再用正则直接取出需要的字段，跳过对整行（尤其是两份棋盘
+矩阵）的 `json.loads`。正则匹配不上时回退到完整解析。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Collection, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    GameStatus,
+    Move,
+    PlayerColor,
+    Position,
+    RuleSet,
+)
+from game_base.core.rules import apply_move, new_compact_game, new_game
+from game_base.recording import events
+from game_base.recording.binary import binary_to_events, read_binary_match
+from game_base.recording.store import INDEX_DIR, IndexEntry, MatchLogStore
+
+EVENTS_SUFFIX = ".events.jsonl"
+BINARY_SUFFIX = ".match.bin"
+
+LogSource = str | Path | MatchLogStore
+
+_EVENT_TYPE = re.compile(r'"event_type": "([a-z_]+)"')
+_PLAYER_ID = re.compile(r'"player_id": (?:"((?:[^"\\]|\\.)*)"|null)')
+_THINK_TIME = re.compile(r'"think_time_ms": (\d+)')
+_ACCEPTED_MOVE = re.compile(
+    r'"accepted_move": \{"player": "([BW])", '
+    r'"position": \{"row": (\d+), "col": (\d+)\}\}'
+)
+
+
+@dataclass(frozen=True, slots=True)
+class LoggedMove:
+    """一手被引擎接受的落子及其思考时长。"""
+
+    move: Move
+    player_id: str | None
+    think_time_ms: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class LoggedMatch:
+    """按对局聚合后的最小信息：规则、双方 id、落子序列和结果。"""
+
+    match_id: str
+    rule_set: RuleSet
+    player_ids: dict[PlayerColor, str]
+    moves: tuple[LoggedMove, ...]
+    result: GameStatus | None
+
+
+@dataclass(frozen=True, slots=True)
+class TrainingTuple:
+    """落子前的状态、玩家实际下的那一手，以及当时的思考时长。"""
+
+    state: GameState | CompactGameState
+    move: Move
+    think_time_ms: int | None
+    match_id: str
+    player_id: str | None
+
+
+def iter_log_files(source: str | Path) -> Iterator[Path]:
+    """列出目录里的事件文件；单个文件原样返回。"""
+
+    path = Path(source)
+    if path.is_file():
+        yield path
+        return
+    for candidate in sorted(path.iterdir()):
+        if candidate.name.endswith((EVENTS_SUFFIX, BINARY_SUFFIX)):
+            yield candidate
+
+
+def iter_event_lines(
+    source: LogSource, event_types: Collection[str] | None = None
+) -> Iterator[str]:
+    """逐行产出原始事件文本；只按子串预筛事件类型，不做 JSON 解析。"""
+
+    needles = (
+        tuple(f'"event_type": "{event_type}"' for event_type in event_types)
+        if event_types is not None
+        else None
+    )
+    for line in _iter_raw_lines(source):
+        if needles is None or any(needle in line for needle in needles):
+            yield line
+
+
+def iter_events(
+    source: LogSource, event_types: Collection[str] | None = None
+) -> Iterator[dict[str, object]]:
+    """逐条产出完整解析后的事件字典，常量内存。"""
+
+    for line in iter_event_lines(source, event_types):
+        yield json.loads(line)
+
+
+def iter_matches(source: LogSource) -> Iterator[LoggedMatch]:
+    """按对局聚合事件，只解析重放需要的字段。"""
+
+    if isinstance(source, MatchLogStore):
+        yield from iter_store_matches(source)
+        return
+
+    path = Path(source)
+    if path.is_dir() and (path / INDEX_DIR).is_dir():
+        yield from iter_matches(MatchLogStore(path))
+        return
+    for file_path in iter_log_files(path):
+        if file_path.name.endswith(BINARY_SUFFIX):
+            yield _match_from_binary(file_path)
+        else:
+            with file_path.open(encoding="utf-8") as handle:
+                yield from _matches_from_lines(handle)
+
+
+def iter_store_matches(
+    store: MatchLogStore,
+    shard: str | None = None,
+    entries: Iterable[IndexEntry] | None = None,
+) -> Iterator[LoggedMatch]:
+    """按索引顺序读出分片库里的对局；给出 `shard` 时只读这一个分片。
+
+    给出 `entries` 时不再读索引，只按顺序读这些对局（调用方已经分好组）。
+    """
+
+    if entries is None:
+        entries = (
+            entry
+            for entry in store.iter_index()
+            if shard is None or entry.shard == shard
+        )
+    for _, blob in store.iter_match_bytes(entries):
+        yield from _matches_from_lines(blob.decode("utf-8").splitlines())
+
+
+def replay_match(
+    match: LoggedMatch, compact_state: bool = True
+) -> Iterator[tuple[GameState | CompactGameState, LoggedMove]]:
+    """经规则层重放一盘对局，逐手产出 (落子前的状态, 这一手)。"""
+
+    state: GameState | CompactGameState = (
+        new_compact_game(match.rule_set) if compact_state else new_game(match.rule_set)
+    )
+    for logged in match.moves:
+        yield state, logged
+        state = apply_move(state, logged.move, match.rule_set)
+
+
+def iter_training_tuples(
+    source: LogSource,
+    player_id: str | None = None,
+    color: PlayerColor | None = None,
+    min_move_count: int = 0,
+    max_move_count: int | None = None,
+    max_think_time_ms: int | None = None,
+    results: Collection[GameStatus] | None = None,
+    compact_state: bool = True,
+) -> Iterator[TrainingTuple]:
+    """产出 (state, move, think_time_ms) 样本，并按玩家、颜色、手数等过滤。"""
+
+    for match in iter_matches(source):
+        if results is not None and match.result not in results:
+            continue
+        if player_id is not None and player_id not in match.player_ids.values():
+            continue
+        for state, logged in replay_match(match, compact_state):
+            if state.move_count < min_move_count:
+                continue
+            if max_move_count is not None and state.move_count > max_move_count:
+                break
+            if player_id is not None and logged.player_id != player_id:
+                continue
+            if color is not None and logged.move.player is not color:
+                continue
+            if (
+                max_think_time_ms is not None
+                and logged.think_time_ms is not None
+                and logged.think_time_ms > max_think_time_ms
+            ):
+                continue
+            yield TrainingTuple(
+                state=state,
+                move=logged.move,
+                think_time_ms=logged.think_time_ms,
+                match_id=match.match_id,
+                player_id=logged.player_id,
+            )
+
+
+def _iter_raw_lines(source: LogSource) -> Iterator[str]:
+    if isinstance(source, MatchLogStore):
+        for _, blob in source.iter_match_bytes(source.iter_index()):
+            yield from blob.decode("utf-8").splitlines()
+        return
+
+    path = Path(source)
+    if path.is_dir() and (path / INDEX_DIR).is_dir():
+        yield from _iter_raw_lines(MatchLogStore(path))
+        return
+    for file_path in iter_log_files(path):
+        if file_path.name.endswith(BINARY_SUFFIX):
+            for event in binary_to_events(file_path):
+                yield json.dumps(event, ensure_ascii=True)
+            continue
+        with file_path.open(encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield line.rstrip("\n")
+
+
+def _matches_from_lines(lines: Iterable[str]) -> Iterator[LoggedMatch]:
+    match_id: str | None = None
+    rule_set = RuleSet()
+    player_ids: dict[PlayerColor, str] = {}
+    moves: list[LoggedMove] = []
+    think_time_ms: int | None = None
+    result: GameStatus | None = None
+
+    def build() -> LoggedMatch:
+        return LoggedMatch(
+            match_id=match_id or "",
+            rule_set=rule_set,
+            player_ids=dict(player_ids),
+            moves=tuple(moves),
+            result=result,
+        )
+
+    for line in lines:
+        found = _EVENT_TYPE.search(line)
+        if found is None:
+            continue
+        event_type = found.group(1)
+        if event_type == events.TURN_STARTED:
+            continue
+        if event_type == events.MATCH_STARTED:
+            if match_id is not None:
+                yield build()
+            event = json.loads(line)
+            match_id = str(event["match_id"])
+            rule_set = _rule_set_from_dict(event["ruleset"])
+            player_ids = {
+                PlayerColor(color): str(info["player_id"])
+                for color, info in event["players"].items()
+            }
+            moves = []
+            think_time_ms = None
+            result = None
+        elif event_type == events.MOVE_SUBMITTED:
+            think = _THINK_TIME.search(line)
+            think_time_ms = int(think.group(1)) if think is not None else None
+        elif event_type == events.MOVE_APPLIED:
+            moves.append(_logged_move(line, think_time_ms))
+            think_time_ms = None
+        elif event_type == events.MATCH_FINISHED:
+            result = GameStatus(json.loads(line)["result"])
+            yield build()
+            match_id = None
+    if match_id is not None:
+        # 没有结束事件的半盘记录也照样产出，result 保持 None。
+        yield build()
+
+
+def _logged_move(line: str, think_time_ms: int | None) -> LoggedMove:
+    accepted = _ACCEPTED_MOVE.search(line)
+    player = _PLAYER_ID.search(line)
+    if accepted is None or player is None:
+        event = json.loads(line)
+        move_data = event["accepted_move"]
+        move = Move(
+            player=PlayerColor(move_data["player"]),
+            position=Position(
+                row=move_data["position"]["row"], col=move_data["position"]["col"]
+            ),
+        )
+        return LoggedMove(
+            move=move, player_id=event.get("player_id"), think_time_ms=think_time_ms
+        )
+    return LoggedMove(
+        move=Move(
+            player=PlayerColor(accepted.group(1)),
+            position=Position(row=int(accepted.group(2)), col=int(accepted.group(3))),
+        ),
+        player_id=json.loads(f'"{player.group(1)}"') if player.group(1) else None,
+        think_time_ms=think_time_ms,
+    )
+
+
+def _match_from_binary(path: Path) -> LoggedMatch:
+    header, records = read_binary_match(path)
+    player_ids = {
+        PlayerColor.BLACK: header.black_player_id,
+        PlayerColor.WHITE: header.white_player_id,
+    }
+    cols = header.rule_set.cols
+    moves = tuple(
+        LoggedMove(
+            move=Move(
+                player=record.player,
+                position=Position(
+                    row=record.cell_index // cols, col=record.cell_index % cols
+                ),
+            ),
+            player_id=player_ids[record.player],
+            think_time_ms=record.think_time_ms,
+        )
+        for record in records
+        if record.cell_index is not None
+    )
+    finished = bool(records) and records[-1].cell_index is None
+    return LoggedMatch(
+        match_id=header.match_id,
+        rule_set=header.rule_set,
+        player_ids=player_ids,
+        moves=moves,
+        result=records[-1].status if finished else None,
+    )
+
+
+def _rule_set_from_dict(data: dict[str, object]) -> RuleSet:
+    return RuleSet(
+        rows=int(data["rows"]),
+        cols=int(data["cols"]),
+        connect_n=int(data["connect_n"]),
+        first_player=PlayerColor(data["first_player"]),
+    )
@@ -3,11 +3,22 @@
 from __future__ import annotations
 
 import json
+import os
+from abc import ABC, abstractmethod
 from datetime import UTC, datetime
+from enum import StrEnum
 from pathlib import Path
+from types import TracebackType
+from typing import IO, Self
 from uuid import uuid4
 
-from game_base.core.models import GameState, Move, PlayerColor, RuleSet
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    Move,
+    PlayerColor,
+    RuleSet,
+)
 from game_base.interface.protocols import Player
 from game_base.interface.views import Observation
 from game_base.recording import events
@@ -18,28 +29,56 @@ from game_base.recording.schema import (
 )
 
 
-class JsonlRecorder:
-    """追加写入事件流，并在结束时输出一份摘要。"""
+class FlushPolicy(StrEnum):
+    """事件流从写缓冲刷到文件的时机。"""
 
-    def __init__(self, output_dir: str | Path) -> None:
-        # 每盘对局生成独立文件，便于后续批量分析和回放。
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+    EVENT = "event"
+    TURN = "turn"
+    MATCH = "match"
+
+
+class JsonEventRecorder(ABC):
+    """按 JSONL 事件结构组装每条事件，落盘方式由子类决定。
+
+    子类实现 `_write_line`（写一行事件）和 `_finish`（对局结束时收尾），
+    以及 `flush()`、`close()`，并提供 `events_path`、`summary_path`；缺了
+    任何一个抽象方法，子类在实例化时就会报错，而不是下到一半才失败。
+    """
+
+    def __init__(self, flush_policy: FlushPolicy = FlushPolicy.TURN) -> None:
         self.match_id = uuid4().hex
-        self.events_path = self.output_dir / f"{self.match_id}.events.jsonl"
-        self.summary_path = self.output_dir / f"{self.match_id}.summary.json"
+        self.flush_policy = FlushPolicy(flush_policy)
         self._event_index = 0
         self._started_at: str | None = None
 
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @abstractmethod
+    def flush(self) -> None: ...
+
+    @abstractmethod
+    def close(self) -> None: ...
+
     def record_match_started(
         self,
         rule_set: RuleSet,
         players: dict[PlayerColor, Player],
-        initial_state: GameState,
+        initial_state: GameState | CompactGameState,
+        *,
+        timestamp: float | None = None,
     ) -> None:
         # 开局事件记录规则、玩家信息和初始棋盘。
-        timestamp = _timestamp()
-        self._started_at = timestamp
+        started_at = _timestamp(timestamp)
+        self._started_at = started_at
         self._emit(
             events.MATCH_STARTED,
             {
@@ -53,7 +92,7 @@ class JsonlRecorder:
                 },
                 "initial_state": serialize_state(initial_state),
             },
-            timestamp=timestamp,
+            timestamp=started_at,
             turn_index=0,
         )
 
@@ -62,6 +101,8 @@ class JsonlRecorder:
         turn_index: int,
         player: Player,
         observation: Observation,
+        *,
+        timestamp: float | None = None,
     ) -> None:
         # 回合开始时记录观察信息，方便分析当时的可选动作空间。
         self._emit(
@@ -76,6 +117,7 @@ class JsonlRecorder:
                     "status": observation.status.value,
                 }
             },
+            timestamp=_timestamp(timestamp),
             turn_index=turn_index,
             player=player,
         )
@@ -86,6 +128,8 @@ class JsonlRecorder:
         player: Player,
         move: Move,
         think_time_ms: int,
+        *,
+        timestamp: float | None = None,
     ) -> None:
         # 先记录“玩家提交了什么”，再记录“引擎实际接受了什么”。
         self._emit(
@@ -94,6 +138,7 @@ class JsonlRecorder:
                 "proposed_move": serialize_move(move),
                 "think_time_ms": think_time_ms,
             },
+            timestamp=_timestamp(timestamp),
             turn_index=turn_index,
             player=player,
         )
@@ -103,9 +148,11 @@ class JsonlRecorder:
         turn_index: int,
         player: Player,
         move: Move | None,
-        previous_state: GameState,
-        new_state: GameState,
+        previous_state: GameState | CompactGameState,
+        new_state: GameState | CompactGameState,
         observation: Observation,
+        *,
+        timestamp: float | None = None,
     ) -> None:
         self._emit(
             events.MOVE_APPLIED,
@@ -118,26 +165,36 @@ class JsonlRecorder:
                     serialize_move(action) for action in observation.legal_actions
                 ],
                 "status_after": new_state.status.value,
-                "winner": new_state.winner.value
-                if new_state.winner is not None
-                else None,
+                "winner": (
+                    new_state.winner.value if new_state.winner is not None else None
+                ),
             },
+            timestamp=_timestamp(timestamp),
             turn_index=turn_index,
             player=player,
         )
+        if self.flush_policy is FlushPolicy.TURN:
+            self.flush()
 
-    def record_match_finished(self, final_state: GameState, turn_index: int) -> None:
+    def record_match_finished(
+        self,
+        final_state: GameState | CompactGameState,
+        turn_index: int,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
         # 结束时同时写事件流终点和摘要文件，兼顾完整性与检索效率。
-        finished_at = _timestamp()
+        finished_at = _timestamp(timestamp)
+        final_snapshot = serialize_state(final_state)
         self._emit(
             events.MATCH_FINISHED,
             {
                 "result": final_state.status.value,
-                "winner": final_state.winner.value
-                if final_state.winner is not None
-                else None,
+                "winner": (
+                    final_state.winner.value if final_state.winner is not None else None
+                ),
                 "total_moves": final_state.move_count,
-                "final_state": serialize_state(final_state),
+                "final_state": final_snapshot,
             },
             timestamp=finished_at,
             turn_index=turn_index,
@@ -146,17 +203,14 @@ class JsonlRecorder:
             "match_id": self.match_id,
             "started_at": self._started_at,
             "ended_at": finished_at,
-            "winner": final_state.winner.value
-            if final_state.winner is not None
-            else None,
+            "winner": (
+                final_state.winner.value if final_state.winner is not None else None
+            ),
             "result": final_state.status.value,
             "total_moves": final_state.move_count,
-            "final_board": serialize_state(final_state)["board_matrix"],
-            "event_log_path": str(self.events_path),
+            "final_board": final_snapshot["board_matrix"],
         }
-        self.summary_path.write_text(
-            json.dumps(summary, ensure_ascii=True, indent=2), encoding="utf-8"
-        )
+        self._finish(summary)
 
     def _emit(
         self,
@@ -179,13 +233,83 @@ class JsonlRecorder:
         }
         event.update(payload)
         # JSONL 适合流式追加，也很方便直接喂给 pandas、DuckDB 等工具。
-        self.events_path.parent.mkdir(parents=True, exist_ok=True)
-        with self.events_path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(event, ensure_ascii=True))
-            handle.write("\n")
+        self._write_line(json.dumps(event, ensure_ascii=True) + "\n")
         self._event_index += 1
+        if self.flush_policy is FlushPolicy.EVENT:
+            self.flush()
+
+    @abstractmethod
+    def _write_line(self, line: str) -> None: ...
+
+    @abstractmethod
+    def _finish(self, summary: dict[str, object]) -> None: ...
+
+
+class JsonlRecorder(JsonEventRecorder):
+    """追加写入事件流，并在结束时输出一份摘要。
+
+    整盘对局只打开一次事件文件，写入先进入 `buffer_size` 字节的缓冲，按
+    `flush_policy` 刷出；`fsync=True` 时每次刷出后再落盘。对局结束时自动
+    关闭，也可以用 `close()` 或 `with` 语句提前释放。
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        buffer_size: int = 64 * 1024,
+        flush_policy: FlushPolicy = FlushPolicy.TURN,
+        fsync: bool = False,
+    ) -> None:
+        if buffer_size <= 0:
+            raise ValueError("buffer_size must be positive.")
+        super().__init__(flush_policy)
+        # 每盘对局生成独立文件，便于后续批量分析和回放。
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.events_path = self.output_dir / f"{self.match_id}.events.jsonl"
+        self.summary_path = self.output_dir / f"{self.match_id}.summary.json"
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self._handle: IO[str] | None = None
+
+    @property
+    def closed(self) -> bool:
+        return self._handle is None
+
+    def flush(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        # 重复调用是安全的；之后再有事件会重新以追加方式打开文件。
+        if self._handle is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._handle.close()
+            self._handle = None
+
+    def _write_line(self, line: str) -> None:
+        if self._handle is None:
+            self._handle = self.events_path.open(
+                "a", encoding="utf-8", buffering=self.buffer_size
+            )
+        self._handle.write(line)
+
+    def _finish(self, summary: dict[str, object]) -> None:
+        summary["event_log_path"] = str(self.events_path)
+        self.close()
+        self.summary_path.write_text(
+            json.dumps(summary, ensure_ascii=True, indent=2), encoding="utf-8"
+        )
 
 
-def _timestamp() -> str:
+def _timestamp(at: float | None = None) -> str:
     # 统一使用 UTC 时间，避免后续跨时区分析时混乱。
-    return datetime.now(UTC).isoformat()
+    if at is None:
+        return datetime.now(UTC).isoformat()
+    return datetime.fromtimestamp(at, UTC).isoformat()
@@ -2,7 +2,13 @@
 
 from __future__ import annotations
 
-from game_base.core.models import GameState, Move, RuleSet, board_to_matrix
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    Move,
+    RuleSet,
+    board_to_matrix,
+)
 
 
 def serialize_move(move: Move | None) -> dict[str, object] | None:
@@ -22,7 +28,7 @@ def serialize_ruleset(rule_set: RuleSet) -> dict[str, object]:
     }
 
 
-def serialize_state(state: GameState) -> dict[str, object]:
+def serialize_state(state: GameState | CompactGameState) -> dict[str, object]:
     # 状态导出保持扁平结构，便于落盘、前端读取和后续分析。
     return {
         "board_matrix": board_to_matrix(state.board),
@@ -0,0 +1,331 @@
+"""分片日志库：把大量对局追加进少量轮转的分片文件，并维护一份紧凑索引。
+
+目录结构：
+    <root>/shards/<writer>-<序号>.jsonl   多盘对局的 JSONL 事件首尾相接
+    <root>/index/<writer>.jsonl           每盘一行：所在分片、偏移、长度和摘要字段
+
+每个写入者（通常是一个进程）只写自己名下的分片和索引，互不加锁即可并发。
+一盘对局的事件先完整写进分片并刷出，之后才追加索引行，因此索引里出现的
+对局一定可以完整读出。中途出错的对局也会写入，索引里 `result` 为空。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+from types import TracebackType
+from typing import IO, BinaryIO
+from uuid import uuid4
+
+from game_base.core.models import (
+    CompactGameState,
+    GameState,
+    Move,
+    PlayerColor,
+    RuleSet,
+)
+from game_base.interface.protocols import Player
+from game_base.interface.views import Observation
+from game_base.recording.recorder import FlushPolicy, JsonEventRecorder
+
+SHARD_DIR = "shards"
+INDEX_DIR = "index"
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    """索引里的一盘对局，按它可以直接 seek 到分片里的事件。"""
+
+    match_id: str
+    shard: str
+    offset: int
+    length: int
+    winner: str | None
+    result: str | None
+    total_moves: int
+    black_player_id: str | None
+    white_player_id: str | None
+    started_at: str | None
+    ended_at: str | None
+
+
+class MatchLogStore:
+    """按写入者分片的多对局日志库，同时负责写入和查询。
+
+    分片超过 `shard_max_bytes` 后换到下一个序号；单盘对局不会跨分片。
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        writer_id: str | None = None,
+        shard_max_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = False,
+    ) -> None:
+        if shard_max_bytes <= 0:
+            raise ValueError("shard_max_bytes must be positive.")
+        self.root = Path(root)
+        self.writer_id = writer_id or f"{os.getpid()}-{uuid4().hex[:8]}"
+        self.shard_max_bytes = shard_max_bytes
+        self.fsync = fsync
+        self._shard_index = 0
+        self._shard: BinaryIO | None = None
+        self._shard_size = 0
+        self._index: IO[str] | None = None
+        self._entries: dict[str, IndexEntry] | None = None
+
+    def __enter__(self) -> MatchLogStore:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for handle in (self._shard, self._index):
+            if handle is not None:
+                handle.close()
+        self._shard = None
+        self._index = None
+
+    @property
+    def shard_path(self) -> Path:
+        """当前写入中的分片文件。"""
+
+        return self.root / SHARD_DIR / f"{self.writer_id}-{self._shard_index:05d}.jsonl"
+
+    def append_match(
+        self, events_blob: bytes, summary: dict[str, object]
+    ) -> IndexEntry:
+        """把一盘对局的全部事件行追加到分片，再写一行索引。"""
+
+        shard = self._shard_for(len(events_blob))
+        offset = self._shard_size
+        shard.write(events_blob)
+        shard.flush()
+        if self.fsync:
+            os.fsync(shard.fileno())
+        self._shard_size += len(events_blob)
+
+        entry = IndexEntry(
+            match_id=str(summary["match_id"]),
+            shard=self.shard_path.relative_to(self.root).as_posix(),
+            offset=offset,
+            length=len(events_blob),
+            winner=_optional_str(summary.get("winner")),
+            result=_optional_str(summary.get("result")),
+            total_moves=int(summary["total_moves"]),
+            black_player_id=_optional_str(summary.get("black_player_id")),
+            white_player_id=_optional_str(summary.get("white_player_id")),
+            started_at=_optional_str(summary.get("started_at")),
+            ended_at=_optional_str(summary.get("ended_at")),
+        )
+        if self._index is None:
+            index_path = self.root / INDEX_DIR / f"{self.writer_id}.jsonl"
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            self._index = index_path.open("a", encoding="utf-8")
+        self._index.write(json.dumps(asdict(entry), ensure_ascii=True) + "\n")
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._index.fileno())
+        if self._entries is not None:
+            self._entries[entry.match_id] = entry
+        return entry
+
+    def iter_index(self) -> Iterator[IndexEntry]:
+        """依次读出所有写入者的索引；不会打开任何分片文件。"""
+
+        index_dir = self.root / INDEX_DIR
+        if not index_dir.is_dir():
+            return
+        for index_path in sorted(index_dir.glob("*.jsonl")):
+            with index_path.open(encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        yield IndexEntry(**json.loads(line))
+
+    def query(
+        self,
+        winner: PlayerColor | str | None = None,
+        result: str | None = None,
+        player_id: str | None = None,
+        min_moves: int | None = None,
+        max_moves: int | None = None,
+    ) -> Iterator[IndexEntry]:
+        """只按索引字段过滤对局；`player_id` 匹配执黑或执白任一方。"""
+
+        for entry in self.iter_index():
+            if winner is not None and entry.winner != str(winner):
+                continue
+            if result is not None and entry.result != result:
+                continue
+            if player_id is not None and player_id not in (
+                entry.black_player_id,
+                entry.white_player_id,
+            ):
+                continue
+            if min_moves is not None and entry.total_moves < min_moves:
+                continue
+            if max_moves is not None and entry.total_moves > max_moves:
+                continue
+            yield entry
+
+    def find(self, match_id: str) -> IndexEntry:
+        """按 match_id 查索引；首次调用时把全部索引读进内存里的映射。
+
+        映射里找不到时重读一次索引，以便看到其他写入者之后追加的对局。
+        """
+
+        if self._entries is None or match_id not in self._entries:
+            self._entries = {entry.match_id: entry for entry in self.iter_index()}
+        try:
+            return self._entries[match_id]
+        except KeyError:
+            raise KeyError(match_id) from None
+
+    def read_match_bytes(self, entry: IndexEntry | str) -> bytes:
+        if isinstance(entry, str):
+            entry = self.find(entry)
+        with (self.root / entry.shard).open("rb") as handle:
+            handle.seek(entry.offset)
+            return handle.read(entry.length)
+
+    def iter_match_bytes(
+        self, entries: Iterable[IndexEntry]
+    ) -> Iterator[tuple[IndexEntry, bytes]]:
+        """按给定顺序读出多盘对局；相邻的同分片对局共用一个打开的句柄。
+
+        同一分片的对局按偏移排好序时，整个分片只打开一次、顺序读完。
+        """
+
+        for shard, group in groupby(entries, key=attrgetter("shard")):
+            with (self.root / shard).open("rb") as handle:
+                for entry in group:
+                    handle.seek(entry.offset)
+                    yield entry, handle.read(entry.length)
+
+    def read_match(self, entry: IndexEntry | str) -> list[dict[str, object]]:
+        """seek 到分片里的对应位置，只解析这一盘的事件。"""
+
+        return [json.loads(line) for line in self.read_match_bytes(entry).splitlines()]
+
+    def _shard_for(self, size: int) -> BinaryIO:
+        if self._shard is not None and self._shard_size + size > self.shard_max_bytes:
+            self._shard.close()
+            self._shard = None
+            self._shard_index += 1
+        if self._shard is None:
+            path = self.shard_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 同名分片已存在（例如复用了 writer_id）时，跳到下一个空闲序号。
+            while path.exists() and path.stat().st_size + size > self.shard_max_bytes:
+                self._shard_index += 1
+                path = self.shard_path
+            self._shard = path.open("ab")
+            self._shard_size = self._shard.tell()
+        return self._shard
+
+
+class StoreRecorder(JsonEventRecorder):
+    """把一盘对局的 JSONL 事件攒在内存里，结束时整盘追加进 `MatchLogStore`。
+
+    事件结构与 `JsonlRecorder` 完全相同；不单独写摘要文件，摘要字段进索引。
+    对局没有正常结束就 `close()` 时，已攒下的事件作为半盘记录写入，索引里
+    `result`、`winner` 和 `ended_at` 为空。
+    """
+
+    def __init__(self, store: MatchLogStore) -> None:
+        super().__init__(FlushPolicy.MATCH)
+        self.store = store
+        self.summary_path: Path | None = None
+        self.entry: IndexEntry | None = None
+        self._lines: list[str] = []
+        self._player_ids: dict[PlayerColor, str] = {}
+        self._total_moves = 0
+
+    @property
+    def events_path(self) -> Path:
+        # 对局写完前事件还在内存里，这时返回即将写入的分片。
+        if self.entry is not None:
+            return self.store.root / self.entry.shard
+        return self.store.shard_path
+
+    def flush(self) -> None:
+        # 整盘一次写入，中途没有需要刷出的内容。
+        return
+
+    def close(self) -> None:
+        # 正常结束后缓冲已清空；否则把半盘事件写进日志库，留作排查。
+        if not self._lines:
+            return
+        self._finish(
+            {
+                "match_id": self.match_id,
+                "started_at": self._started_at,
+                "ended_at": None,
+                "winner": None,
+                "result": None,
+                "total_moves": self._total_moves,
+            }
+        )
+
+    def record_match_started(
+        self,
+        rule_set: RuleSet,
+        players: dict[PlayerColor, Player],
+        initial_state: GameState | CompactGameState,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._player_ids = {
+            color: player.player_id for color, player in players.items()
+        }
+        super().record_match_started(
+            rule_set, players, initial_state, timestamp=timestamp
+        )
+
+    def record_move_applied(
+        self,
+        turn_index: int,
+        player: Player,
+        move: Move | None,
+        previous_state: GameState | CompactGameState,
+        new_state: GameState | CompactGameState,
+        observation: Observation,
+        *,
+        timestamp: float | None = None,
+    ) -> None:
+        self._total_moves = new_state.move_count
+        super().record_move_applied(
+            turn_index,
+            player,
+            move,
+            previous_state,
+            new_state,
+            observation,
+            timestamp=timestamp,
+        )
+
+    def _write_line(self, line: str) -> None:
+        self._lines.append(line)
+
+    def _finish(self, summary: dict[str, object]) -> None:
+        summary["black_player_id"] = self._player_ids.get(PlayerColor.BLACK)
+        summary["white_player_id"] = self._player_ids.get(PlayerColor.WHITE)
+        self.entry = self.store.append_match(
+            "".join(self._lines).encode("utf-8"), summary
+        )
+        self._lines.clear()
+
+
+def _optional_str(value: object) -> str | None:
+    return None if value is None else str(value)
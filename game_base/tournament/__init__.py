@@ -0,0 +1,23 @@
+"""自对弈与锦标赛：批量调度对局并汇总胜负和等级分。"""
+
+from game_base.tournament.ratings import elo_ratings
+from game_base.tournament.runner import (
+    GameOutcome,
+    PlayerSpec,
+    ScheduledGame,
+    Standing,
+    TournamentResult,
+    run_tournament,
+    schedule_round_robin,
+)
+
+__all__ = [
+    "GameOutcome",
+    "PlayerSpec",
+    "ScheduledGame",
+    "Standing",
+    "TournamentResult",
+    "elo_ratings",
+    "run_tournament",
+    "schedule_round_robin",
+]
@@ -0,0 +1,65 @@
+"""由对局结果估计 Elo 等级分。"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from math import log10
+
+# 每对交过手的选手额外计入的虚拟和棋局数，避免全胜或全负时估计发散。
+PRIOR_DRAWS = 1.0
+
+
+def elo_ratings(
+    results: Iterable[tuple[int, int, float]],
+    player_count: int,
+    iterations: int = 10_000,
+    tolerance: float = 1e-10,
+) -> list[float]:
+    """按 Bradley-Terry 模型的极大似然估计 Elo，均值为 0。
+
+    `results` 的每一项是 (选手 a, 选手 b, a 的得分)，得分取 1、0.5 或 0，
+    和棋按各得半局处理。用 Hunter 的 MM 迭代求解，每一步都单调提升似然。
+    没有任何对局的选手等级分记为 0。
+    """
+
+    games = [[0.0] * player_count for _ in range(player_count)]
+    scores = [0.0] * player_count
+    for first, second, score in results:
+        games[first][second] += 1.0
+        games[second][first] += 1.0
+        scores[first] += score
+        scores[second] += 1.0 - score
+    for first in range(player_count):
+        for second in range(player_count):
+            if first != second and games[first][second]:
+                games[first][second] += PRIOR_DRAWS
+                scores[first] += PRIOR_DRAWS / 2
+
+    strengths = [1.0] * player_count
+    for _ in range(iterations):
+        updated = list(strengths)
+        for player in range(player_count):
+            denominator = sum(
+                count / (strengths[player] + strengths[other])
+                for other, count in enumerate(games[player])
+                if count
+            )
+            if denominator:
+                updated[player] = scores[player] / denominator
+        # 强度只确定到一个公共倍数，按几何平均归一化后再比较收敛。
+        active = [value for value, row in zip(updated, games) if any(row)]
+        scale = _geometric_mean(active) if active else 1.0
+        updated = [value / scale for value in updated]
+        change = max(abs(a - b) for a, b in zip(updated, strengths))
+        strengths = updated
+        if change < tolerance:
+            break
+
+    return [
+        400.0 * log10(strength) if any(row) else 0.0
+        for strength, row in zip(strengths, games)
+    ]
+
+
+def _geometric_mean(values: list[float]) -> float:
+    return 10 ** (sum(log10(value) for value in values) / len(values))
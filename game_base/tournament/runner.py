@@ -0,0 +1,295 @@
+"""锦标赛调度：在进程池里批量运行 `run_match`，并汇总每位选手的战绩。"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+from threading import get_ident
+from time import perf_counter_ns
+from uuid import uuid4
+
+from game_base.core.engine import run_match
+from game_base.core.models import GameStatus, PlayerColor, RuleSet
+from game_base.interface.protocols import Player
+from game_base.recording.protocols import Recorder
+from game_base.recording.recorder import JsonlRecorder
+from game_base.recording.store import MatchLogStore, StoreRecorder
+from game_base.tournament.ratings import elo_ratings
+
+# 玩家工厂按关键字参数 (player_id, color, seed) 构造玩家；进程池里要求可 pickle，
+# 因此应当是模块顶层的类或函数，或者由它们构成的 functools.partial。
+PlayerFactory = Callable[..., Player]
+ProgressCallback = Callable[[int, int, "GameOutcome"], None]
+_Job = tuple[
+    "ScheduledGame",
+    "PlayerSpec",
+    "PlayerSpec",
+    RuleSet,
+    str | Path | None,
+    str | Path | None,
+]
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerSpec:
+    """一位参赛选手：显示名和构造玩家实例的工厂。"""
+
+    name: str
+    factory: PlayerFactory
+
+    def build(self, color: PlayerColor, seed: int) -> Player:
+        return self.factory(
+            player_id=f"{self.name}-{color.value}", color=color, seed=seed
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduledGame:
+    """赛程里的一盘棋：执黑、执白选手在 specs 里的下标，以及这盘棋的种子。"""
+
+    game_index: int
+    black: int
+    white: int
+    seed: int
+
+
+@dataclass(frozen=True, slots=True)
+class GameOutcome:
+    """一盘棋的结果，足够重建胜负表和等级分。"""
+
+    game_index: int
+    black: int
+    white: int
+    status: GameStatus
+    total_moves: int
+    duration_ms: int
+    event_log_path: str | None = None
+
+    @property
+    def black_score(self) -> float:
+        if self.status is GameStatus.BLACK_WIN:
+            return 1.0
+        if self.status is GameStatus.WHITE_WIN:
+            return 0.0
+        return 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class Standing:
+    """一位选手的累计战绩。"""
+
+    name: str
+    wins: int
+    draws: int
+    losses: int
+    elo: float
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class TournamentResult:
+    """全部对局结果，按 game_index 排序。"""
+
+    names: tuple[str, ...]
+    outcomes: tuple[GameOutcome, ...]
+
+    def standings(self) -> tuple[Standing, ...]:
+        wins = [0] * len(self.names)
+        draws = [0] * len(self.names)
+        losses = [0] * len(self.names)
+        for outcome in self.outcomes:
+            if outcome.status is GameStatus.BLACK_WIN:
+                wins[outcome.black] += 1
+                losses[outcome.white] += 1
+            elif outcome.status is GameStatus.WHITE_WIN:
+                wins[outcome.white] += 1
+                losses[outcome.black] += 1
+            else:
+                draws[outcome.black] += 1
+                draws[outcome.white] += 1
+        ratings = elo_ratings(
+            (
+                (outcome.black, outcome.white, outcome.black_score)
+                for outcome in self.outcomes
+            ),
+            len(self.names),
+        )
+        return tuple(
+            Standing(
+                name=name,
+                wins=wins[index],
+                draws=draws[index],
+                losses=losses[index],
+                elo=ratings[index],
+            )
+            for index, name in enumerate(self.names)
+        )
+
+    def pairwise(self) -> dict[tuple[str, str], tuple[int, int, int]]:
+        """(选手, 对手) -> 该选手对这位对手的 (胜, 和, 负)，不区分执子颜色。"""
+
+        table: dict[tuple[str, str], list[int]] = {}
+        for outcome in self.outcomes:
+            black = self.names[outcome.black]
+            white = self.names[outcome.white]
+            black_row = table.setdefault((black, white), [0, 0, 0])
+            white_row = table.setdefault((white, black), [0, 0, 0])
+            if outcome.status is GameStatus.BLACK_WIN:
+                black_row[0] += 1
+                white_row[2] += 1
+            elif outcome.status is GameStatus.WHITE_WIN:
+                black_row[2] += 1
+                white_row[0] += 1
+            else:
+                black_row[1] += 1
+                white_row[1] += 1
+        return {key: (row[0], row[1], row[2]) for key, row in table.items()}
+
+
+def schedule_round_robin(
+    player_count: int, games_per_pair: int, seed: int, swap_colors: bool = True
+) -> list[ScheduledGame]:
+    """每对选手下 `games_per_pair` 盘；交换颜色时两人轮流执黑。
+
+    每盘棋的种子在排赛程时就从 `seed` 派生好，结果与进程调度顺序无关。
+    """
+
+    if player_count < 2:
+        raise ValueError("A tournament needs at least two players.")
+    if games_per_pair <= 0:
+        raise ValueError("games_per_pair must be positive.")
+    rng = Random(seed)
+    schedule: list[ScheduledGame] = []
+    for first in range(player_count):
+        for second in range(first + 1, player_count):
+            for round_index in range(games_per_pair):
+                black, white = first, second
+                if swap_colors and round_index % 2 == 1:
+                    black, white = second, first
+                schedule.append(
+                    ScheduledGame(
+                        game_index=len(schedule),
+                        black=black,
+                        white=white,
+                        seed=rng.getrandbits(63),
+                    )
+                )
+    return schedule
+
+
+def run_tournament(
+    specs: Sequence[PlayerSpec],
+    rule_set: RuleSet,
+    games_per_pair: int,
+    seed: int = 0,
+    swap_colors: bool = True,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+    progress: ProgressCallback | None = None,
+    log_dir: str | Path | None = None,
+    store_dir: str | Path | None = None,
+) -> TournamentResult:
+    """循环赛：在进程池里并行下完全部对局，返回按 game_index 排序的结果。
+
+    `progress` 在主进程里按完成顺序回调 (已完成盘数, 总盘数, 这盘的结果)。
+    给出 `log_dir` 时每盘棋都用 `JsonlRecorder` 记录到该目录；给出 `store_dir`
+    时改为写入分片日志库，每个工作进程（线程）各自写自己的分片。
+    """
+
+    schedule = schedule_round_robin(len(specs), games_per_pair, seed, swap_colors)
+    jobs = [
+        (game, specs[game.black], specs[game.white], rule_set, log_dir, store_dir)
+        for game in schedule
+    ]
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            outcomes = _collect(pool, jobs, progress)
+    else:
+        outcomes = _collect(executor, jobs, progress)
+    return TournamentResult(
+        names=tuple(spec.name for spec in specs),
+        outcomes=tuple(sorted(outcomes, key=lambda outcome: outcome.game_index)),
+    )
+
+
+def play_scheduled_game(
+    game: ScheduledGame,
+    black_spec: PlayerSpec,
+    white_spec: PlayerSpec,
+    rule_set: RuleSet,
+    log_dir: str | Path | None = None,
+    store_dir: str | Path | None = None,
+) -> GameOutcome:
+    """下一盘排好的棋；两位玩家的种子都由这盘棋的种子派生。"""
+
+    rng = Random(game.seed)
+    black_player = black_spec.build(PlayerColor.BLACK, rng.getrandbits(63))
+    white_player = white_spec.build(PlayerColor.WHITE, rng.getrandbits(63))
+    start_ns = perf_counter_ns()
+    with ExitStack() as stack:
+        recorder: Recorder | None = None
+        if store_dir is not None:
+            # 每盘棋开一次日志库、下完即关，不在工作进程里留下打开的句柄；
+            # 同一工作者沿用固定的 writer_id，对局仍然追加进同一组分片。
+            store = stack.enter_context(
+                MatchLogStore(store_dir, writer_id=_worker_writer_id())
+            )
+            recorder = StoreRecorder(store)
+        elif log_dir is not None:
+            recorder = JsonlRecorder(log_dir)
+        result = run_match(
+            black_player=black_player,
+            white_player=white_player,
+            rule_set=rule_set,
+            recorder=recorder,
+            compact_state=True,
+        )
+    return GameOutcome(
+        game_index=game.game_index,
+        black=game.black,
+        white=game.white,
+        status=result.final_state.status,
+        total_moves=result.final_state.move_count,
+        duration_ms=(perf_counter_ns() - start_ns) // 1_000_000,
+        event_log_path=result.event_log_path,
+    )
+
+
+# 每个工作进程（线程）一个固定的写入者名；只缓存名字，不缓存文件句柄。
+# 按 (pid, 线程) 取键，fork 出的子进程不会沿用父进程的名字。
+_WORKER_WRITER_IDS: dict[tuple[int, int], str] = {}
+
+
+def _worker_writer_id() -> str:
+    key = (os.getpid(), get_ident())
+    writer_id = _WORKER_WRITER_IDS.get(key)
+    if writer_id is None:
+        writer_id = _WORKER_WRITER_IDS[key] = f"{key[0]}-{uuid4().hex[:8]}"
+    return writer_id
+
+
+def _collect(
+    executor: Executor,
+    jobs: list[_Job],
+    progress: ProgressCallback | None,
+) -> list[GameOutcome]:
+    futures = [executor.submit(play_scheduled_game, *job) for job in jobs]
+    outcomes: list[GameOutcome] = []
+    for future in as_completed(futures):
+        outcome = future.result()
+        outcomes.append(outcome)
+        if progress is not None:
+            progress(len(outcomes), len(futures), outcome)
+    return outcomes
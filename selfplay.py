@@ -0,0 +1,63 @@
+"""离线自对弈入口：若干个不同 gamma 的搜索智能体加一个随机基线，打循环赛。"""
+
+from __future__ import annotations
+
+import argparse
+from functools import partial
+
+from agent.base import SearchParams
+from agent.flow import HeuristicSearchAgent
+from game_base.adapters.random_agent import RandomAgent
+from game_base.core.models import RuleSet
+from game_base.tournament import GameOutcome, PlayerSpec, run_tournament
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a self-play tournament.")
+    parser.add_argument("--gamma", type=float, nargs="+", default=[0.05, 0.01])
+    parser.add_argument("--games-per-pair", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-dir", default=None)
+    parser.add_argument("--no-random", action="store_true")
+    args = parser.parse_args()
+
+    rule_set = RuleSet(rows=4, cols=9, connect_n=4)
+    specs = [
+        PlayerSpec(
+            name=f"search-gamma{gamma:g}",
+            factory=partial(
+                HeuristicSearchAgent,
+                rule_set=rule_set,
+                params=SearchParams(gamma=gamma),
+            ),
+        )
+        for gamma in args.gamma
+    ]
+    if not args.no_random:
+        specs.append(PlayerSpec(name="random", factory=RandomAgent))
+
+    def report(done: int, total: int, outcome: GameOutcome) -> None:
+        print(f"\r{done}/{total} games", end="", flush=True)
+
+    result = run_tournament(
+        specs,
+        rule_set,
+        games_per_pair=args.games_per_pair,
+        seed=args.seed,
+        max_workers=args.workers,
+        progress=report,
+        log_dir=args.log_dir,
+    )
+
+    print()
+    print(f"{'player':<24}{'W':>6}{'D':>6}{'L':>6}{'score':>8}{'elo':>8}")
+    for standing in sorted(result.standings(), key=lambda row: -row.elo):
+        print(
+            f"{standing.name:<24}{standing.wins:>6}{standing.draws:>6}"
+            f"{standing.losses:>6}{standing.score:>8.3f}{standing.elo:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
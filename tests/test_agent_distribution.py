@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+
+import pytest
+
+from agent.base import SearchParams
+from agent.distribution import estimate_move_distributions
+from agent.search import decide_move, prepare_root
+from game_base.core.models import Move, Position, RuleSet
+from game_base.core.rules import apply_move, new_compact_game
+
+
+def _states(count: int) -> list[object]:
+    rule_set = RuleSet()
+    state = new_compact_game(rule_set)
+    states = []
+    for index in range(count):
+        states.append(state)
+        move = Move(
+            player=state.next_player,
+            position=Position(row=(index * 3) % 4, col=(index * 5) % 9),
+        )
+        state = apply_move(state, move, rule_set)
+    return states
+
+
+def test_prepared_root_does_not_change_the_search() -> None:
+    rule_set = RuleSet()
+    params = SearchParams(gamma=0.5, lapse_rate=0.0)
+    for state in _states(4):
+        prepared = prepare_root(state, rule_set, params)
+        for seed in range(3):
+            assert decide_move(
+                state, rule_set, params, Random(seed), prepared=prepared
+            ) == decide_move(state, rule_set, params, Random(seed))
+
+
+def test_prepared_root_rejects_another_state_or_params() -> None:
+    rule_set = RuleSet()
+    params = SearchParams(gamma=0.5, lapse_rate=0.0)
+    first, second = _states(2)
+    prepared = prepare_root(first, rule_set, params)
+    with pytest.raises(ValueError, match="state"):
+        decide_move(second, rule_set, params, Random(0), prepared=prepared)
+    with pytest.raises(ValueError, match="params"):
+        decide_move(
+            first,
+            rule_set,
+            SearchParams(gamma=0.2, lapse_rate=0.0),
+            Random(0),
+            prepared=prepared,
+        )
+
+
+def test_full_lapse_is_exactly_uniform_without_sampling() -> None:
+    np = pytest.importorskip("numpy")
+    result = estimate_move_distributions(
+        _states(3), SearchParams(lapse_rate=1.0), RuleSet(), max_workers=1
+    )
+    assert result.probabilities.shape == (3, 36)
+    assert np.allclose(result.probabilities.sum(axis=1), 1.0)
+    for row, stones in zip(result.probabilities, range(3), strict=True):
+        assert np.allclose(row[row > 0], 1.0 / (36 - stones))
+    assert not result.stderr.any()
+    assert result.samples.tolist() == [0, 0, 0]
+    assert result.converged.all()
+
+
+def test_distributions_are_deterministic_and_stop_once_converged() -> None:
+    np = pytest.importorskip("numpy")
+    states = _states(3)
+    params = SearchParams(gamma=0.5, lapse_rate=0.2)
+    sequential = estimate_move_distributions(
+        states, params, RuleSet(), samples=20, seed=5, batch_size=5, max_workers=1
+    )
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pooled = estimate_move_distributions(
+            states,
+            params,
+            RuleSet(),
+            samples=20,
+            seed=5,
+            batch_size=5,
+            executor=executor,
+            chunk_size=1,
+        )
+    assert np.array_equal(sequential.probabilities, pooled.probabilities)
+    assert np.array_equal(sequential.stderr, pooled.stderr)
+    assert np.allclose(sequential.probabilities.sum(axis=1), 1.0)
+    assert sequential.samples.tolist() == [20, 20, 20]
+
+    early = estimate_move_distributions(
+        states,
+        params,
+        RuleSet(),
+        samples=400,
+        seed=5,
+        tolerance=0.15,
+        batch_size=5,
+        max_workers=1,
+    )
+    assert early.converged.all()
+    assert (early.samples < 400).all()
+    assert (early.stderr <= 0.15).all()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import sys
+from importlib import import_module
+from pathlib import Path
+from random import Random
+
+import pytest
+
+from agent.base import BitBoard, PlayerColor, SearchParams
+from agent.evaluation import (
+    CPP_FEATURES_PATH,
+    PatternTableWarning,
+    advance_relevant_patterns,
+    build_pattern_index,
+    draw_move_noise,
+    evaluate_board,
+    evaluate_boards,
+    get_moves,
+    get_moves_batch,
+    group_patterns,
+    kept_pattern_mask,
+    legal_bitmasks_for_board,
+    load_pattern_groups,
+    load_patterns,
+    parse_cpp_patterns,
+    pattern_groups_from_table,
+    patterns_by_weight,
+    relevant_patterns,
+    sample_kept_patterns,
+)
+from agent.pattern_codegen import (
+    TABLE_FORMAT_VERSION,
+    check,
+    generate,
+    main,
+    table_patterns,
+)
+from game_base.core.models import RuleSet
+
+
+def _random_boards(seed: int, count: int) -> list[BitBoard]:
+    rng = Random(seed)
+    boards: list[BitBoard] = []
+    for _ in range(count):
+        board = BitBoard()
+        for _ in range(rng.randrange(0, 30)):
+            bitmask = rng.choice(legal_bitmasks_for_board(board, RuleSet()))
+            board = board.add(bitmask, board.active_player())
+        boards.append(board)
+    return boards
+
+
+def test_incremental_relevant_patterns_match_full_scan() -> None:
+    kept = sample_kept_patterns(SearchParams(), Random(1))
+    index = build_pattern_index(kept)
+    for board in _random_boards(seed=2, count=40):
+        relevant = relevant_patterns(index, board)
+        for bitmask in legal_bitmasks_for_board(board, RuleSet()):
+            child = board.add(bitmask, board.active_player())
+            assert advance_relevant_patterns(
+                index, relevant, child, bitmask
+            ) == relevant_patterns(index, child)
+
+
+def test_get_moves_with_pattern_index_matches_full_scan_exactly() -> None:
+    params = SearchParams()
+    kept = sample_kept_patterns(params, Random(3))
+    index = build_pattern_index(kept)
+    for seed, board in enumerate(_random_boards(seed=4, count=40)):
+        player = board.active_player()
+        full = get_moves(
+            board, player, PlayerColor.BLACK, RuleSet(), params, Random(seed), kept
+        )
+        indexed = get_moves(
+            board,
+            player,
+            PlayerColor.BLACK,
+            RuleSet(),
+            params,
+            Random(seed),
+            kept,
+            pattern_index=index,
+            relevant=relevant_patterns(index, board),
+        )
+        assert [(action.bitmask, action.value) for action in indexed] == [
+            (action.bitmask, action.value) for action in full
+        ]
+
+
+def test_batch_evaluation_matches_scalar_path_bit_for_bit() -> None:
+    np = pytest.importorskip("numpy")
+    params = SearchParams()
+    boards = _random_boards(seed=5, count=30)
+    black = np.array([board.black for board in boards], dtype=np.uint64)
+    white = np.array([board.white for board in boards], dtype=np.uint64)
+    kept = sample_kept_patterns(params, Random(6))
+
+    values = evaluate_boards(black, white, params)
+    noise = draw_move_noise(black, white, params, Random(7))
+    deltas = get_moves_batch(
+        black,
+        white,
+        params,
+        kept_mask=kept_pattern_mask(kept),
+        self_player=PlayerColor.WHITE,
+        noise=noise,
+    )
+
+    rng = Random(7)
+    for row, board in enumerate(boards):
+        assert values[row] == evaluate_board(board, params)
+        scalar = get_moves(
+            board,
+            board.active_player(),
+            PlayerColor.WHITE,
+            RuleSet(),
+            params,
+            rng,
+            kept,
+        )
+        expected = {action.bitmask.bit_length() - 1: action.value for action in scalar}
+        assert expected == {
+            cell: deltas[row, cell]
+            for cell in range(deltas.shape[1])
+            if not np.isnan(deltas[row, cell])
+        }
+
+
+def test_generated_pattern_table_round_trips_the_cpp_source(tmp_path: Path) -> None:
+    rng = Random(3)
+    entries = ",\n".join(
+        f"{{0x{rng.getrandbits(36):X}ULL,0x{rng.getrandbits(36):X}ULL,"
+        f"{rng.randrange(4)},w_act,w_pass,delta,{rng.randrange(17)}}}"
+        for _ in range(731)
+    )
+    source = tmp_path / "features_all.cpp"
+    source.write_text(f"pattern features[731]={{\n{entries}}};\n", encoding="utf-8")
+    table = tmp_path / "pattern_table.py"
+
+    assert not check(source, table)
+    generate(source, table)
+    assert check(source, table)
+    main(["--check", "--source", str(source), "--output", str(table)])
+    patterns = parse_cpp_patterns(source.read_text())
+    assert table_patterns(table) == patterns
+
+    # 生成表按权重下标分组存放，组内保持源文件顺序。
+    namespace: dict[str, object] = {}
+    exec(table.read_text(encoding="utf-8"), namespace)
+    assert namespace["FORMAT_VERSION"] == TABLE_FORMAT_VERSION
+    groups = pattern_groups_from_table(namespace["WEIGHT_GROUPS"])
+    assert groups == group_patterns(patterns)
+    assert [group.weight_index for group in groups] == sorted(
+        {pattern.weight_index for pattern in patterns}
+    )
+
+    source.write_text(source.read_text().replace("{0x", "{0x0", 1))
+    assert not check(source, table)
+    with pytest.raises(SystemExit):
+        main(["--check", "--source", str(source), "--output", str(table)])
+
+
+@pytest.mark.xfail(
+    raises=ModuleNotFoundError,
+    reason=(
+        "agent/pattern_table.py is not committed: it must be generated from the "
+        "original features_all.cpp, which this repository does not ship."
+    ),
+)
+def test_committed_pattern_table_is_current() -> None:
+    # 生成表提交进仓库后，这里用 --check 对照 C++ 源，并确认加载走的是它。
+    pattern_table = import_module("agent.pattern_table")
+    assert pattern_table.FORMAT_VERSION == TABLE_FORMAT_VERSION
+    if CPP_FEATURES_PATH.exists():
+        main(["--check"])
+    assert load_pattern_groups() == pattern_groups_from_table(
+        pattern_table.WEIGHT_GROUPS
+    )
+    assert len(load_patterns()) == pattern_table.PATTERN_COUNT
+
+
+def test_missing_pattern_table_falls_back_to_the_cpp_source_with_a_warning(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # sys.modules 里放 None，导入生成表就像它不存在一样失败。
+    monkeypatch.setitem(sys.modules, "agent.pattern_table", None)
+    with pytest.warns(PatternTableWarning, match="agent.pattern_codegen"):
+        groups = load_pattern_groups.__wrapped__()
+    assert groups == group_patterns(parse_cpp_patterns(CPP_FEATURES_PATH.read_text()))
+
+
+def test_patterns_by_weight_partitions_the_table() -> None:
+    groups = patterns_by_weight()
+    assert sum(len(group) for group in groups.values()) == len(load_patterns())
+    assert group_patterns(load_patterns()) == load_pattern_groups()
+    assert all(
+        pattern.weight_index == weight
+        for weight, group in groups.items()
+        for pattern in group
+    )
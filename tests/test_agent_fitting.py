@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from agent.base import SearchParams
+from agent.fitting import (
+    FitSettings,
+    FreeParameter,
+    LikelihoodCache,
+    ParameterSpace,
+    default_parameter_space,
+    fit_many,
+    fit_participant,
+    nelder_mead,
+    recover_parameters,
+    simulate_trials,
+)
+from agent.likelihood import IbsOptions
+from game_base.core.models import RuleSet
+
+
+def test_parameter_space_round_trips_tied_weights() -> None:
+    space = default_parameter_space()
+    assert len(space) == 10
+    assert space.to_params(space.to_vector(space.base)) == space.base
+
+    vector = list(space.to_vector(space.base))
+    vector[space.labels.index("w_3")] = 4.25
+    params = space.to_params(vector)
+    assert params.w_act[2::4][:4] == (4.25,) * 4
+    assert params.w_pass[2::4][:4] == (4.25,) * 4
+    assert params.w_act[16] == space.base.w_act[16]
+
+
+def test_nelder_mead_finds_the_minimum_inside_the_unit_cube() -> None:
+    result = nelder_mead(
+        lambda point: (point[0] - 0.3) ** 2 + (point[1] - 0.8) ** 2,
+        (0.5, 0.5),
+        max_evaluations=300,
+        tolerance=1e-10,
+    )
+    assert abs(result.unit[0] - 0.3) < 1e-3
+    assert abs(result.unit[1] - 0.8) < 1e-3
+
+
+def test_fits_resume_from_the_on_disk_cache(tmp_path: Path) -> None:
+    base = SearchParams(gamma=0.5, lapse_rate=0.5)
+    settings = FitSettings(
+        space=ParameterSpace(
+            parameters=(FreeParameter("lapse_rate", ("lapse_rate",), 0.05, 1.0),),
+            base=base,
+        ),
+        cache_path=tmp_path / "cache.sqlite",
+        options=IbsOptions(max_samples=200),
+        max_evaluations=6,
+    )
+    trials = simulate_trials(base, games=1, rule_set=RuleSet(), seed=4)
+    assert trials
+
+    first = fit_participant("p1", trials, settings)
+    again = fit_participant("p1", trials, settings)
+    assert again == replace(first, cache_hits=again.cache_hits)
+    assert again.cache_hits >= again.evaluations
+    with LikelihoodCache(settings.cache_path) as cache:
+        assert len(cache) == first.evaluations - first.cache_hits
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        folds = fit_many({"p1": trials}, settings, folds=2, executor=executor)
+    assert [result.fold for result in folds] == [0, 1]
+    assert all(result.test_log_likelihood is not None for result in folds)
+
+    recovery = recover_parameters(base, settings, games=1, seed=4)
+    assert recovery.trials == len(trials)
+    assert recovery.fit.train_log_likelihood == first.train_log_likelihood
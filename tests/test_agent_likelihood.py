@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from math import log
+
+from agent.base import SearchParams
+from agent.likelihood import IbsOptions, ibs_log_likelihood
+from game_base.core.models import Move, Position, RuleSet
+from game_base.core.rules import apply_move, new_compact_game
+
+
+def _trials(count: int) -> list[tuple[object, Move]]:
+    rule_set = RuleSet()
+    state = new_compact_game(rule_set)
+    trials = []
+    for index in range(count):
+        move = Move(
+            player=state.next_player, position=Position(row=index % 4, col=index // 4)
+        )
+        trials.append((state, move))
+        state = apply_move(state, move, rule_set)
+    return trials
+
+
+def test_ibs_is_unbiased_for_uniformly_random_play() -> None:
+    # 失误率为 1 时模型在 n 个空格里均匀随机落子，真实似然是 -log(n)。
+    trials = _trials(4)
+    estimate = ibs_log_likelihood(
+        trials,
+        SearchParams(lapse_rate=1.0),
+        RuleSet(),
+        seed=3,
+        options=IbsOptions(repeats=300, max_repeats=300),
+        max_workers=1,
+    )
+
+    exact = -sum(log(36 - index) for index in range(len(trials)))
+    assert abs(estimate.log_likelihood - exact) < 4 * estimate.std_error
+    assert all(position.repeats == 300 for position in estimate.positions)
+    assert not any(position.truncated for position in estimate.positions)
+
+
+def test_ibs_with_a_variance_target_stays_unbiased() -> None:
+    # 在参与平均的样本上判断何时停，每个棋面都会偏高约 0.9 个标准误；重复
+    # 40 份棋面后偏差约 5 个标准误。试探轮定轮数时不应有这种偏差。
+    trials = _trials(12) * 40
+    estimate = ibs_log_likelihood(
+        trials,
+        SearchParams(lapse_rate=1.0),
+        RuleSet(),
+        seed=0,
+        options=IbsOptions(repeats=1, max_repeats=16, target_variance=0.5),
+        max_workers=1,
+    )
+
+    exact = -40 * sum(log(36 - index) for index in range(12))
+    assert abs(estimate.log_likelihood - exact) < 3 * estimate.std_error
+    assert all(1 <= position.repeats <= 16 for position in estimate.positions)
+
+
+def test_ibs_is_deterministic_and_adapts_repeats_to_the_variance_target() -> None:
+    trials = _trials(4)
+    params = SearchParams(gamma=0.5, lapse_rate=0.3)
+    options = IbsOptions(repeats=1, max_repeats=4, target_variance=0.5)
+
+    sequential = ibs_log_likelihood(
+        trials, params, RuleSet(), seed=11, options=options, max_workers=1
+    )
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pooled = ibs_log_likelihood(
+            trials,
+            params,
+            RuleSet(),
+            seed=11,
+            options=options,
+            executor=executor,
+            chunk_size=2,
+        )
+
+    assert sequential == pooled
+    assert all(1 <= position.repeats <= 4 for position in sequential.positions)
+    assert sequential.log_likelihood < 0
@@ -1,13 +1,44 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from random import Random
 
-from agent.base import SearchParams
-from agent.evaluation import load_patterns
+from agent.base import (
+    BLACK_WIN_VALUE,
+    BLACK_WINS,
+    WHITE_WINS,
+    BitBoard,
+    BitMask,
+    SearchLimits,
+    SearchParams,
+    SearchStats,
+    StopReason,
+    bitmask_to_move,
+)
+from agent.evaluation import (
+    build_pattern_index,
+    evaluate_board,
+    load_patterns,
+    sample_kept_patterns,
+)
 from agent.flow import HeuristicSearchAgent
-from agent.search import decide_move
-from game_base.core.models import Move, PlayerColor, Position, RuleSet
-from game_base.core.rules import apply_move, new_game
+from agent.search import (
+    decide_move,
+    expand_node,
+    extend_principal_variation,
+    node_candidates,
+    recompute_opt,
+    recompute_pess,
+    recompute_val,
+    select_node,
+    set_best_determined,
+    update_principal_variation,
+)
+from agent.transposition import TranspositionTable
+from agent.tree import NO_NODE, SearchTree
+from benchmarks.corpus import RULE_SET, load_corpus
+from game_base.core.models import GameState, Move, PlayerColor, Position, RuleSet
+from game_base.core.rules import apply_move, is_terminal, legal_actions, new_game
 from game_base.interface.views import build_observation
 
 
@@ -67,3 +98,214 @@ def test_agent_implements_player_protocol_for_cpp_rules() -> None:
 
     assert move.position == Position(row=0, col=3)
     assert agent.last_result is not None
+
+
+def test_search_with_transposition_table_still_finds_immediate_win() -> None:
+    rule_set = RuleSet(rows=4, cols=9, connect_n=4)
+    state = new_game(rule_set)
+    scripted_moves = (
+        Move(player=PlayerColor.BLACK, position=Position(row=0, col=0)),
+        Move(player=PlayerColor.WHITE, position=Position(row=1, col=0)),
+        Move(player=PlayerColor.BLACK, position=Position(row=0, col=1)),
+        Move(player=PlayerColor.WHITE, position=Position(row=1, col=1)),
+        Move(player=PlayerColor.BLACK, position=Position(row=0, col=2)),
+        Move(player=PlayerColor.WHITE, position=Position(row=1, col=2)),
+    )
+    for move in scripted_moves:
+        state = apply_move(state, move, rule_set)
+
+    table = TranspositionTable(max_entries=64)
+    result = decide_move(
+        state=state,
+        rule_set=rule_set,
+        params=SearchParams(gamma=0.05, lapse_rate=0.0, noise_std=0.0),
+        rng=Random(7),
+        transposition_table=table,
+    )
+
+    assert result.move.position == Position(row=0, col=3)
+    assert 0 < len(table) <= 64
+
+
+def test_transposition_table_scores_each_board_at_most_once_per_search() -> None:
+    # 语料里这个开局在深搜索下会展开到已经展开过的换位棋面。
+    position = load_corpus()[2]
+    params = SearchParams(gamma=0.002, lapse_rate=0.0, stopping_thresh=10**9)
+    stats = SearchStats()
+    table = TranspositionTable()
+    decide_move(
+        position.state,
+        RULE_SET,
+        params,
+        Random(2),
+        transposition_table=table,
+        stats=stats,
+    )
+
+    # 每次打分都会写入一个条目，条目数等于打分次数说明没有棋面被打分两次。
+    assert stats.candidate_cache_hits > 0
+    assert stats.evaluator_calls == len(table)
+
+
+def test_search_tree_initializes_terminal_bounds_like_cpp_nodes() -> None:
+    tree = SearchTree()
+    root = tree.add_node(black=0, white=0, val=0.5, player=PlayerColor.BLACK, depth=1)
+    won = tree.add_node(
+        black=0b1111,
+        white=0,
+        val=0.0,
+        player=PlayerColor.WHITE,
+        depth=2,
+        parent=root,
+        move=0b1000,
+    )
+
+    assert not tree.determined(root)
+    assert (tree.opt[root], tree.pess[root]) == (BLACK_WINS - 2, WHITE_WINS + 2)
+    assert tree.determined(won)
+    assert tree.opt[won] == BLACK_WINS - 2
+    assert tree.val[won] == BLACK_WIN_VALUE
+
+
+def test_node_budget_stops_search_and_reports_reason() -> None:
+    rule_set = RuleSet(rows=4, cols=9, connect_n=4)
+    result = decide_move(
+        state=new_game(rule_set),
+        rule_set=rule_set,
+        params=SearchParams(gamma=0.001, lapse_rate=0.0),
+        rng=Random(5),
+        limits=SearchLimits(max_nodes=50),
+    )
+
+    assert result.stop_reason is StopReason.NODE_LIMIT
+    assert 50 <= result.node_count < 50 + 36
+    assert result.iterations < SearchParams(gamma=0.001).max_iterations
+
+
+def test_time_budget_still_completes_one_expansion() -> None:
+    rule_set = RuleSet(rows=4, cols=9, connect_n=4)
+    result = decide_move(
+        state=new_game(rule_set),
+        rule_set=rule_set,
+        params=SearchParams(gamma=0.001, lapse_rate=0.0),
+        rng=Random(5),
+        limits=SearchLimits(time_limit_ms=1e-6),
+    )
+
+    assert result.stop_reason is StopReason.TIME_LIMIT
+    assert result.iterations == 1
+    assert result.node_count > 0
+
+
+def test_search_stats_observe_without_changing_the_search() -> None:
+    rule_set = RuleSet(rows=4, cols=9, connect_n=4)
+    state = new_game(rule_set)
+    params = SearchParams(gamma=0.05, lapse_rate=0.0)
+    seen: list[int] = []
+    stats = SearchStats(on_iteration=lambda current: seen.append(current.iterations))
+
+    plain = decide_move(state, rule_set, params, Random(9))
+    result = decide_move(state, rule_set, params, Random(9), stats=stats)
+
+    assert result.stats is stats
+    assert result == replace(plain, stats=stats)
+    assert seen == list(range(1, result.iterations + 1))
+    assert stats.iterations == result.iterations
+    assert stats.nodes_created == result.node_count
+    assert stats.evaluator_calls == result.iterations
+    assert stats.patterns_scanned > 0
+    assert stats.backprop_steps >= result.iterations - 1
+    assert 1 <= stats.planning_depth <= stats.max_depth
+    assert bitmask_to_move(stats.best_move, state.next_player, rule_set) == result.move
+    assert stats.generation_ns > 0 and stats.backup_ns > 0
+
+    # 再次传入同一对象时从零开始计数。
+    decide_move(state, rule_set, params, Random(9), stats=stats)
+    assert stats.iterations == result.iterations
+
+
+def test_incremental_backup_and_cached_pv_match_a_full_recompute() -> None:
+    rule_set = RuleSet(rows=4, cols=9, connect_n=4)
+    params = SearchParams(gamma=0.02, lapse_rate=0.0)
+    rng = Random(11)
+    for stones in (0, 5, 10, 16):
+        state = new_game(rule_set)
+        while state.move_count < stones:
+            options = [
+                after
+                for move in legal_actions(state, rule_set)
+                if not is_terminal(after := apply_move(state, move, rule_set))
+            ]
+            state = rng.choice(options)
+        _check_against_full_recompute(state, rule_set, params, rng)
+
+
+def _check_against_full_recompute(
+    state: GameState, rule_set: RuleSet, params: SearchParams, rng: Random
+) -> None:
+    # 两棵树展开同样的候选：一棵走增量回传和 PV 缓存，另一棵每次都把到根
+    # 为止的祖先全部重算，并从根重新下探 PV。
+    board = BitBoard.from_state(state, rule_set)
+    kept = sample_kept_patterns(params, rng)
+    index = build_pattern_index(kept)
+    fast, slow = SearchTree(), SearchTree()
+    for tree in (fast, slow):
+        tree.add_node(
+            black=board.black,
+            white=board.white,
+            val=evaluate_board(board, params),
+            player=state.next_player,
+            depth=1,
+        )
+    path = [0]
+    extend_principal_variation(fast, path)
+    for _ in range(params.max_iterations):
+        if fast.determined(0):
+            break
+        leaf = path[-1]
+        assert leaf == select_node(slow, 0)
+        candidates = node_candidates(
+            fast, leaf, state.next_player, rule_set, params, rng, kept, index
+        )
+        top = expand_node(fast, leaf, candidates)
+        _expand_with_full_backup(slow, leaf, candidates)
+        update_principal_variation(fast, path, top)
+
+        for column in ("opt", "pess", "val", "best"):
+            assert getattr(fast, column) == getattr(slow, column), column
+        expected = [0]
+        while slow.best[expected[-1]] != NO_NODE:
+            expected.append(slow.best[expected[-1]])
+        assert path == expected
+
+
+def _expand_with_full_backup(
+    tree: SearchTree, node: int, candidates: list[tuple[BitMask, float]]
+) -> None:
+    if tree.child_count[node] or not candidates:
+        return
+    black_to_move = tree.black_to_move[node]
+    first = len(tree)
+    for bitmask, value in candidates:
+        tree.add_node(
+            black=tree.black[node] | (bitmask if black_to_move else 0),
+            white=tree.white[node] | (0 if black_to_move else bitmask),
+            val=tree.val[node] + (value if black_to_move else -value),
+            player=PlayerColor.WHITE if black_to_move else PlayerColor.BLACK,
+            depth=tree.depth[node] + 1,
+            parent=node,
+            move=bitmask,
+        )
+    tree.first_child[node] = first
+    tree.child_count[node] = len(candidates)
+    recompute_opt(tree, node)
+    recompute_pess(tree, node)
+    recompute_val(tree, node)
+    if tree.determined(node):
+        set_best_determined(tree, node)
+    ancestor = tree.parent[node]
+    while ancestor != NO_NODE:
+        recompute_opt(tree, ancestor)
+        recompute_pess(tree, ancestor)
+        recompute_val(tree, ancestor)
+        ancestor = tree.parent[ancestor]
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from random import Random
+
+import pytest
+
+from agent.base import (
+    BOARD_CELLS,
+    FULL_MASK,
+    BitBoard,
+    PlayerColor,
+    is_win,
+    iter_single_bit_masks,
+    position_to_bitmask,
+)
+from agent.evaluation import legal_bitmasks_for_board
+from agent.solver import Solver, SolverBudgetExceeded, solve
+from game_base.core.models import Move, Position, RuleSet
+from game_base.core.rules import apply_move, new_compact_game
+
+
+@lru_cache(maxsize=None)
+def _minimax(own: int, other: int) -> int:
+    stones = (own | other).bit_count()
+    if stones == BOARD_CELLS:
+        return 0
+    return max(
+        BOARD_CELLS - stones if is_win(own | cell) else -_minimax(other, own | cell)
+        for cell in iter_single_bit_masks(FULL_MASK & ~(own | other))
+    )
+
+
+def _has_threat(pieces: int, empty: int) -> bool:
+    return any(is_win(pieces | cell) for cell in iter_single_bit_masks(empty))
+
+
+def _quiet_board(rng: Random, stones: int) -> BitBoard:
+    # 随机落子但不留一步胜点，避免大多数局面在一两手内就结束。
+    while True:
+        board = BitBoard()
+        for _ in range(stones):
+            options = []
+            for cell in legal_bitmasks_for_board(board, RuleSet()):
+                after = board.add(cell, board.active_player())
+                empty = FULL_MASK & ~(after.black | after.white)
+                if not _has_threat(after.black, empty) and not _has_threat(
+                    after.white, empty
+                ):
+                    options.append(cell)
+            if not options:
+                break
+            board = board.add(rng.choice(options), board.active_player())
+        else:
+            return board
+
+
+def test_solver_matches_plain_minimax_values_distances_and_moves() -> None:
+    rng = Random(7)
+    solver = Solver()
+    for _ in range(6):
+        board = _quiet_board(rng, 28)
+        black = board.active_player() is PlayerColor.BLACK
+        own, other = (board.black, board.white) if black else (board.white, board.black)
+        stones = board.num_pieces()
+        scores = {
+            cell: (
+                BOARD_CELLS - stones
+                if is_win(own | cell)
+                else -_minimax(other, own | cell)
+            )
+            for cell in iter_single_bit_masks(FULL_MASK & ~(own | other))
+        }
+        best = max(scores.values())
+
+        result = solver.solve(board)
+
+        sign = (best > 0) - (best < 0)
+        assert result.value == (sign if black else -sign)
+        assert result.distance == (
+            BOARD_CELLS - stones if best == 0 else BOARD_CELLS + 1 - abs(best) - stones
+        )
+        assert [
+            position_to_bitmask(move.position.row, move.position.col)
+            for move in result.best_moves
+        ] == sorted(cell for cell, score in scores.items() if score == best)
+
+
+def test_solve_reports_immediate_wins_and_finished_games() -> None:
+    rule_set = RuleSet()
+    state = new_compact_game(rule_set)
+    for col in range(3):
+        for player, row in ((PlayerColor.BLACK, 0), (PlayerColor.WHITE, 2)):
+            state = apply_move(
+                state,
+                Move(player=player, position=Position(row=row, col=col)),
+                rule_set,
+            )
+
+    result = solve(state)
+    assert (result.value, result.distance) == (1, 1)
+    assert [move.position for move in result.best_moves] == [Position(row=0, col=3)]
+
+    final = apply_move(state, result.best_moves[0], rule_set)
+    assert solve(final).value == 1
+    assert solve(final).best_moves == ()
+
+
+def test_solver_budget_and_symmetric_root_moves() -> None:
+    with pytest.raises(SolverBudgetExceeded):
+        solve(BitBoard(), max_nodes=50)
+
+    # 中心对称的棋面：最优着法集合在 180° 旋转下必须封闭。
+    board = BitBoard(
+        black=position_to_bitmask(1, 4) | position_to_bitmask(2, 4),
+        white=position_to_bitmask(0, 0) | position_to_bitmask(3, 8),
+    )
+    board = _fill_symmetric(board, Random(3), pairs=12)
+    result = solve(board)
+    cells = {(move.position.row, move.position.col) for move in result.best_moves}
+    assert cells
+    assert cells == {(3 - row, 8 - col) for row, col in cells}
+
+
+def _fill_symmetric(board: BitBoard, rng: Random, pairs: int) -> BitBoard:
+    # 黑白轮流放入一对关于中心对称的棋子，棋面保持对称且双方子数相等。
+    color = PlayerColor.BLACK
+    while pairs:
+        empty = FULL_MASK & ~(board.black | board.white)
+        cell = rng.choice(
+            [c for c in iter_single_bit_masks(empty) if _rotate(c) & empty]
+        )
+        candidate = board.add(cell | _rotate(cell), color)
+        if not candidate.game_has_ended():
+            board = candidate
+            color = color.other()
+            pairs -= 1
+    return board
+
+
+def _rotate(cell: int) -> int:
+    index = cell.bit_length() - 1
+    return 1 << (BOARD_CELLS - 1 - index)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from random import Random
+
+from agent.base import BitBoard, Pattern, SearchParams, position_to_bitmask
+from agent.evaluation import (
+    EvaluationCache,
+    evaluate_board,
+    legal_bitmasks_for_board,
+    load_patterns,
+)
+from agent.search import decide_move
+from agent.symmetry import (
+    Symmetry,
+    apply_symmetry,
+    canonical_board,
+    canonical_key,
+    pattern_set_is_symmetric,
+)
+from agent.transposition import SymmetricTranspositionTable
+from game_base.core.models import RuleSet
+from game_base.core.rules import new_game
+
+
+def _random_board(rng: Random, stones: int) -> BitBoard:
+    board = BitBoard()
+    for _ in range(stones):
+        bitmask = rng.choice(legal_bitmasks_for_board(board, RuleSet()))
+        board = board.add(bitmask, board.active_player())
+    return board
+
+
+def test_symmetries_map_cells_and_share_one_canonical_form() -> None:
+    corner = position_to_bitmask(0, 0)
+    assert apply_symmetry(corner, Symmetry.FLIP_COLS) == position_to_bitmask(0, 8)
+    assert apply_symmetry(corner, Symmetry.FLIP_ROWS) == position_to_bitmask(3, 0)
+    assert apply_symmetry(corner, Symmetry.ROTATE_180) == position_to_bitmask(3, 8)
+
+    rng = Random(4)
+    for _ in range(50):
+        board = _random_board(rng, rng.randrange(0, 20))
+        canonical, symmetry = canonical_board(board)
+        for image in Symmetry:
+            black = apply_symmetry(board.black, image)
+            white = apply_symmetry(board.white, image)
+            assert apply_symmetry(black, image) == board.black
+            assert canonical_key(black, white)[:2] == (canonical.black, canonical.white)
+        assert apply_symmetry(canonical.black, symmetry) == board.black
+        assert apply_symmetry(canonical.white, symmetry) == board.white
+
+
+def test_symmetric_table_maps_candidates_back_to_the_query_orientation() -> None:
+    table = SymmetricTranspositionTable(share_candidates=True)
+    board = BitBoard(black=position_to_bitmask(0, 0) | position_to_bitmask(1, 2))
+    move = position_to_bitmask(0, 1)
+    table.store_candidates(board.black, board.white, [(move, 1.5)])
+
+    flipped_black = apply_symmetry(board.black, Symmetry.FLIP_ROWS)
+    entry = table.lookup(flipped_black, 0)
+    assert len(table) == 1
+    assert entry is not None
+    assert entry.candidates == ((apply_symmetry(move, Symmetry.FLIP_ROWS), 1.5),)
+
+    rule_set = RuleSet()
+    result = decide_move(
+        new_game(rule_set),
+        rule_set,
+        SearchParams(),
+        Random(5),
+        transposition_table=table,
+    )
+    assert result.move.position.row in range(4)
+    assert table.hits > 0
+
+
+def test_symmetric_sharing_defaults_to_the_pattern_table_symmetry() -> None:
+    symmetric = pattern_set_is_symmetric(load_patterns())
+    assert SymmetricTranspositionTable().share_candidates is symmetric
+    assert EvaluationCache(SearchParams()).symmetric is symmetric
+
+    # 不共享时按原棋盘做键，对称棋面各占一个条目，互不可见。
+    table = SymmetricTranspositionTable(share_candidates=False)
+    board = BitBoard(black=position_to_bitmask(0, 0) | position_to_bitmask(1, 2))
+    move = position_to_bitmask(0, 1)
+    table.store_candidates(board.black, board.white, [(move, 1.5)])
+    assert table.lookup(apply_symmetry(board.black, Symmetry.FLIP_ROWS), 0) is None
+    same = table.lookup(board.black, board.white)
+    assert same is not None
+    assert same.candidates == ((move, 1.5),)
+
+    params = SearchParams()
+    cache = EvaluationCache(params, symmetric=False)
+    board = _random_board(Random(6), 9)
+    for symmetry in Symmetry:
+        image = BitBoard(
+            black=apply_symmetry(board.black, symmetry),
+            white=apply_symmetry(board.white, symmetry),
+        )
+        assert cache.evaluate(image) == evaluate_board(image, params)
+    assert cache.hits == 0
+
+
+def test_evaluation_cache_shares_symmetric_boards() -> None:
+    params = SearchParams()
+    cache = EvaluationCache(params, symmetric=True)
+    board = _random_board(Random(6), 9)
+    images = [
+        BitBoard(
+            black=apply_symmetry(board.black, symmetry),
+            white=apply_symmetry(board.white, symmetry),
+        )
+        for symmetry in Symmetry
+    ]
+    values = [cache.evaluate(image) for image in images]
+
+    assert cache.misses == 1
+    assert cache.hits == 3
+    assert len(cache) == 1
+    assert values[0] == evaluate_board(canonical_board(board)[0], params)
+
+
+def test_pattern_set_symmetry_requires_every_image() -> None:
+    row = position_to_bitmask(0, 0) | position_to_bitmask(0, 1)
+    patterns = [
+        Pattern(
+            pieces=apply_symmetry(row, symmetry), pieces_empty=0, n=0, weight_index=1
+        )
+        for symmetry in Symmetry
+    ]
+    assert pattern_set_is_symmetric(patterns)
+    assert not pattern_set_is_symmetric(patterns[:3])
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from benchmarks.corpus import PHASE_STONES, load_corpus
+from benchmarks.runner import (
+    build_report,
+    compare_reports,
+    default_benchmarks,
+    main,
+    run_benchmark,
+)
+from game_base.core.rules import is_terminal
+
+
+def test_corpus_is_fixed_and_covers_every_phase() -> None:
+    corpus = load_corpus()
+    for position in corpus:
+        assert position.state.move_count == PHASE_STONES[position.phase]
+        assert len(position.moves) == position.state.move_count
+        assert not is_terminal(position.state)
+    load_corpus.cache_clear()
+    assert load_corpus() == corpus
+
+
+def test_benchmarks_report_throughput_and_flag_regressions(tmp_path: Path) -> None:
+    corpus = load_corpus()[:2]
+    results = [
+        run_benchmark(benchmark, min_time=0.0, min_rounds=1)
+        for benchmark in default_benchmarks(corpus, gammas=(0.5,))
+    ]
+    by_name = {result.name: result for result in results}
+    assert by_name["search.decide_move[gamma=0.5]"].nodes_per_sec > 0
+    assert by_name["rules.apply_move"].nodes_per_sec is None
+    assert all(result.ops_per_sec > 0 for result in results)
+
+    report = build_report(results)
+    assert compare_reports(report, report) == []
+    slower = json.loads(json.dumps(report))
+    for result in slower["results"].values():
+        result["ops_per_sec"] /= 2
+    regressions = compare_reports(slower, report, threshold=0.2)
+    assert {regression.metric for regression in regressions} == {"ops_per_sec"}
+    assert len(regressions) == len(results)
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(slower), encoding="utf-8")
+    output = tmp_path / "current.json"
+    args = ["--min-time", "0", "--min-rounds", "1", "--only", "compact"]
+    assert main([*args, "--output", str(output), "--baseline", str(baseline)]) == 0
+    assert list(json.loads(output.read_text())["results"]) == [
+        "rules.apply_move[compact]"
+    ]
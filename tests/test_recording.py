@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from threading import Event, Timer
+
+import pytest
+
+from game_base.adapters.random_agent import RandomAgent
+from game_base.core.engine import run_match
+from game_base.core.models import PlayerColor, RuleSet, board_to_bitmasks
+from game_base.core.rules import apply_move
+from game_base.interface.views import Observation
+from game_base.recording import events
+from game_base.recording.async_recorder import AsyncRecorder
+from game_base.recording.binary import BinaryRecorder, binary_to_jsonl
+from game_base.recording.columnar import export_columnar, load_columnar
+from game_base.recording.reader import (
+    iter_events,
+    iter_matches,
+    iter_training_tuples,
+    replay_match,
+)
+from game_base.recording.recorder import (
+    FlushPolicy,
+    JsonEventRecorder,
+    JsonlRecorder,
+)
+from game_base.recording.store import MatchLogStore, StoreRecorder
+
+
+def _read_events(path: str | Path) -> list[dict[str, object]]:
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+@pytest.mark.parametrize("policy", list(FlushPolicy))
+def test_recorder_writes_every_event_and_closes_at_match_end(
+    tmp_path: Path, policy: FlushPolicy
+) -> None:
+    recorder = JsonlRecorder(tmp_path, buffer_size=128, flush_policy=policy)
+    result = run_match(
+        black_player=RandomAgent(player_id="a", color=PlayerColor.BLACK, seed=1),
+        white_player=RandomAgent(player_id="b", color=PlayerColor.WHITE, seed=2),
+        rule_set=RuleSet(),
+        recorder=recorder,
+    )
+
+    assert recorder.closed
+    logged = _read_events(result.event_log_path)
+    assert [event["event_id"] for event in logged] == list(range(len(logged)))
+    assert logged[-1]["event_type"] == events.MATCH_FINISHED
+    moves = [event for event in logged if event["event_type"] == events.MOVE_APPLIED]
+    assert len(moves) == result.final_state.move_count
+
+
+class _FailingPlayer:
+    player_id = "broken"
+    color = PlayerColor.WHITE
+
+    def choose_move(self, observation: Observation):
+        raise RuntimeError("boom")
+
+
+def test_buffered_events_are_flushed_when_the_match_fails(tmp_path: Path) -> None:
+    with JsonlRecorder(tmp_path, flush_policy=FlushPolicy.MATCH) as recorder:
+        with pytest.raises(RuntimeError):
+            run_match(
+                black_player=RandomAgent(
+                    player_id="a", color=PlayerColor.BLACK, seed=1
+                ),
+                white_player=_FailingPlayer(),
+                rule_set=RuleSet(),
+                recorder=recorder,
+            )
+        assert recorder.closed
+
+    logged = _read_events(recorder.events_path)
+    assert logged[-1]["event_type"] == events.TURN_STARTED
+    assert logged[-1]["player_id"] == "broken"
+
+
+def test_store_keeps_a_partial_entry_when_the_match_fails(tmp_path: Path) -> None:
+    with MatchLogStore(tmp_path) as store:
+        recorder = StoreRecorder(store)
+        with pytest.raises(RuntimeError):
+            run_match(
+                black_player=RandomAgent(
+                    player_id="a", color=PlayerColor.BLACK, seed=1
+                ),
+                white_player=_FailingPlayer(),
+                rule_set=RuleSet(),
+                recorder=recorder,
+            )
+
+    reader = MatchLogStore(tmp_path)
+    partial = reader.find(recorder.match_id)
+    assert (partial.result, partial.winner, partial.ended_at) == (None, None, None)
+    assert partial.total_moves == 1
+    logged = reader.read_match(partial)
+    assert logged[-1]["event_type"] == events.TURN_STARTED
+    assert logged[-1]["player_id"] == "broken"
+
+    # 之后由另一个写入者追加的对局，已经建好映射的读取端也能找到。
+    with MatchLogStore(tmp_path) as store:
+        later = StoreRecorder(store)
+        finished = _play_random_match(later)
+    entry = reader.find(later.match_id)
+    assert entry.result == finished.final_state.status.value
+    with pytest.raises(KeyError):
+        reader.find("missing")
+
+
+def _play_random_match(recorder):
+    return run_match(
+        black_player=RandomAgent(player_id="a", color=PlayerColor.BLACK, seed=5),
+        white_player=RandomAgent(player_id="b", color=PlayerColor.WHITE, seed=6),
+        rule_set=RuleSet(),
+        recorder=recorder,
+    )
+
+
+def test_async_recorder_writes_the_same_log_off_the_game_loop(tmp_path: Path) -> None:
+    volatile = {"timestamp", "match_id", "think_time_ms"}
+    direct = _play_random_match(JsonlRecorder(tmp_path / "direct"))
+    inner = JsonlRecorder(tmp_path / "async")
+    recorder = AsyncRecorder(inner, max_queue=2)
+    queued = _play_random_match(recorder)
+
+    assert inner.closed
+    assert Path(queued.event_log_path) == inner.events_path
+    assert [
+        {key: value for key, value in event.items() if key not in volatile}
+        for event in _read_events(queued.event_log_path)
+    ] == [
+        {key: value for key, value in event.items() if key not in volatile}
+        for event in _read_events(direct.event_log_path)
+    ]
+
+
+def test_async_recorder_stamps_events_when_they_are_queued(tmp_path: Path) -> None:
+    released = Event()
+    released_at: list[float] = []
+
+    def _release() -> None:
+        released_at.append(time.time())
+        released.set()
+
+    class _StalledRecorder(JsonlRecorder):
+        def _write_line(self, line: str) -> None:
+            # 写线程一直卡到计时器放行，模拟磁盘跟不上时的积压。
+            released.wait()
+            super()._write_line(line)
+
+    timer = Timer(0.2, _release)
+    timer.start()
+    try:
+        result = _play_random_match(AsyncRecorder(_StalledRecorder(tmp_path)))
+    finally:
+        timer.cancel()
+        released.set()
+
+    # 每一行都是放行之后才写的，时间戳却都早于放行：记下的是入队时刻。
+    logged = _read_events(result.event_log_path)
+    stamps = [
+        datetime.fromisoformat(event["timestamp"]).timestamp() for event in logged
+    ]
+    assert stamps == sorted(stamps)
+    assert max(stamps) < released_at[0]
+
+
+def test_incomplete_event_recorder_fails_at_construction() -> None:
+    class _NoFinish(JsonEventRecorder):
+        def flush(self) -> None:
+            return
+
+        def close(self) -> None:
+            return
+
+        def _write_line(self, line: str) -> None:
+            return
+
+    with pytest.raises(TypeError, match="_finish"):
+        _NoFinish()
+
+
+def test_async_recorder_reraises_writer_errors(tmp_path: Path) -> None:
+    class _BrokenRecorder(JsonlRecorder):
+        def _write_line(self, line: str) -> None:
+            raise OSError("disk full")
+
+    inner = _BrokenRecorder(tmp_path)
+    with pytest.raises(OSError, match="disk full"):
+        _play_random_match(AsyncRecorder(inner))
+    assert inner.closed
+
+
+def test_binary_log_converts_back_to_the_jsonl_schema(tmp_path: Path) -> None:
+    volatile = {"timestamp", "match_id", "think_time_ms"}
+    jsonl = _play_random_match(JsonlRecorder(tmp_path / "jsonl"))
+    binary = _play_random_match(BinaryRecorder(tmp_path / "binary"))
+    assert binary.summary_path is None
+
+    events_path, summary_path = binary_to_jsonl(
+        binary.event_log_path, tmp_path / "converted"
+    )
+
+    expected = _read_events(jsonl.event_log_path)
+    converted = _read_events(events_path)
+    assert [
+        {key: value for key, value in event.items() if key not in volatile}
+        for event in converted
+    ] == [
+        {key: value for key, value in event.items() if key not in volatile}
+        for event in expected
+    ]
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    original = json.loads(Path(jsonl.summary_path).read_text(encoding="utf-8"))
+    for key in ("winner", "result", "total_moves", "final_board"):
+        assert summary[key] == original[key]
+    assert Path(binary.event_log_path).stat().st_size < (
+        Path(jsonl.event_log_path).stat().st_size / 20
+    )
+
+
+def test_store_appends_matches_to_rotating_shards_with_an_index(
+    tmp_path: Path,
+) -> None:
+    with MatchLogStore(tmp_path, writer_id="w0", shard_max_bytes=60_000) as store:
+        recorders = [StoreRecorder(store) for _ in range(4)]
+        results = [_play_random_match(recorder) for recorder in recorders]
+
+    reader = MatchLogStore(tmp_path)
+    entries = list(reader.iter_index())
+    assert [entry.match_id for entry in entries] == [r.match_id for r in recorders]
+    assert len({entry.shard for entry in entries}) > 1
+    assert all(entry.black_player_id == "a" for entry in entries)
+    assert [blob for _, blob in reader.iter_match_bytes(entries)] == [
+        reader.read_match_bytes(entry) for entry in entries
+    ]
+
+    logged = reader.read_match(recorders[2].match_id)
+    assert logged[0]["event_type"] == events.MATCH_STARTED
+    assert logged[-1]["event_type"] == events.MATCH_FINISHED
+    assert logged[-1]["total_moves"] == results[2].final_state.move_count
+    assert results[2].summary_path is None
+
+    winner = results[0].final_state.winner
+    matching = list(reader.query(winner=winner, player_id="b"))
+    assert recorders[0].match_id in {entry.match_id for entry in matching}
+    assert not list(reader.query(min_moves=37))
+
+
+def test_reader_replays_matches_from_files_binary_logs_and_stores(
+    tmp_path: Path,
+) -> None:
+    jsonl = _play_random_match(JsonlRecorder(tmp_path / "files"))
+    _play_random_match(BinaryRecorder(tmp_path / "files"))
+    with MatchLogStore(tmp_path / "store") as store:
+        _play_random_match(StoreRecorder(store))
+
+    sources = (tmp_path / "files", tmp_path / "store")
+    matches = [match for source in sources for match in iter_matches(source)]
+    assert len(matches) == 3
+    assert len({tuple(logged.move for logged in m.moves) for m in matches}) == 1
+    for match in matches:
+        *_, (state, logged) = replay_match(match, compact_state=False)
+        final = apply_move(state, logged.move, match.rule_set)
+        assert final.board == jsonl.final_state.board
+        assert match.result is jsonl.final_state.status
+
+    samples = list(iter_training_tuples(jsonl.event_log_path, player_id="b"))
+    assert samples
+    assert all(sample.move.player is PlayerColor.WHITE for sample in samples)
+    assert all(sample.state.next_player is PlayerColor.WHITE for sample in samples)
+    assert all(sample.think_time_ms is not None for sample in samples)
+
+    applied = list(iter_events(jsonl.event_log_path, {events.MOVE_APPLIED}))
+    assert len(applied) == jsonl.final_state.move_count
+
+
+def test_columnar_export_matches_the_replayed_logs(tmp_path: Path) -> None:
+    np = pytest.importorskip("numpy")
+    first = _play_random_match(JsonlRecorder(tmp_path / "files"))
+    with MatchLogStore(tmp_path / "store", shard_max_bytes=30_000) as store:
+        second = _play_random_match(StoreRecorder(store))
+        _play_random_match(StoreRecorder(store))
+
+    exported = export_columnar(
+        [tmp_path / "files", tmp_path / "store"], tmp_path / "columns", max_workers=2
+    )
+    columns = load_columnar(tmp_path / "columns")
+
+    assert exported.matches == 3
+    assert (
+        exported.rows
+        == len(columns["move"])
+        == (first.final_state.move_count + 2 * second.final_state.move_count)
+    )
+    assert isinstance(columns["black"], np.memmap)
+    assert columns["black"].dtype == np.uint64
+    rows = columns["match_index"] == 0
+    black = int(columns["black"][rows][-1])
+    white = int(columns["white"][rows][-1])
+    last = 1 << int(columns["move"][rows][-1])
+    if columns["player"][rows][-1] == 0:
+        black |= last
+    else:
+        white |= last
+    assert (black, white) == board_to_bitmasks(first.final_state.board)
+    assert not (tmp_path / "columns" / "_parts").exists()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from random import Random
+
+from game_base.core.bitboard import board_geometry
+from game_base.core.models import GameStatus, Move, PlayerColor, Position, RuleSet
+from game_base.core.rules import (
+    apply_move,
+    is_terminal,
+    legal_actions,
+    new_compact_game,
+    new_game,
+)
+
+
+def test_compact_state_matches_tuple_state_in_random_games() -> None:
+    rule_sets = (
+        RuleSet(),
+        RuleSet(rows=6, cols=7, connect_n=4),
+        RuleSet(rows=5, cols=5, connect_n=3),
+    )
+    for rule_set in rule_sets:
+        for seed in range(20):
+            rng = Random(seed)
+            state = new_game(rule_set)
+            compact = new_compact_game(rule_set)
+            while not is_terminal(state):
+                actions = legal_actions(state, rule_set)
+                assert legal_actions(compact, rule_set) == actions
+                move = rng.choice(actions)
+                state = apply_move(state, move, rule_set)
+                compact = apply_move(compact, move, rule_set)
+                assert compact.status is state.status
+                assert compact.winner is state.winner
+                assert compact.move_count == state.move_count
+            assert is_terminal(compact)
+            assert compact.board == state.board
+
+
+def test_compact_state_materializes_board_lazily() -> None:
+    rule_set = RuleSet()
+    state = new_compact_game(rule_set)
+    state = apply_move(
+        state,
+        Move(player=PlayerColor.BLACK, position=Position(row=2, col=5)),
+        rule_set,
+    )
+
+    assert state._board is None
+    assert state.board[2][5] is PlayerColor.BLACK
+    assert state.board is state.board
+    assert state.to_game_state().board == state.board
+
+
+def test_compact_state_detects_diagonal_win_on_larger_board() -> None:
+    rule_set = RuleSet(rows=6, cols=7, connect_n=4)
+    state = new_compact_game(rule_set)
+    scripted = ((0, 6), (0, 0), (1, 5), (0, 1), (2, 4), (0, 2), (3, 3))
+    for index, (row, col) in enumerate(scripted):
+        player = PlayerColor.BLACK if index % 2 == 0 else PlayerColor.WHITE
+        state = apply_move(
+            state, Move(player=player, position=Position(row=row, col=col)), rule_set
+        )
+
+    assert state.status is GameStatus.BLACK_WIN
+    assert state.winner is PlayerColor.BLACK
+
+
+def test_geometry_shift_win_check_matches_line_table() -> None:
+    rng = Random(3)
+    sizes = ((4, 9, 4), (6, 7, 4), (5, 5, 3), (3, 8, 5), (7, 2, 2))
+    for rows, cols, connect_n in sizes:
+        geometry = board_geometry(rows, cols, connect_n)
+        lines = {line for cell in geometry.cell_lines for line in cell}
+        for _ in range(500):
+            pieces = rng.getrandbits(rows * cols) & rng.getrandbits(rows * cols)
+            expected = any(pieces & line == line for line in lines)
+            assert geometry.is_win(pieces) is expected
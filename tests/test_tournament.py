@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from game_base.adapters.random_agent import RandomAgent
+from game_base.core.models import RuleSet
+from game_base.recording.store import MatchLogStore
+from game_base.tournament import (
+    PlayerSpec,
+    elo_ratings,
+    run_tournament,
+    schedule_round_robin,
+)
+
+
+def test_round_robin_swaps_colors_and_fixes_seeds() -> None:
+    schedule = schedule_round_robin(player_count=3, games_per_pair=2, seed=1)
+
+    assert len(schedule) == 6
+    assert [(game.black, game.white) for game in schedule[:2]] == [(0, 1), (1, 0)]
+    assert schedule == schedule_round_robin(player_count=3, games_per_pair=2, seed=1)
+
+
+def test_tournament_results_do_not_depend_on_the_executor() -> None:
+    specs = [
+        PlayerSpec(name="random-a", factory=RandomAgent),
+        PlayerSpec(name="random-b", factory=RandomAgent),
+    ]
+    progress: list[int] = []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        threaded = run_tournament(
+            specs,
+            RuleSet(),
+            games_per_pair=6,
+            seed=3,
+            executor=executor,
+            progress=lambda done, total, outcome: progress.append(done),
+        )
+    pooled = run_tournament(specs, RuleSet(), games_per_pair=6, seed=3, max_workers=2)
+
+    assert [(o.status, o.total_moves) for o in threaded.outcomes] == [
+        (o.status, o.total_moves) for o in pooled.outcomes
+    ]
+    assert progress == list(range(1, 7))
+    standings = threaded.standings()
+    assert sum(row.games for row in standings) == 12
+    assert standings[0].wins == standings[1].losses
+
+
+def test_elo_orders_players_by_results_and_centres_on_zero() -> None:
+    results = [(0, 1, 1.0)] * 8 + [(1, 2, 1.0)] * 8 + [(0, 2, 0.5)] * 2
+    ratings = elo_ratings(results, player_count=4)
+
+    assert ratings[0] > ratings[1] > ratings[2]
+    assert ratings[3] == 0.0
+    assert abs(sum(ratings[:3])) < 1e-6
+
+
+def test_tournament_writes_every_game_into_the_log_store(tmp_path: Path) -> None:
+    specs = [
+        PlayerSpec(name="random-a", factory=RandomAgent),
+        PlayerSpec(name="random-b", factory=RandomAgent),
+    ]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = run_tournament(
+            specs,
+            RuleSet(),
+            games_per_pair=4,
+            executor=executor,
+            store_dir=tmp_path,
+        )
+
+    entries = list(MatchLogStore(tmp_path).iter_index())
+    assert len(entries) == len(result.outcomes)
+    assert sorted(entry.total_moves for entry in entries) == sorted(
+        outcome.total_moves for outcome in result.outcomes
+    )
+    # 同一工作线程的对局追加进同一个分片，跑完后不留打开的分片或索引句柄。
+    assert len({entry.shard for entry in entries}) <= 2
+    fd_dir = Path("/proc/self/fd")
+    if fd_dir.is_dir():
+        open_paths = {str(path.resolve()) for path in fd_dir.iterdir()}
+        assert not any(path.startswith(str(tmp_path)) for path in open_paths)